@@ -0,0 +1,294 @@
+"""
+端到端生成压测（离线）：基于本地模拟方舟服务，测量生成引擎与界面生成线程的
+首字耗时、分块吞吐、界面可见延迟、中断耗时，可保存结果并与基线对比（回归时返回非0）
+运行（项目根目录）：python -m benchmarks.bench_generation [--runs 5] [--save bench.json] [--baseline bench.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")  # 无显示环境也可测界面链路
+
+from benchmarks.mock_ark_server import MockArkConfig, MockArkServer
+from config.app_config import global_config
+from core.ai_client import ArkAIClient
+from core.engine import GenerationEngine, EVENT_TEXT, EVENT_DONE, TERMINAL_EVENTS
+
+BENCH_TEMPLATE = "【工作日报】\n一、今日完成\n二、存在问题\n三、明日计划"
+
+# 指标方向：耗时类越小越好，吞吐类越大越好（用于基线对比）
+HIGHER_IS_BETTER = ("chunks_per_s", "chars_per_s", "reports_per_min")
+
+
+def _stats(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"p50": 0.0, "p95": 0.0}
+    p95_index = min(len(ordered) - 1, int(round(0.95 * len(ordered) + 0.5)) - 1)
+    return {"p50": round(statistics.median(ordered), 2), "p95": round(ordered[max(p95_index, 0)], 2)}
+
+
+def _configure(server: MockArkServer):
+    """只修改内存中的配置指向模拟服务（不写回config.ini），关闭生成缓存避免污染本地缓存库"""
+    global_config.ark_api_key = "mock-bench-key"
+    global_config.ark_base_url = server.base_url
+    global_config.cache_enabled = False
+    global_config.retry_backoff_base = 0.05
+    global_config.retry_backoff_max = 0.2
+    global_config.hedge_enabled = False
+    random.seed(0)  # 退避抖动可复现，便于与基线对比
+    ArkAIClient().get_client()  # 按新配置重建共享客户端
+
+
+# ---------- 生成引擎 ----------
+async def _engine_session(engine: GenerationEngine, work: str, cancel_after_ms: float = None) -> dict:
+    """跑一个会话并记录各时间点；cancel_after_ms 为收到首字后多久发起中断"""
+    session = engine.create_session(BENCH_TEMPLATE, work, force_regenerate=True)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    first_text = last_text = None
+    chunks = chars = 0
+    status = None
+    async for event in session.events():
+        if event.kind == EVENT_TEXT:
+            last_text = time.perf_counter()
+            if first_text is None:
+                first_text = last_text
+                if cancel_after_ms is not None:
+                    loop.call_later(cancel_after_ms / 1000, session.cancel)
+            chunks += 1
+            chars += len(event.text)
+        elif event.kind in TERMINAL_EVENTS:
+            status = event.kind
+    end = time.perf_counter()
+    result = {"status": status, "chunks": chunks, "chars": chars, "total_ms": (end - start) * 1000,
+              "cancel_ms": session.cancel_latency_ms}
+    if first_text is not None:
+        result["ttft_ms"] = (first_text - start) * 1000
+        stream_s = (last_text - first_text) if last_text > first_text else 0
+        result["chunks_per_s"] = (chunks - 1) / stream_s if stream_s else 0.0
+        result["chars_per_s"] = chars / stream_s if stream_s else 0.0
+    return result
+
+
+def bench_engine_single(server: MockArkServer, runs: int) -> dict:
+    """单会话：首字耗时/总耗时/分块吞吐"""
+    engine = GenerationEngine(max_concurrency=1)
+    results = [asyncio.run(_engine_session(engine, f"单会话压测#{i}")) for i in range(runs)]
+    engine.shutdown()
+    ok = [item for item in results if item["status"] == EVENT_DONE]
+    return {
+        "ok": f"{len(ok)}/{runs}",
+        "ttft_ms": _stats([item["ttft_ms"] for item in ok]),
+        "total_ms": _stats([item["total_ms"] for item in ok]),
+        "chunks_per_s": _stats([item["chunks_per_s"] for item in ok]),
+        "chars_per_s": _stats([item["chars_per_s"] for item in ok]),
+    }
+
+
+def bench_engine_concurrent(server: MockArkServer, sessions: int, concurrency: int) -> dict:
+    """并发会话：整体吞吐与单篇耗时分布"""
+    engine = GenerationEngine(max_concurrency=concurrency)
+
+    async def run_all():
+        return await asyncio.gather(*[_engine_session(engine, f"并发压测#{i}") for i in range(sessions)])
+
+    start = time.perf_counter()
+    results = asyncio.run(run_all())
+    wall_s = time.perf_counter() - start
+    engine.shutdown()
+    ok = [item for item in results if item["status"] == EVENT_DONE]
+    return {
+        "ok": f"{len(ok)}/{sessions}",
+        "reports_per_min": round(len(ok) / wall_s * 60, 2),
+        "ttft_ms": _stats([item["ttft_ms"] for item in ok]),
+        "total_ms": _stats([item["total_ms"] for item in ok]),
+    }
+
+
+def bench_engine_retry(server: MockArkServer, runs: int) -> dict:
+    """错误注入：每个会话的首个请求返回429，测量重试后的首字耗时"""
+    engine = GenerationEngine(max_concurrency=1)
+    results = []
+    for i in range(runs):
+        server.reset_stats()
+        server.config.fail_first = 1
+        results.append(asyncio.run(_engine_session(engine, f"重试压测#{i}")))
+    server.config.fail_first = 0
+    engine.shutdown()
+    ok = [item for item in results if item["status"] == EVENT_DONE]
+    return {"ok": f"{len(ok)}/{runs}", "ttft_ms": _stats([item["ttft_ms"] for item in ok])}
+
+
+def bench_engine_cancel(server: MockArkServer, runs: int) -> dict:
+    """卡顿流中断：输出若干分块后服务端卡住，此时发起中断，测量中断耗时"""
+    engine = GenerationEngine(max_concurrency=1)
+    server.config.stall_after_chunks, server.config.stall_ms = 3, 10000
+    stall_wait_ms = 3 * server.config.chunk_chars / server.config.tokens_per_sec * 1000 + 200
+    results = [asyncio.run(_engine_session(engine, f"中断压测#{i}", cancel_after_ms=stall_wait_ms))
+               for i in range(runs)]
+    server.config.stall_after_chunks, server.config.stall_ms = -1, 0
+    engine.shutdown()
+    canceled = [item for item in results if item["cancel_ms"] is not None]
+    return {"canceled": f"{len(canceled)}/{runs}", "cancel_ms": _stats([item["cancel_ms"] for item in canceled])}
+
+
+# ---------- 界面生成线程 ----------
+def _run_ui_generation(work: str, on_first_render: Callable = None) -> dict:
+    """驱动 GenerateReportThread + 帧合并渲染器（与主窗口同样的接线），记录界面可见的时间点"""
+    from PySide6.QtCore import QEventLoop, QTimer
+    from PySide6.QtWidgets import QPlainTextEdit
+    from core.generator import GenerateReportThread
+    from ui.components.stream_renderer import FrameCoalescedRenderer
+
+    editor = QPlainTextEdit()
+    renderer = FrameCoalescedRenderer(editor)
+    marks = {"flushes": 0}
+    loop = QEventLoop()
+    thread = GenerateReportThread(BENCH_TEMPLATE, work, force_regenerate=True)
+
+    def on_flushed():
+        marks["flushes"] += 1
+        if "first_render" not in marks:
+            marks["first_render"] = time.perf_counter()
+            if on_first_render is not None:
+                on_first_render(thread, marks)
+
+    def on_finish():
+        renderer.flush()
+        marks["finish"] = time.perf_counter()
+        loop.quit()
+
+    renderer.flushed.connect(on_flushed)
+    thread.text_signal.connect(renderer.append)
+    thread.finish_signal.connect(on_finish)
+    QTimer.singleShot(30000, loop.quit)  # 兜底，避免异常时卡死
+    marks["start"] = time.perf_counter()
+    thread.start()
+    loop.exec()
+    thread.wait(5000)
+    marks["chars"] = len(editor.toPlainText())
+    editor.deleteLater()
+    return marks
+
+
+def bench_ui(server: MockArkServer, runs: int) -> dict:
+    """界面链路：从点击生成到首字出现在结果框（界面首字），到全部内容渲染完成（界面总耗时）"""
+    from PySide6.QtWidgets import QApplication
+    _app = QApplication.instance() or QApplication([])  # 保持引用：界面线程测量期间需要存活的QApplication
+    results = [_run_ui_generation(f"界面压测#{i}") for i in range(runs)]
+    ok = [item for item in results if "first_render" in item and "finish" in item]
+    return {
+        "ok": f"{len(ok)}/{runs}",
+        "ui_ttft_ms": _stats([(item["first_render"] - item["start"]) * 1000 for item in ok]),
+        "ui_total_ms": _stats([(item["finish"] - item["start"]) * 1000 for item in ok]),
+        "ui_flushes": _stats([item["flushes"] for item in ok]),
+    }
+
+
+def bench_ui_cancel(server: MockArkServer, runs: int) -> dict:
+    """界面中断：首字渲染后服务端卡住，调用 thread.cancel()，测量到界面收到完成信号的耗时"""
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    _app = QApplication.instance() or QApplication([])  # 保持引用：界面线程测量期间需要存活的QApplication
+    server.config.stall_after_chunks, server.config.stall_ms = 3, 10000
+    stall_wait_ms = int(3 * server.config.chunk_chars / server.config.tokens_per_sec * 1000 + 200)
+
+    def cancel_later(thread, marks):
+        def do_cancel():
+            marks["cancel"] = time.perf_counter()
+            thread.cancel()
+        QTimer.singleShot(stall_wait_ms, do_cancel)
+
+    results = [_run_ui_generation(f"界面中断压测#{i}", on_first_render=cancel_later) for i in range(runs)]
+    server.config.stall_after_chunks, server.config.stall_ms = -1, 0
+    ok = [item for item in results if "cancel" in item and "finish" in item]
+    return {"canceled": f"{len(ok)}/{runs}",
+            "ui_cancel_ms": _stats([(item["finish"] - item["cancel"]) * 1000 for item in ok])}
+
+
+# ---------- 汇总/基线对比 ----------
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """逐项对比p50，劣化超过容忍比例的指标视为回归"""
+    regressions = []
+    for scenario, metrics in results.items():
+        for name, value in metrics.items():
+            base = baseline.get(scenario, {}).get(name)
+            if not isinstance(value, dict) or not isinstance(base, dict) or not base.get("p50"):
+                continue
+            current, previous = value["p50"], base["p50"]
+            if name.endswith(HIGHER_IS_BETTER):
+                worse = current < previous * (1 - tolerance)
+            else:
+                worse = current > previous * (1 + tolerance)
+            if worse:
+                regressions.append(f"{scenario}.{name}：p50 {previous} → {current}")
+    return regressions
+
+
+def print_results(results: dict):
+    print("\n========== 生成链路压测结果 ==========")
+    for scenario, metrics in results.items():
+        print(f"[{scenario}]")
+        for name, value in metrics.items():
+            if isinstance(value, dict):
+                print(f"  {name:<16} p50={value['p50']:<10} p95={value['p95']}")
+            else:
+                print(f"  {name:<16} {value}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="端到端生成压测（本地模拟方舟服务，无需联网）")
+    parser.add_argument("--runs", type=int, default=5, help="每个场景的重复次数")
+    parser.add_argument("--sessions", type=int, default=4, help="并发场景的会话数（超过并发上限时首字耗时包含排队时间）")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发场景的引擎并发上限")
+    parser.add_argument("--ttft-ms", type=float, default=200, help="模拟首字耗时（毫秒）")
+    parser.add_argument("--tokens-per-sec", type=float, default=400, help="模拟生成速度（字符/秒）")
+    parser.add_argument("--chunk-chars", type=int, default=4, help="模拟分块字符数")
+    parser.add_argument("--total-chars", type=int, default=600, help="模拟响应总字符数")
+    parser.add_argument("--skip-ui", action="store_true", help="跳过界面链路场景（未安装PySide6时）")
+    parser.add_argument("--save", help="保存结果到JSON文件（可作为基线）")
+    parser.add_argument("--baseline", help="与基线JSON对比，劣化超出容忍比例时返回1")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="基线对比容忍比例（默认0.2即20%%）")
+    args = parser.parse_args(argv)
+
+    config = MockArkConfig(ttft_ms=args.ttft_ms, tokens_per_sec=args.tokens_per_sec,
+                           chunk_chars=args.chunk_chars, total_chars=args.total_chars)
+    results = {}
+    with MockArkServer(config) as server:
+        _configure(server)
+        print(f"🧪 模拟方舟服务：{server.base_url} | 首字 {args.ttft_ms:g} ms | {args.tokens_per_sec:g} 字符/秒")
+        results["engine_single"] = bench_engine_single(server, args.runs)
+        results["engine_concurrent"] = bench_engine_concurrent(server, args.sessions, args.concurrency)
+        results["engine_retry_429"] = bench_engine_retry(server, args.runs)
+        results["engine_cancel"] = bench_engine_cancel(server, args.runs)
+        if not args.skip_ui:
+            results["ui_generate"] = bench_ui(server, args.runs)
+            results["ui_cancel"] = bench_ui_cancel(server, args.runs)
+    ArkAIClient().close()
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存：{args.save}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ 发现 {len(regressions)} 项性能回归（容忍 {args.tolerance:.0%}）：")
+            for item in regressions:
+                print(f"  - {item}")
+            return 1
+        print(f"\n✅ 与基线对比无回归（容忍 {args.tolerance:.0%}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
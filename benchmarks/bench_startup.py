@@ -0,0 +1,158 @@
+"""
+冷启动预算：在全新解释器中用 -X importtime 测量 main.py 的启动导入耗时，并检查应延迟加载的重量级模块
+（方舟SDK、httpx、openpyxl、pandas、各弹窗模块）没有在启动时被导入；可选测量进程启动到主窗口首帧绘制的耗时
+超出预算或启动时加载了延迟模块时返回1（可接入CI/打包前检查）
+运行（项目根目录）：python -m benchmarks.bench_startup [--runs 5] [--budget-ms 300] [--window --window-budget-ms 1500]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_MODULE = "main"
+# 启动时不应加载的模块（含其子模块）：只在首次生成/打开对应弹窗/导出时导入
+DEFERRED_MODULES = (
+    "volcenginesdkarkruntime", "httpx", "openpyxl", "pandas", "qdarkstyle",
+    "utils.excel_exporter", "utils.history_exporters",
+    "ui.history_window", "ui.template_window", "ui.config_window", "ui.help_window", "ui.about_window",
+)
+DEFAULT_IMPORT_BUDGET_MS = 300
+DEFAULT_WINDOW_BUDGET_MS = 1500
+WINDOW_TIMEOUT_S = 30
+
+# 子进程：按 main.py 的启动顺序创建主窗口，首个绘制事件时输出时间戳后立即退出
+_WINDOW_PROBE = """
+import os, sys, time, json
+from main import QApplication, QStyleFactory, GLOBAL_FONT, DailyReportGenerator, init_database
+from PySide6.QtCore import QEvent, QObject, QTimer
+app = QApplication(sys.argv)
+app.setFont(GLOBAL_FONT)
+init_database()
+app.setStyle(QStyleFactory.create('Fusion'))
+window = DailyReportGenerator()
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            print(json.dumps({"painted_at": time.time()}), flush=True)
+            os._exit(0)
+        return False
+
+paint_filter = FirstPaint()
+window.installEventFilter(paint_filter)
+window.show()
+QTimer.singleShot(%d, lambda: os._exit(2))
+app.exec()
+"""
+
+
+def _child_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")  # 无显示环境也可测
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, str, int, int]]:
+    """解析 -X importtime 输出：[(层级, 模块名, 自身耗时us, 累计耗时us)]，顺序同输出（子模块在父模块之前）"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure_imports() -> dict:
+    """全新解释器中 import main，返回启动导入耗时、启动时加载的模块与自身耗时最高的模块"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {STARTUP_MODULE}"],
+                          cwd=PROJECT_ROOT, env=_child_env(), capture_output=True, text=True, encoding="utf-8")
+    entries = parse_importtime(proc.stderr)
+    index = next((i for i, entry in enumerate(entries) if entry[0] == 0 and entry[1] == STARTUP_MODULE), None)
+    if index is None:
+        raise RuntimeError(f"导入 {STARTUP_MODULE} 失败：\n{proc.stderr[-2000:]}")
+    # main 的子树是它之前、上一个顶层模块之后的连续输出
+    start = index
+    while start > 0 and entries[start - 1][0] > 0:
+        start -= 1
+    subtree = entries[start:index + 1]
+    return {
+        "import_ms": entries[index][3] / 1000,
+        "modules": {name for _, name, _, _ in entries},
+        "heaviest": sorted(((self_us / 1000, name) for _, name, self_us, _ in subtree), reverse=True),
+    }
+
+
+def measure_window() -> float:
+    """从启动解释器到主窗口首帧绘制的耗时（毫秒），与用户双击启动后看到窗口的等待时间一致"""
+    start = time.time()
+    proc = subprocess.run([sys.executable, "-c", _WINDOW_PROBE % (WINDOW_TIMEOUT_S * 1000)],
+                          cwd=PROJECT_ROOT, env=_child_env(), capture_output=True, text=True, encoding="utf-8")
+    for line in proc.stdout.splitlines():
+        if line.startswith("{"):
+            return (json.loads(line)["painted_at"] - start) * 1000
+    raise RuntimeError(f"主窗口未完成首帧绘制（退出码 {proc.returncode}）：\n{proc.stderr[-2000:]}")
+
+
+def find_deferred(modules: set) -> List[str]:
+    """启动时已加载的延迟模块（子模块归并到 DEFERRED_MODULES 中的名称）"""
+    return [deferred for deferred in DEFERRED_MODULES
+            if any(name == deferred or name.startswith(deferred + ".") for name in modules)]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {"median": round(statistics.median(values), 1), "max": round(max(values), 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="冷启动导入耗时与首帧耗时预算检查")
+    parser.add_argument("--runs", type=int, default=5, help="测量次数（另有1次预热不计入，取中位数与预算比较）")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS, help="启动导入耗时预算（毫秒）")
+    parser.add_argument("--window", action="store_true", help="同时测量进程启动到主窗口首帧绘制的耗时")
+    parser.add_argument("--window-budget-ms", type=float, default=DEFAULT_WINDOW_BUDGET_MS,
+                        help="主窗口首帧耗时预算（毫秒）")
+    parser.add_argument("--top", type=int, default=10, help="列出自身导入耗时最高的模块数")
+    args = parser.parse_args(argv)
+    runs = max(args.runs, 1)
+
+    measure_imports()  # 预热：生成 .pyc、填充文件缓存，避免首轮编译耗时干扰
+    samples = [measure_imports() for _ in range(runs)]
+    imports = _summary([sample["import_ms"] for sample in samples])
+    print(f"🧪 启动导入（import {STARTUP_MODULE}，{runs}次）：中位数 {imports['median']} ms，最大 {imports['max']} ms")
+    print(f"  自身导入耗时最高的 {args.top} 个模块：")
+    for self_ms, name in samples[-1]["heaviest"][:args.top]:
+        print(f"  {self_ms:8.1f} ms  {name}")
+
+    failures = []
+    if imports["median"] > args.budget_ms:
+        failures.append(f"启动导入耗时 {imports['median']} ms 超出预算 {args.budget_ms:g} ms")
+    deferred = find_deferred(set.union(*(sample["modules"] for sample in samples)))
+    if deferred:
+        failures.append(f"启动时加载了应延迟的模块：{', '.join(deferred)}")
+
+    if args.window:
+        measure_window()
+        window = _summary([measure_window() for _ in range(runs)])
+        print(f"🪟 启动到主窗口首帧（{runs}次）：中位数 {window['median']} ms，最大 {window['max']} ms")
+        if window["median"] > args.window_budget_ms:
+            failures.append(f"主窗口首帧耗时 {window['median']} ms 超出预算 {args.window_budget_ms:g} ms")
+
+    if failures:
+        print("\n❌ 冷启动预算检查未通过：")
+        for item in failures:
+            print(f"  - {item}")
+        return 1
+    print(f"\n✅ 冷启动在预算内（导入 ≤ {args.budget_ms:g} ms"
+          f"{f'，首帧 ≤ {args.window_budget_ms:g} ms' if args.window else ''}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+流式分块解析微基准：对比旧解析逻辑（逐层hasattr探测+多次strip）与按事件类型分发的新解析器的单块耗时
+运行（项目根目录）：python -m benchmarks.bench_stream_parser [-n 200000]
+"""
+import argparse
+import sys
+import timeit
+from types import SimpleNamespace
+from volcenginesdkarkruntime.types.responses.response_created_event import ResponseCreatedEvent
+from volcenginesdkarkruntime.types.responses.response_text_delta_event import ResponseTextDeltaEvent
+from volcenginesdkarkruntime.types.responses.response_text_done_event import ResponseTextDoneEvent
+from core.stream_parser import parse_stream_chunk
+
+
+def legacy_parse_stream_chunk(chunk) -> str:
+    """旧版解析逻辑（原 core/generator.py 的 _parse_stream_chunk），仅作对照"""
+    if hasattr(chunk, 'text') and chunk.text and chunk.text.strip():
+        return chunk.text.strip()
+    elif hasattr(chunk, 'output') and chunk.output:
+        for output in chunk.output:
+            if hasattr(output, 'content') and output.content:
+                for content in output.content:
+                    if hasattr(content, 'text') and content.text.strip():
+                        return content.text.strip()
+    return ""
+
+
+def build_stream(chunk_count: int) -> list:
+    """模拟一次真实的流式响应：created事件 + N个文本增量 + done事件"""
+    deltas = ["今日完成", "接口联调，", "修复了3个", "问题。\n", "  - 明日计划：", "压测\n\n"]
+    events = [ResponseCreatedEvent.construct(type="response.created", sequence_number=0)]
+    for i in range(chunk_count):
+        events.append(ResponseTextDeltaEvent.construct(
+            type="response.output_text.delta", delta=deltas[i % len(deltas)],
+            item_id="msg_1", output_index=0, content_index=0))
+    full_text = "".join(event.delta for event in events[1:])
+    events.append(ResponseTextDoneEvent.construct(
+        type="response.output_text.done", text=full_text, item_id="msg_1", output_index=0, content_index=0))
+    return events
+
+
+def build_legacy_stream(chunk_count: int) -> list:
+    """旧版SDK分块（仅有text字段）"""
+    return [SimpleNamespace(text=f"第{i}段内容，\n") for i in range(chunk_count)]
+
+
+def bench(parser, chunks: list, repeat: int) -> float:
+    """返回单块平均耗时（纳秒），取多轮最优值"""
+    def run():
+        for chunk in chunks:
+            parser(chunk)
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    return best / len(chunks) * 1e9
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="流式分块解析微基准")
+    parser.add_argument("-n", "--chunks", type=int, default=200000, help="每轮解析的分块数")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="重复轮数（取最优）")
+    args = parser.parse_args(argv)
+
+    typed = build_stream(args.chunks)
+    legacy = build_legacy_stream(args.chunks)
+    expected = typed[-1].text
+    print(f"分块数：{args.chunks} | 轮数：{args.repeat}")
+    for title, func in (("旧解析逻辑", legacy_parse_stream_chunk), ("新解析器", parse_stream_chunk)):
+        texts = [text for text in map(func, typed) if text]
+        print(f"{title}：产出文本的分块 {len(texts)} 个 | 拼接结果与完整文本{'一致' if ''.join(texts) == expected else '不一致'}")
+    for title, chunks in (("类型化增量事件", typed), ("旧版text分块", legacy)):
+        old_ns = bench(legacy_parse_stream_chunk, chunks, args.repeat)
+        new_ns = bench(parse_stream_chunk, chunks, args.repeat)
+        print(f"{title}：旧 {old_ns:.0f} ns/块 | 新 {new_ns:.0f} ns/块 | 提升 {old_ns / new_ns:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+本地模拟火山方舟服务：实现 responses.create(stream=True) 的SSE流式协议，用于离线压测/回归
+可配置首字耗时、生成速度、分块大小、错误注入、中途卡顿
+单独运行（项目根目录）：python -m benchmarks.mock_ark_server --port 8765 --ttft-ms 300 --tokens-per-sec 80
+然后在 config.ini 的 [ARK_CONFIG] 中设置 base_url = http://127.0.0.1:8765/api/v3
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# 模拟生成的日报正文（循环取用，含换行/缩进，便于校验空白是否原样保留）
+SAMPLE_REPORT = (
+    "【工作日报】\n"
+    "一、今日完成\n"
+    "  1. 完成生成引擎与界面解耦，流式输出改为按帧批量刷新；\n"
+    "  2. 历史记录检索接入全文索引，万级数据毫秒级返回；\n"
+    "二、存在问题\n"
+    "  - 高峰期接口偶发限流，已加入退避重试与对冲请求。\n"
+    "三、明日计划\n"
+    "  1. 补充离线压测用例，发布前对比基线。\n"
+)
+
+
+class MockArkConfig:
+    """模拟服务行为参数（运行中可直接修改属性，后续请求生效）"""
+
+    def __init__(self, ttft_ms: float = 200, tokens_per_sec: float = 100, chunk_chars: int = 4,
+                 total_chars: int = 600, error_rate: float = 0.0, error_status: int = 429,
+                 fail_first: int = 0, stall_after_chunks: int = -1, stall_ms: float = 0, seed: Optional[int] = None):
+        """
+        :param ttft_ms: 首字耗时（毫秒）
+        :param tokens_per_sec: 生成速度（每秒字符数，按字符近似token）
+        :param chunk_chars: 每个增量事件的字符数
+        :param total_chars: 每次响应的总字符数
+        :param error_rate: 随机返回错误的概率（0~1）
+        :param error_status: 注入错误的HTTP状态码
+        :param fail_first: 前N个请求固定返回错误（用于验证重试）
+        :param stall_after_chunks: 输出N个分块后卡顿（-1不卡顿）
+        :param stall_ms: 卡顿时长（毫秒）
+        :param seed: 随机种子（错误注入可复现）
+        """
+        self.ttft_ms = ttft_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.chunk_chars = max(chunk_chars, 1)
+        self.total_chars = total_chars
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_first = fail_first
+        self.stall_after_chunks = stall_after_chunks
+        self.stall_ms = stall_ms
+        self.random = random.Random(seed)
+
+    def report_text(self) -> str:
+        repeat = self.total_chars // len(SAMPLE_REPORT) + 1
+        return (SAMPLE_REPORT * repeat)[:self.total_chars]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # chunked传输+长连接，与真实服务一致
+
+    def log_message(self, format, *args):
+        pass  # 压测时不输出访问日志
+
+    def do_HEAD(self):
+        # 连接预热请求
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        server: MockArkServer = self.server.owner
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.rstrip("/").endswith("/responses"):
+            self._send_json(404, {"error": {"code": "NotFound", "message": f"unknown path {self.path}"}})
+            return
+        request_no = server.next_request_no()
+        config = server.config
+        if request_no <= config.fail_first or config.random.random() < config.error_rate:
+            server.count("errors")
+            self._send_json(config.error_status, {"error": {"code": "MockInjectedError",
+                                                            "message": f"injected {config.error_status}"}})
+            return
+        try:
+            model = json.loads(body or b"{}").get("model", "mock-model")
+        except json.JSONDecodeError:
+            model = "mock-model"
+        try:
+            self._stream_response(config, model, request_no)
+            server.count("completed")
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            server.count("disconnected")  # 客户端中断/关闭连接
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_event(self, event_type: str, payload: dict):
+        payload["type"] = event_type
+        data = f"event: {event_type}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _stream_response(self, config: MockArkConfig, model: str, request_no: int):
+        response_id = f"resp_mock_{request_no}"
+        item_id = f"msg_mock_{request_no}"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        response = {"id": response_id, "object": "response", "model": model, "status": "in_progress",
+                    "created_at": int(time.time()), "output": []}
+        sequence = itertools.count()
+        self._write_event("response.created", {"response": response, "sequence_number": next(sequence)})
+        time.sleep(config.ttft_ms / 1000)
+
+        text = config.report_text()
+        interval = config.chunk_chars / config.tokens_per_sec if config.tokens_per_sec > 0 else 0
+        next_send = time.perf_counter()
+        for index in range(0, len(text), config.chunk_chars):
+            chunk_no = index // config.chunk_chars
+            if chunk_no == config.stall_after_chunks and config.stall_ms > 0:
+                time.sleep(config.stall_ms / 1000)
+                next_send = time.perf_counter()
+            self._write_event("response.output_text.delta", {
+                "item_id": item_id, "output_index": 0, "content_index": 0,
+                "delta": text[index:index + config.chunk_chars], "sequence_number": next(sequence)})
+            # 按目标速度匀速输出（以绝对时间推进，避免sleep误差累积）
+            next_send += interval
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        self._write_event("response.output_text.done", {
+            "item_id": item_id, "output_index": 0, "content_index": 0, "text": text,
+            "sequence_number": next(sequence)})
+        response.update(status="completed", output=[{
+            "id": item_id, "type": "message", "role": "assistant", "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}]}])
+        self._write_event("response.completed", {"response": response, "sequence_number": next(sequence)})
+        data = b"data: [DONE]\n\n"
+        self.wfile.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+class MockArkServer:
+    """本地模拟服务（后台线程运行），支持 with 语句；base_url 可直接填入 ARK_CONFIG.base_url"""
+
+    def __init__(self, config: Optional[MockArkConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockArkConfig()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._request_no = 0
+        self.stats = {"completed": 0, "errors": 0, "disconnected": 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api/v3"
+
+    def next_request_no(self) -> int:
+        with self._lock:
+            self._request_no += 1
+            return self._request_no
+
+    def count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def reset_stats(self):
+        with self._lock:
+            self._request_no = 0
+            self.stats = {key: 0 for key in self.stats}
+
+    def start(self) -> "MockArkServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-ark", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """在当前线程阻塞运行（命令行模式）"""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地模拟火山方舟流式服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft-ms", type=float, default=200, help="首字耗时（毫秒）")
+    parser.add_argument("--tokens-per-sec", type=float, default=100, help="生成速度（字符/秒）")
+    parser.add_argument("--chunk-chars", type=int, default=4, help="每个增量分块的字符数")
+    parser.add_argument("--total-chars", type=int, default=600, help="每次响应的总字符数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机错误概率（0~1）")
+    parser.add_argument("--error-status", type=int, default=429, help="注入错误的HTTP状态码")
+    parser.add_argument("--fail-first", type=int, default=0, help="前N个请求固定返回错误")
+    parser.add_argument("--stall-after", type=int, default=-1, help="输出N个分块后卡顿（-1不卡顿）")
+    parser.add_argument("--stall-ms", type=float, default=0, help="卡顿时长（毫秒）")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    args = parser.parse_args(argv)
+
+    config = MockArkConfig(ttft_ms=args.ttft_ms, tokens_per_sec=args.tokens_per_sec, chunk_chars=args.chunk_chars,
+                           total_chars=args.total_chars, error_rate=args.error_rate, error_status=args.error_status,
+                           fail_first=args.fail_first, stall_after_chunks=args.stall_after,
+                           stall_ms=args.stall_ms, seed=args.seed)
+    server = MockArkServer(config, host=args.host, port=args.port)
+    print(f"🧪 模拟方舟服务已启动：{server.base_url}（Ctrl+C 退出）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from pathlib import Path
 
 # 数据库文件存储路径：项目根目录下的 daily_paper.db
 DB_PATH = Path(__file__).parent.parent / "daily_paper.db"
+# 生成结果缓存库：与 daily_paper.db 同目录
+CACHE_DB_PATH = DB_PATH.parent / "generation_cache.db"
 # 配置文件存储路径（项目根目录下的config.ini）
 CONFIG_FILE = Path(__file__).parent.parent / "config.ini"
 
@@ -13,9 +15,51 @@ class AppConfig:
         # 仅保留核心配置（附件仅需这两个）
         self.ark_api_key = ""          # 火山方舟ARK_API_KEY（唯一鉴权字段）
         self.model_name = "doubao-seed-1-6-lite-251015"  # 默认目标模型
+        self.ark_base_url = ""         # 接口地址（留空使用华北区官方端点，压测时可指向本地模拟服务）
         # 应用基础配置（保留原有）
         self.window_geometry = ""      # 窗口大小位置
         self.default_template = "默认日报模板"  # 默认模板名称
+        # 流式输出节流配置（替代原固定sleep，按时间/字数预算批量刷新）
+        self.stream_flush_interval_ms = 50   # 时间预算（毫秒）
+        self.stream_flush_chars = 64         # 字数预算（字符）
+        self.stream_max_throughput = False   # 最大吞吐模式：每块立即输出，不做缓冲
+        # HTTP连接池配置（共享Ark客户端，长连接复用）
+        self.http_pool_size = 4              # 连接池大小（最大连接数/保活连接数）
+        self.http2_enabled = False           # 启用HTTP/2（需 pip install httpx[http2]，未安装自动回退HTTP/1.1）
+        self.http_connect_timeout = 5.0      # 建连超时（秒）
+        self.http_read_timeout = 120.0       # 读取超时（秒）
+        self.http_keepalive_expiry = 60.0    # 空闲连接保活时长（秒）
+        # 生成结果缓存配置（相同模板+工作内容+模型直接复用结果）
+        self.cache_enabled = True            # 是否启用生成缓存
+        self.cache_ttl_hours = 72.0          # 缓存有效期（小时，0为永不过期）
+        self.cache_max_entries = 500         # 最大缓存条数
+        self.cache_max_size_mb = 50          # 缓存总大小上限（MB）
+        # 重试/看门狗/对冲配置（建连超时见HTTP_CONFIG）
+        self.retry_max_retries = 2           # 瞬时错误（429/5xx/超时）最大重试次数
+        self.retry_backoff_base = 0.5        # 退避基数（秒），按2的幂递增
+        self.retry_backoff_max = 8.0         # 单次退避上限（秒）
+        self.ttft_timeout = 30.0             # 首字超时（秒）
+        self.idle_timeout = 30.0             # 分块最大间隔（秒）
+        self.hedge_enabled = False           # 是否启用对冲请求
+        self.hedge_delay_ms = 3000           # 样本不足时的对冲延迟（毫秒）
+        self.hedge_floor_ms = 1000           # 对冲阈值下限（毫秒）
+        self.hedge_min_samples = 20          # 启用p95阈值所需的最少首字样本数
+        # 数据库配置（后台线程写后台批量提交、连接池与PRAGMA参数）
+        self.db_write_batch_size = 50        # 单批最多提交的记录数
+        self.db_write_flush_interval_ms = 200  # 写入最长排队时间（毫秒）
+        self.db_read_pool_size = 4           # 只读连接池大小
+        self.db_cache_size_kb = 16384        # 每个连接的页缓存（KB）
+        self.db_mmap_size_mb = 128           # 内存映射读取大小（MB，0为关闭）
+        self.db_busy_timeout_ms = 5000       # 锁等待超时（毫秒）
+        self.db_statement_cache_size = 256   # 每个连接缓存的预编译语句数
+        self.db_compress_enabled = False     # 是否压缩历史记录大文本（压缩后外部数据库工具无法直接查看）
+        self.db_compress_min_bytes = 512     # 超过该字节数的文本才压缩
+        self.db_compress_level = 6           # zlib压缩级别（1-9）
+        self.db_migrate_batch_size = 500     # 数据迁移每批处理的记录数
+        self.db_migrate_startup_budget_ms = 300  # 启动时数据迁移最长占用时间（毫秒），超出转入后台
+        self.db_import_batch_size = 5000     # 批量导入每个事务写入的记录数
+        self.db_search_debounce_ms = 250     # 搜索框停止输入多久后开始查询（毫秒）
+        self.db_search_cache_entries = 64    # 查询结果缓存条数（每页/每次计数占一条）
 
         # 初始化配置解析器，加载配置文件
         self.config = configparser.ConfigParser()
@@ -28,9 +72,51 @@ class AppConfig:
             # 读取火山方舟配置（ARK_CONFIG节点）
             self.ark_api_key = self.config.get("ARK_CONFIG", "ark_api_key", fallback="")
             self.model_name = self.config.get("ARK_CONFIG", "model_name", fallback="doubao-seed-1-6-lite-251015")
+            self.ark_base_url = self.config.get("ARK_CONFIG", "base_url", fallback="")
             # 读取应用配置
             self.window_geometry = self.config.get("APP_CONFIG", "window_geometry", fallback="")
             self.default_template = self.config.get("APP_CONFIG", "default_template", fallback="默认日报模板")
+            # 读取流式输出节流配置
+            self.stream_flush_interval_ms = self.config.getint("GENERATE_CONFIG", "stream_flush_interval_ms", fallback=50)
+            self.stream_flush_chars = self.config.getint("GENERATE_CONFIG", "stream_flush_chars", fallback=64)
+            self.stream_max_throughput = self.config.getboolean("GENERATE_CONFIG", "stream_max_throughput", fallback=False)
+            # 读取HTTP连接池配置
+            self.http_pool_size = self.config.getint("HTTP_CONFIG", "pool_size", fallback=4)
+            self.http2_enabled = self.config.getboolean("HTTP_CONFIG", "http2", fallback=False)
+            self.http_connect_timeout = self.config.getfloat("HTTP_CONFIG", "connect_timeout", fallback=5.0)
+            self.http_read_timeout = self.config.getfloat("HTTP_CONFIG", "read_timeout", fallback=120.0)
+            self.http_keepalive_expiry = self.config.getfloat("HTTP_CONFIG", "keepalive_expiry", fallback=60.0)
+            # 读取生成缓存配置
+            self.cache_enabled = self.config.getboolean("CACHE_CONFIG", "enabled", fallback=True)
+            self.cache_ttl_hours = self.config.getfloat("CACHE_CONFIG", "ttl_hours", fallback=72.0)
+            self.cache_max_entries = self.config.getint("CACHE_CONFIG", "max_entries", fallback=500)
+            self.cache_max_size_mb = self.config.getint("CACHE_CONFIG", "max_size_mb", fallback=50)
+            # 读取重试/看门狗/对冲配置
+            self.retry_max_retries = self.config.getint("RETRY_CONFIG", "max_retries", fallback=2)
+            self.retry_backoff_base = self.config.getfloat("RETRY_CONFIG", "backoff_base", fallback=0.5)
+            self.retry_backoff_max = self.config.getfloat("RETRY_CONFIG", "backoff_max", fallback=8.0)
+            self.ttft_timeout = self.config.getfloat("RETRY_CONFIG", "ttft_timeout", fallback=30.0)
+            self.idle_timeout = self.config.getfloat("RETRY_CONFIG", "idle_timeout", fallback=30.0)
+            self.hedge_enabled = self.config.getboolean("RETRY_CONFIG", "hedge_enabled", fallback=False)
+            self.hedge_delay_ms = self.config.getint("RETRY_CONFIG", "hedge_delay_ms", fallback=3000)
+            self.hedge_floor_ms = self.config.getint("RETRY_CONFIG", "hedge_floor_ms", fallback=1000)
+            self.hedge_min_samples = self.config.getint("RETRY_CONFIG", "hedge_min_samples", fallback=20)
+            # 读取数据库配置
+            self.db_write_batch_size = self.config.getint("DB_CONFIG", "write_batch_size", fallback=50)
+            self.db_write_flush_interval_ms = self.config.getint("DB_CONFIG", "write_flush_interval_ms", fallback=200)
+            self.db_read_pool_size = self.config.getint("DB_CONFIG", "read_pool_size", fallback=4)
+            self.db_cache_size_kb = self.config.getint("DB_CONFIG", "cache_size_kb", fallback=16384)
+            self.db_mmap_size_mb = self.config.getint("DB_CONFIG", "mmap_size_mb", fallback=128)
+            self.db_busy_timeout_ms = self.config.getint("DB_CONFIG", "busy_timeout_ms", fallback=5000)
+            self.db_statement_cache_size = self.config.getint("DB_CONFIG", "statement_cache_size", fallback=256)
+            self.db_compress_enabled = self.config.getboolean("DB_CONFIG", "compress_enabled", fallback=False)
+            self.db_compress_min_bytes = self.config.getint("DB_CONFIG", "compress_min_bytes", fallback=512)
+            self.db_compress_level = self.config.getint("DB_CONFIG", "compress_level", fallback=6)
+            self.db_migrate_batch_size = self.config.getint("DB_CONFIG", "migrate_batch_size", fallback=500)
+            self.db_migrate_startup_budget_ms = self.config.getint("DB_CONFIG", "migrate_startup_budget_ms", fallback=300)
+            self.db_import_batch_size = self.config.getint("DB_CONFIG", "import_batch_size", fallback=5000)
+            self.db_search_debounce_ms = self.config.getint("DB_CONFIG", "search_debounce_ms", fallback=250)
+            self.db_search_cache_entries = self.config.getint("DB_CONFIG", "search_cache_entries", fallback=64)
 
     def save_config(self):
         """保存配置到文件，utf-8编码避免中文乱码"""
@@ -40,6 +126,7 @@ class AppConfig:
         # 仅保存ARK_API_KEY和模型名（核心修改）
         self.config.set("ARK_CONFIG", "ark_api_key", self.ark_api_key)
         self.config.set("ARK_CONFIG", "model_name", self.model_name)
+        self.config.set("ARK_CONFIG", "base_url", self.ark_base_url)
 
         # 确保APP_CONFIG节点存在
         if not self.config.has_section("APP_CONFIG"):
@@ -47,6 +134,62 @@ class AppConfig:
         self.config.set("APP_CONFIG", "window_geometry", self.window_geometry)
         self.config.set("APP_CONFIG", "default_template", self.default_template)
 
+        # 确保GENERATE_CONFIG节点存在
+        if not self.config.has_section("GENERATE_CONFIG"):
+            self.config.add_section("GENERATE_CONFIG")
+        self.config.set("GENERATE_CONFIG", "stream_flush_interval_ms", str(self.stream_flush_interval_ms))
+        self.config.set("GENERATE_CONFIG", "stream_flush_chars", str(self.stream_flush_chars))
+        self.config.set("GENERATE_CONFIG", "stream_max_throughput", str(self.stream_max_throughput))
+
+        # 确保HTTP_CONFIG节点存在
+        if not self.config.has_section("HTTP_CONFIG"):
+            self.config.add_section("HTTP_CONFIG")
+        self.config.set("HTTP_CONFIG", "pool_size", str(self.http_pool_size))
+        self.config.set("HTTP_CONFIG", "http2", str(self.http2_enabled))
+        self.config.set("HTTP_CONFIG", "connect_timeout", str(self.http_connect_timeout))
+        self.config.set("HTTP_CONFIG", "read_timeout", str(self.http_read_timeout))
+        self.config.set("HTTP_CONFIG", "keepalive_expiry", str(self.http_keepalive_expiry))
+
+        # 确保CACHE_CONFIG节点存在
+        if not self.config.has_section("CACHE_CONFIG"):
+            self.config.add_section("CACHE_CONFIG")
+        self.config.set("CACHE_CONFIG", "enabled", str(self.cache_enabled))
+        self.config.set("CACHE_CONFIG", "ttl_hours", str(self.cache_ttl_hours))
+        self.config.set("CACHE_CONFIG", "max_entries", str(self.cache_max_entries))
+        self.config.set("CACHE_CONFIG", "max_size_mb", str(self.cache_max_size_mb))
+
+        # 确保RETRY_CONFIG节点存在
+        if not self.config.has_section("RETRY_CONFIG"):
+            self.config.add_section("RETRY_CONFIG")
+        self.config.set("RETRY_CONFIG", "max_retries", str(self.retry_max_retries))
+        self.config.set("RETRY_CONFIG", "backoff_base", str(self.retry_backoff_base))
+        self.config.set("RETRY_CONFIG", "backoff_max", str(self.retry_backoff_max))
+        self.config.set("RETRY_CONFIG", "ttft_timeout", str(self.ttft_timeout))
+        self.config.set("RETRY_CONFIG", "idle_timeout", str(self.idle_timeout))
+        self.config.set("RETRY_CONFIG", "hedge_enabled", str(self.hedge_enabled))
+        self.config.set("RETRY_CONFIG", "hedge_delay_ms", str(self.hedge_delay_ms))
+        self.config.set("RETRY_CONFIG", "hedge_floor_ms", str(self.hedge_floor_ms))
+        self.config.set("RETRY_CONFIG", "hedge_min_samples", str(self.hedge_min_samples))
+
+        # 确保DB_CONFIG节点存在
+        if not self.config.has_section("DB_CONFIG"):
+            self.config.add_section("DB_CONFIG")
+        self.config.set("DB_CONFIG", "write_batch_size", str(self.db_write_batch_size))
+        self.config.set("DB_CONFIG", "write_flush_interval_ms", str(self.db_write_flush_interval_ms))
+        self.config.set("DB_CONFIG", "read_pool_size", str(self.db_read_pool_size))
+        self.config.set("DB_CONFIG", "cache_size_kb", str(self.db_cache_size_kb))
+        self.config.set("DB_CONFIG", "mmap_size_mb", str(self.db_mmap_size_mb))
+        self.config.set("DB_CONFIG", "busy_timeout_ms", str(self.db_busy_timeout_ms))
+        self.config.set("DB_CONFIG", "statement_cache_size", str(self.db_statement_cache_size))
+        self.config.set("DB_CONFIG", "compress_enabled", str(self.db_compress_enabled))
+        self.config.set("DB_CONFIG", "compress_min_bytes", str(self.db_compress_min_bytes))
+        self.config.set("DB_CONFIG", "compress_level", str(self.db_compress_level))
+        self.config.set("DB_CONFIG", "migrate_batch_size", str(self.db_migrate_batch_size))
+        self.config.set("DB_CONFIG", "migrate_startup_budget_ms", str(self.db_migrate_startup_budget_ms))
+        self.config.set("DB_CONFIG", "import_batch_size", str(self.db_import_batch_size))
+        self.config.set("DB_CONFIG", "search_debounce_ms", str(self.db_search_debounce_ms))
+        self.config.set("DB_CONFIG", "search_cache_entries", str(self.db_search_cache_entries))
+
         # 写入配置文件
         with open(CONFIG_FILE, "w", encoding="utf-8") as f:
             self.config.write(f)
@@ -261,7 +261,7 @@ QPushButton#tableDangerBtn:hover {{
 
 # ===================== 文本编辑器样式：适配整体布局，无透明，高度正常=====================
 TEXT_EDIT_STYLE = f"""
-QTextEdit {{
+QTextEdit, QPlainTextEdit {{
     background-color: {COLOR_BG_CONTAINER};
     border: 1px solid {COLOR_BORDER};
     border-radius: 4px;
@@ -271,12 +271,12 @@ QTextEdit {{
     color: {COLOR_TEXT_PRIMARY}; /* 纯色文字，确保可见 */
     min-height: 180px;
 }}
-QTextEdit:focus {{
+QTextEdit:focus, QPlainTextEdit:focus {{
     border: 1px solid {COLOR_MAIN_LIGHTER};
     box-shadow: 0 0 4px rgba(107,182,255,0.2);
     outline: none;
 }}
-QTextEdit::placeholder {{
+QTextEdit::placeholder, QPlainTextEdit::placeholder {{
     color: {COLOR_TEXT_HINT};
 }}
 """
@@ -318,7 +318,7 @@ QTabBar::tab:hover:!selected {{
 
 # ===================== 表格样式：清爽纯白，无透明，文字可见=====================
 TABLE_STYLE = f"""
-QTableWidget {{
+QTableView {{
     background-color: {COLOR_BG_CONTAINER};
     border: 1px solid {COLOR_BORDER};
     border-radius: 6px;
@@ -328,33 +328,33 @@ QTableWidget {{
     color: {COLOR_TEXT_PRIMARY}; /* 纯色文字 */
     qproperty-antialiasing: true;
 }}
-QTableWidget::header {{
+QTableView::header {{
     background-color: #F8F9FA;
     color: {COLOR_MAIN};
     font-weight: bold;
     font-size: 9pt;
 }}
-QTableWidget::horizontalHeader::section {{
+QTableView::horizontalHeader::section {{
     border: 1px solid {COLOR_BORDER};
     border-radius: 3px;
     padding: 3px;
     text-align: center;
     min-height: 26px;
 }}
-QTableWidget::verticalHeader::section {{
+QTableView::verticalHeader::section {{
     border: 1px solid {COLOR_BORDER};
     padding: 0 4px;
     text-align: center;
 }}
-QTableWidget::item {{
+QTableView::item {{
     padding: 3px;
     border-bottom: 1px solid #F1F3F5;
 }}
-QTableWidget::item:selected {{
+QTableView::item:selected {{
     background-color: rgba(107,182,255,0.15);
     color: {COLOR_MAIN};
 }}
-QTableWidget::item:hover {{
+QTableView::item:hover {{
     background-color: #F8F9FA;
 }}
 """
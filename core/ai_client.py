@@ -1,54 +1,214 @@
-from volcenginesdkarkruntime import Ark
+import importlib.util
+import logging
+import threading
+from typing import TYPE_CHECKING
 from config.app_config import global_config
+from core.stream_parser import iter_stream_text
+
+if TYPE_CHECKING:
+    import httpx
+    from volcenginesdkarkruntime import Ark
+
+# 火山方舟华北区固定端点
+ARK_BASE_URL = "https://ark.cn-beijing.volces.com/api/v3"
+DEFAULT_MODEL_NAME = "doubao-seed-1-6-lite-251015"
+# 低温度保证模板结构不偏移
+GENERATION_TEMPERATURE = 0.3
+
+logger = logging.getLogger(__name__)
+
+
+def build_prompt(template_content: str, work_content: str) -> str:
+    """拼接Prompt（模板+工作内容，纯文本格式）"""
+    return f"""你是专业的职场工作日报生成助手，严格按照以下要求生成日报：
+1. 仅输出最终的日报内容，不添加任何额外的解释、备注、提示语；
+2. 完全保留我提供的日报模板的所有结构和格式（标题、分级、标点等）；
+3. 将我的当日工作内容精准融入模板对应的模块，不遗漏任何关键信息；
+4. 语言简洁正式、逻辑清晰，符合企业职场日报的书写规范；
+5. 流式生成的内容要连续无重复，段落之间衔接自然。
+
+我的日报模板：
+{template_content}
+
+我的当日工作内容：
+{work_content}
+
+请直接输出最终的日报内容，无需其他任何内容！"""
+
 
 class ArkAIClient:
-    """火山方舟AI客户端封装"""
+    """
+    火山方舟AI客户端管理（进程内单例：长连接池复用+后台预热+仅在配置变更时重建）
+    方舟SDK与httpx导入耗时约0.3 s，延迟到首次构建客户端（通常是窗口显示后的后台预热）时才加载
+    请求方通过 acquire()/release() 借用客户端：重建时旧连接池等最后一个借用结束后才关闭，进行中的流式读取不受影响
+    """
     _instance = None  # 单例
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._init_client()
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance.client = None
+                instance.model_id = ""
+                instance._http_client = None
+                instance._signature = None
+                instance._build_lock = threading.RLock()
+                instance._in_flight = {}  # 客户端 -> 未结束的借用数
+                instance._retired = {}    # 已被替换、等待借用结束后关闭的连接池
+                instance._h2_fallback_logged = False
+                cls._instance = instance
         return cls._instance
 
-    def _init_client(self):
-        """初始化客户端（从配置读取API_KEY）"""
+    @staticmethod
+    def _config_signature() -> tuple:
+        """影响客户端的配置指纹（密钥/模型/接口地址/连接池参数），变化时才重建"""
+        return (
+            global_config.ark_api_key.strip(),
+            global_config.model_name.strip() or DEFAULT_MODEL_NAME,
+            global_config.ark_base_url.strip() or ARK_BASE_URL,
+            global_config.http_pool_size,
+            global_config.http2_enabled,
+            global_config.http_connect_timeout,
+            global_config.http_read_timeout,
+            global_config.http_keepalive_expiry,
+        )
+
+    def _build_http_client(self) -> "httpx.Client":
+        """构建长连接HTTP客户端（keep-alive连接池，可选HTTP/2）"""
+        import httpx  # 局部导入：启动时不加载
+        http2 = global_config.http2_enabled
+        if http2 and importlib.util.find_spec("h2") is None:
+            # HTTP/2 依赖 h2 包，未安装时回退 HTTP/1.1 长连接（每次重建都会走到这里，只提示一次）
+            if not self._h2_fallback_logged:
+                self._h2_fallback_logged = True
+                logger.warning("未安装h2，HTTP/2已回退为HTTP/1.1长连接（pip install httpx[http2]）")
+            http2 = False
+        pool_size = max(global_config.http_pool_size, 1)
+        return httpx.Client(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=global_config.http_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                global_config.http_read_timeout,
+                connect=global_config.http_connect_timeout,
+            ),
+        )
+
+    def _init_client(self, signature: tuple):
+        """初始化客户端（从配置读取API_KEY），替换旧连接池（仍有请求在用时延迟关闭）"""
+        from volcenginesdkarkruntime import Ark  # 局部导入：启动时不加载
+        old_client, old_http_client = self.client, self._http_client
+        self._http_client = self._build_http_client()
         self.client = Ark(
-            base_url='https://ark.cn-beijing.volces.com/api/v3',
-            api_key=global_config.ark_api_key,
+            base_url=signature[2],
+            api_key=signature[0],
+            http_client=self._http_client,
+            max_retries=0,  # 重试/退避统一由 core.resilience 控制并记录日志，避免SDK内部静默重试
         )
-        self.model_id = global_config.model_id
+        self.model_id = signature[1]
+        self._signature = signature
+        if old_http_client is not None:
+            self._retire(old_client, old_http_client)
+
+    def _retire(self, client: "Ark", http_client: "httpx.Client"):
+        """连接池被替换：没有进行中的请求立即关闭，否则等最后一个借用归还时关闭"""
+        if self._in_flight.get(client):
+            self._retired[client] = http_client
+        else:
+            http_client.close()
+
+    def get_client(self) -> "Ark":
+        """获取共享客户端：首次调用或配置变更时构建，其余直接复用已建立的连接"""
+        with self._build_lock:
+            signature = self._config_signature()
+            if self.client is None or signature != self._signature:
+                self._init_client(signature)
+            return self.client
+
+    def acquire(self) -> "Ark":
+        """借用共享客户端发起请求（须与 release() 成对调用）：借用期间其连接池不会因配置变更被关闭"""
+        with self._build_lock:
+            client = self.get_client()
+            self._in_flight[client] = self._in_flight.get(client, 0) + 1
+            return client
 
-    def refresh_client(self):
-        """刷新客户端（配置变更后调用）"""
-        self._init_client()
+    def release(self, client: "Ark"):
+        """归还借用的客户端；它已被替换且是最后一个借用时关闭其旧连接池"""
+        with self._build_lock:
+            remaining = self._in_flight.pop(client, 0) - 1
+            if remaining > 0:
+                self._in_flight[client] = remaining
+            elif client in self._retired:
+                self._retired.pop(client).close()
+
+    def refresh_client(self) -> bool:
+        """配置保存后调用：密钥/模型/连接参数有变化才重建并重新预热，返回是否重建"""
+        with self._build_lock:
+            if self.client is not None and self._config_signature() == self._signature:
+                return False
+            self.get_client()
+        self.warm_up()
+        return True
+
+    def warm_up(self):
+        """后台预热：提前完成DNS/TLS握手并放入连接池，不阻塞调用方"""
+        if not global_config.ark_api_key.strip():
+            return
+        threading.Thread(target=self._warm_up, name="ark-warm-up", daemon=True).start()
+
+    def _warm_up(self):
+        try:
+            with self._build_lock:
+                client = self.acquire()
+                http_client, base_url = self._http_client, self._signature[2]
+        except Exception as e:
+            logger.warning("火山方舟客户端初始化失败，跳过连接预热：%s", e)
+            return
+        try:
+            # 任意响应码都说明连接已建立，读完响应体后连接归还连接池复用
+            http_client.head(base_url, timeout=global_config.http_connect_timeout)
+        except Exception as e:
+            logger.warning("火山方舟连接预热失败（不影响生成）：%s", e)
+        finally:
+            self.release(client)
+
+    def close(self):
+        """关闭全部连接池（程序退出时调用，不再等待进行中的请求）"""
+        with self._build_lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            for http_client in self._retired.values():
+                http_client.close()
+            self._retired.clear()
+            self._in_flight.clear()
+            self.client = None
+            self._http_client = None
+            self._signature = None
 
     def generate_report_stream(self, template_content: str, work_content: str):
-        """流式生成日报（返回生成器）"""
-        prompt = f"{template_content}\n\n我提供的当日工作内容：{self._clean_content(work_content)}"
-        stream_resp = self.client.responses.create(
-            model=self.model_id,
-            input=prompt,
-            temperature=0.3,
-            stream=True,
-            thinking={"type": "disabled"},
-        )
-        return self._parse_stream_resp(stream_resp)
+        """流式生成日报（生成器：读完或关闭前一直借用客户端）"""
+        client = self.acquire()
+        try:
+            prompt = build_prompt(self._clean_content(template_content), self._clean_content(work_content))
+            stream_resp = client.responses.create(
+                model=self.model_id,
+                input=prompt,
+                temperature=GENERATION_TEMPERATURE,
+                stream=True,
+                thinking={"type": "disabled"},
+            )
+            yield from self._parse_stream_resp(stream_resp)
+        finally:
+            self.release(client)
 
     def _clean_content(self, content: str) -> str:
         """清理内容（去除多余空白）"""
         return content.strip()
 
     def _parse_stream_resp(self, stream_resp):
-        """解析流式响应（兼容新旧SDK）"""
-        for chunk in stream_resp:
-            # 旧版本
-            if hasattr(chunk, 'text') and chunk.text and chunk.text.strip():
-                yield chunk.text.strip()
-            # 新版本
-            elif hasattr(chunk, 'output') and chunk.output:
-                for output in chunk.output:
-                    if hasattr(output, 'content') and output.content:
-                        for content in output.content:
-                            if hasattr(content, 'text') and content.text.strip():
-                                yield content.text.strip()
\ No newline at end of file
+        """解析流式响应（与生成引擎共用同一解析器，文本原样输出）"""
+        return iter_stream_text(stream_resp)
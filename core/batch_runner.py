@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Iterator, Optional
+from config.app_config import global_config
+from core.ai_client import ArkAIClient
+from core.engine import GenerationEngine, EVENT_TEXT, EVENT_CACHE_HIT, EVENT_DONE, EVENT_ERROR, EVENT_CANCELED
+from core.template_manager import TemplateManager
+from db.db_init import init_database
+from db.history_dao import HistoryDAO
+
+
+# 输入 date 字段接受的格式（只有日期时补录为当天零点）
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+
+def _percentile(values: list, pct: float) -> float:
+    """简单分位数（最近秩），values为空时返回0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _text(data: dict, field: str) -> str:
+    """字段统一转为去空白的字符串（JSON中的数字等非字符串值按文本处理）"""
+    value = data.get(field)
+    return str(value).strip() if value is not None else ""
+
+
+class BatchRecord:
+    """批量生成的单条输入（JSONL一行）；不是JSON对象、缺少工作内容或日期无法识别时抛出 ValueError"""
+
+    def __init__(self, line_no: int, data: dict):
+        if not isinstance(data, dict):
+            raise ValueError(f"应为JSON对象，实际为 {type(data).__name__}")
+        self.line_no = line_no
+        self.template_name = _text(data, "template_name")
+        self.template_content = _text(data, "template_content")
+        self.work_content = _text(data, "work_content")
+        self.date = _text(data, "date")
+        self.author = _text(data, "author")
+        if not self.work_content:
+            raise ValueError("缺少 work_content")
+        self._create_time = self._parse_date(self.date)
+        # 记录唯一键：优先使用输入中的id，否则按内容哈希（用于断点续跑）
+        raw = f"{self.template_name}\x00{self.template_content}\x00{self.work_content}\x00{self.date}\x00{self.author}"
+        self.key = str(data.get("id") or hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+    def full_work_content(self) -> str:
+        """工作内容前附日期/汇报人，供模型填充模板对应字段"""
+        header = []
+        if self.date:
+            header.append(f"日期：{self.date}")
+        if self.author:
+            header.append(f"汇报人：{self.author}")
+        return "\n".join(header + [self.work_content]) if header else self.work_content
+
+    @staticmethod
+    def _parse_date(date: str) -> Optional[str]:
+        """校验输入日期并规范为 history.create_time 格式（YYYY-MM-DD HH:MM:SS）"""
+        if not date:
+            return None
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(date, fmt).strftime("%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                continue
+        raise ValueError(f"无法识别的日期：{date}（应为 YYYY-MM-DD 或 YYYY-MM-DD HH:MM:SS）")
+
+    def create_time(self) -> Optional[str]:
+        """历史记录生成时间：按输入日期补录，只有日期时补全为零点"""
+        return self._create_time
+
+
+class BatchRunner:
+    """无界面批量生成：读取JSONL任务，经生成引擎有界并发生成，结果写入history表+JSONL输出，支持断点续跑"""
+
+    def __init__(self, input_path: str, output_path: str, concurrency: int = 4, force_regenerate: bool = False):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.concurrency = max(concurrency, 1)
+        self.force_regenerate = force_regenerate
+        self.template_manager = TemplateManager()
+        self.history_dao = HistoryDAO()
+        self._template_cache = {}
+        self._create_times = {}  # 在途记录键 -> 补录的生成时间
+        # 独立的生成引擎：线程池大小即批量并发上限
+        self.engine = GenerationEngine(max_concurrency=self.concurrency)
+        # 统计
+        self.stats = {"total": 0, "ok": 0, "failed": 0, "skipped": 0, "cached": 0, "invalid": 0}
+        self.latencies_ms = []
+        self.ttfts_ms = []
+
+    def read_records(self) -> Iterator[BatchRecord]:
+        """逐行读取输入（不一次性载入内存），跳过空行；无效行计入 invalid 并跳过，不中断整批"""
+        with open(self.input_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = BatchRecord(line_no, json.loads(line))
+                except ValueError as e:  # 含 json.JSONDecodeError
+                    self.stats["invalid"] += 1
+                    print(f"⚠️  第{line_no}行无效，已跳过：{e}")
+                    continue
+                yield record
+
+    def load_done_keys(self) -> set:
+        """断点续跑：读取已有输出中成功的记录键"""
+        done = set()
+        if not os.path.exists(self.output_path):
+            return done
+        with open(self.output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 上次中断可能留下半行
+                if isinstance(item, dict) and item.get("status") == "ok":
+                    done.add(item.get("key"))
+        return done
+
+    def _resolve_template(self, record: BatchRecord) -> str:
+        """模板优先取内联内容，其次按名称查询，都没有时使用默认模板（主线程查询并缓存）"""
+        if record.template_content:
+            return record.template_content
+        name = record.template_name
+        if name not in self._template_cache:
+            self._template_cache[name] = (self.template_manager.load_template(name) if name
+                                          else self.template_manager.get_default_template())
+        return self._template_cache[name]
+
+    async def _generate(self, record: BatchRecord, template_content: str) -> dict:
+        """生成单条日报（经由生成引擎会话，自动复用生成缓存），返回结果字典"""
+        start = time.perf_counter()
+        work_content = record.full_work_content()
+        result = {"key": record.key, "line": record.line_no, "template_name": record.template_name,
+                  "date": record.date, "author": record.author, "work_content": work_content,
+                  "template_content": template_content}
+        if not template_content:
+            result.update(status="error", error=f"模板不存在或内容为空：{record.template_name or '默认模板'}")
+        else:
+            session = self.engine.create_session(template_content, work_content,
+                                                 force_regenerate=self.force_regenerate)
+            ttft_ms = None
+            error = "生成未完成"
+            async for event in session.events():
+                if event.kind == EVENT_TEXT and ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - start) * 1000
+                elif event.kind == EVENT_CACHE_HIT:
+                    result["cached"] = True
+                elif event.kind == EVENT_DONE:
+                    error = None
+                elif event.kind == EVENT_ERROR:
+                    error = event.text
+                elif event.kind == EVENT_CANCELED:
+                    error = "生成已中断"
+            if error is None and not session.report_text.strip():
+                error = "模型返回内容为空"
+            if error is None:
+                result.update(status="ok", report_content=session.report_text,
+                              ttft_ms=None if result.get("cached") else ttft_ms)
+            else:
+                result.update(status="error", error=error[:300])
+        result["latency_ms"] = (time.perf_counter() - start) * 1000
+        return result
+
+    def _record_result(self, result: dict, out_file):
+        """事件循环线程：写库+追加输出行+累计统计"""
+        if result["status"] == "ok":
+            history_id = self.history_dao.add_history(
+                result["template_content"], result["work_content"], result["report_content"].strip(),
+                create_time=self._create_times.pop(result["key"], None),
+            )
+            result["history_id"] = history_id
+            self.stats["ok"] += 1
+            if result.get("cached"):
+                self.stats["cached"] += 1
+            self.latencies_ms.append(result["latency_ms"])
+            if result.get("ttft_ms") is not None:
+                self.ttfts_ms.append(result["ttft_ms"])
+            print(f"✅ 第{result['line']}行生成完成 | 耗时 {result['latency_ms']:.0f} ms"
+                  f"{' | ⚡ 命中缓存' if result.get('cached') else ''}")
+        else:
+            self._create_times.pop(result["key"], None)
+            self.stats["failed"] += 1
+            print(f"❌ 第{result['line']}行生成失败：{result['error']}")
+        result.pop("template_content", None)  # 输出中不重复保存模板全文
+        out_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out_file.flush()
+
+    def run(self) -> dict:
+        """执行批量生成，返回统计汇总"""
+        return asyncio.run(self._run_async())
+
+    async def _run_async(self) -> dict:
+        if not global_config.ark_api_key.strip():
+            global_config.ark_api_key = os.getenv("ARK_API_KEY", "").strip()
+        done_keys = self.load_done_keys()
+        start = time.perf_counter()
+        ArkAIClient().warm_up()
+
+        try:
+            with open(self.output_path, "a", encoding="utf-8") as out_file:
+                pending = set()
+                for record in self.read_records():
+                    self.stats["total"] += 1
+                    if record.key in done_keys or record.key in self._create_times:
+                        self.stats["skipped"] += 1
+                        continue
+                    self._create_times[record.key] = record.create_time()
+                    pending.add(asyncio.ensure_future(self._generate(record, self._resolve_template(record))))
+                    # 有界提交：在途任务不超过并发数的2倍，输入文件再大也不会堆积
+                    if len(pending) >= self.concurrency * 2:
+                        finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in finished:
+                            self._record_result(task.result(), out_file)
+                if pending:
+                    finished, _ = await asyncio.wait(pending)
+                    for task in finished:
+                        self._record_result(task.result(), out_file)
+        finally:
+            self.engine.shutdown()
+
+        wall_s = time.perf_counter() - start
+        summary = dict(self.stats)
+        summary.update(
+            wall_time_s=round(wall_s, 2),
+            reports_per_min=round(self.stats["ok"] / wall_s * 60, 2) if wall_s > 0 else 0,
+            latency_p50_ms=round(_percentile(self.latencies_ms, 50)),
+            latency_p95_ms=round(_percentile(self.latencies_ms, 95)),
+            latency_max_ms=round(max(self.latencies_ms, default=0)),
+            ttft_p50_ms=round(_percentile(self.ttfts_ms, 50)),
+            ttft_p95_ms=round(_percentile(self.ttfts_ms, 95)),
+        )
+        return summary
+
+
+def print_summary(summary: dict):
+    print("\n========== 批量生成汇总 ==========")
+    print(f"任务总数：{summary['total']} | 成功：{summary['ok']}（缓存命中 {summary['cached']}）"
+          f" | 失败：{summary['failed']} | 已完成跳过：{summary['skipped']} | 无效行：{summary['invalid']}")
+    print(f"总耗时：{summary['wall_time_s']} s | 吞吐：{summary['reports_per_min']} 篇/分钟")
+    print(f"单篇耗时 p50/p95/max：{summary['latency_p50_ms']} / {summary['latency_p95_ms']} / {summary['latency_max_ms']} ms")
+    print(f"首字耗时 p50/p95：{summary['ttft_p50_ms']} / {summary['ttft_p95_ms']} ms")
+
+
+def main(argv=None):
+    """命令行入口（项目根目录执行）：python -m core.batch_runner tasks.jsonl -c 4"""
+    parser = argparse.ArgumentParser(description="无界面批量生成日报（读取JSONL任务，结果写入历史记录）")
+    parser.add_argument("input", help="输入JSONL：每行包含 template_name 或 template_content、work_content、date、author")
+    parser.add_argument("-o", "--output", help="输出JSONL（默认：输入文件名.out.jsonl），同时作为断点续跑进度")
+    parser.add_argument("-c", "--concurrency", type=int, default=global_config.http_pool_size,
+                        help="并发数（默认等于连接池大小）")
+    parser.add_argument("--force", action="store_true", help="强制重新生成，跳过生成缓存")
+    args = parser.parse_args(argv)
+
+    init_database()
+    output = args.output or os.path.splitext(args.input)[0] + ".out.jsonl"
+    runner = BatchRunner(args.input, output, concurrency=args.concurrency, force_regenerate=args.force)
+    summary = runner.run()
+    print_summary(summary)
+    ArkAIClient().close()
+    return 0 if summary["failed"] == 0 and summary["invalid"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
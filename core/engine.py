@@ -0,0 +1,313 @@
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from config.app_config import global_config
+from core.ai_client import ArkAIClient, build_prompt, DEFAULT_MODEL_NAME, GENERATION_TEMPERATURE
+from core.generation_cache import generation_cache, single_flight, make_cache_key, FlightAbandoned, FlightAborted
+from core.resilience import ResilientStreamer, RESULT_OK, RESULT_CANCELED
+from core.stream_parser import parse_stream_chunk
+
+# 事件类型：日志/文本分块/命中缓存/重置 为过程事件，其余为终止事件
+EVENT_LOG = "log"
+EVENT_TEXT = "text"
+EVENT_CACHE_HIT = "cache_hit"
+EVENT_RESET = "reset"  # 丢弃此前收到的文本分块（共享的请求被其发起者中断，本会话重新生成）
+EVENT_DONE = "done"
+EVENT_ERROR = "error"
+EVENT_CANCELED = "canceled"
+TERMINAL_EVENTS = (EVENT_DONE, EVENT_ERROR, EVENT_CANCELED)
+
+
+class GenerationEvent:
+    """生成会话事件（kind为事件类型，text为日志/分块文本/错误信息）"""
+    __slots__ = ("kind", "text")
+
+    def __init__(self, kind: str, text: str = ""):
+        self.kind = kind
+        self.text = text
+
+    def __repr__(self):
+        return f"GenerationEvent({self.kind!r}, {self.text[:30]!r})"
+
+
+class GenerationSession:
+    """单次日报生成会话：通过 events() 异步迭代事件，cancel() 可随时中断（线程安全）"""
+
+    def __init__(self, engine: "GenerationEngine", session_id: int, template_content: str,
+                 work_content: str, force_regenerate: bool = False):
+        self.engine = engine
+        self.session_id = session_id
+        self.template_content = template_content.strip()
+        self.work_content = work_content.strip()
+        self.force_regenerate = force_regenerate
+        self.model_name = global_config.model_name.strip() or DEFAULT_MODEL_NAME
+        self.report_text = ""  # 完整生成结果（结束后可读）
+        self.cancel_latency_ms: Optional[float] = None  # 从发出中断到会话终止的耗时
+        self._cancel_event = threading.Event()
+        self._cancel_time: Optional[float] = None
+        self._streamer: Optional[ResilientStreamer] = None  # 进行中的上游流（中断时主动关闭）
+        self._started = False
+
+    def cancel(self):
+        """中断会话：立即关闭上游响应并唤醒等待中的读取循环，不必等下一块到达"""
+        if self._cancel_event.is_set():
+            return
+        self._cancel_time = time.perf_counter()
+        self._cancel_event.set()
+        streamer = self._streamer
+        if streamer is not None:
+            streamer.abort()
+
+    def is_canceled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def _emit_canceled(self, emit: Callable[[str, str], None]):
+        """发出中断终止事件，并记录中断耗时"""
+        if self._cancel_time is not None:
+            self.cancel_latency_ms = (time.perf_counter() - self._cancel_time) * 1000
+            emit(EVENT_LOG, f"⏱️ 中断耗时：{self.cancel_latency_ms:.0f} ms（上游连接已关闭）\n")
+        emit(EVENT_CANCELED)
+
+    async def events(self) -> AsyncIterator[GenerationEvent]:
+        """异步事件流：阻塞的SDK调用在引擎线程池中执行，事件经当前事件循环逐个投递"""
+        if self._started:
+            raise RuntimeError("同一会话只能迭代一次")
+        self._started = True
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def emit(kind: str, text: str = ""):
+            loop.call_soon_threadsafe(queue.put_nowait, GenerationEvent(kind, text))
+
+        worker = loop.run_in_executor(self.engine.executor, self._run_blocking, emit)
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event.kind in TERMINAL_EVENTS:
+                    break
+        finally:
+            # 调用方提前退出迭代时同样视为中断，等待工作线程收尾
+            if not worker.done():
+                self.cancel()
+            await worker
+            self.engine._remove_session(self.session_id)
+
+    async def text_chunks(self) -> AsyncIterator[str]:
+        """仅迭代文本分块；出错时抛出RuntimeError"""
+        async for event in self.events():
+            if event.kind == EVENT_TEXT:
+                yield event.text
+            elif event.kind == EVENT_ERROR:
+                raise RuntimeError(event.text)
+
+    # ---------- 以下在引擎线程池中执行 ----------
+    def _run_blocking(self, emit: Callable[[str, str], None]):
+        try:
+            self._generate(emit)
+        except Exception as e:
+            if self.is_canceled():
+                self._emit_canceled(emit)
+            else:
+                err_info = str(e)[:150] + "..." if len(str(e)) > 150 else str(e)
+                emit(EVENT_ERROR, f"生成过程异常：{err_info}")
+
+    def _generate(self, emit: Callable[[str, str], None]):
+        # 前置检测：业务参数非空
+        if not self.template_content:
+            emit(EVENT_ERROR, "日报模板不能为空！请在【模版编辑】Tab填写内容")
+            return
+        if not self.work_content:
+            emit(EVENT_ERROR, "工作内容不能为空！请在【工作内容】Tab粘贴/输入")
+            return
+        if not global_config.ark_api_key.strip():
+            emit(EVENT_ERROR, "ARK_API_KEY未配置！请在【系统→配置】填写唯一鉴权密钥")
+            return
+
+        emit(EVENT_LOG, "📝 开始拼接Prompt，按模板+工作内容生成规范日报\n")
+        prompt = build_prompt(self.template_content, self.work_content)
+        if self.is_canceled():
+            self._emit_canceled(emit)
+            return
+
+        # 查询生成缓存（相同Prompt+模型+温度直接回放，强制重新生成时跳过）
+        cache_key = make_cache_key(prompt, self.model_name, GENERATION_TEMPERATURE)
+        if self.force_regenerate:
+            emit(EVENT_LOG, "🔄 已勾选强制重新生成，跳过生成缓存\n")
+        else:
+            cached_report = generation_cache.get(cache_key)
+            if cached_report is not None:
+                emit(EVENT_CACHE_HIT)
+                emit(EVENT_LOG, "⚡ 命中生成缓存，直接回放已生成的日报（如需重新调用模型，请勾选【强制重新生成】）\n")
+                self.report_text = cached_report
+                emit(EVENT_TEXT, cached_report)
+                emit(EVENT_DONE)
+                return
+
+        # 相同请求去重（已有相同请求在生成时，直接共享其上游流；其发起者被中断时由跟随者接手重新发起）
+        while True:
+            flight, is_leader = single_flight.join(cache_key)
+            if is_leader:
+                break
+            if not self._follow_flight(flight, emit):
+                return
+
+        report_parts: List[str] = []
+        flight_error = "上游生成未完成"
+        try:
+            if self._stream_from_model(prompt, flight, report_parts, emit):
+                flight_error = None
+        finally:
+            # 因本会话中断而结束时标记为放弃，跟随者不会因别人的中断而失败
+            single_flight.release(cache_key, flight, flight_error,
+                                  abandoned=flight_error is not None and self.is_canceled())
+        if flight_error is None:
+            self.report_text = "".join(report_parts)
+            generation_cache.put(cache_key, self.model_name, self.report_text)
+            emit(EVENT_LOG, f"\n✅ 流式生成完成 | 模型 {self.model_name} 调用成功！\n")
+            emit(EVENT_DONE)
+
+    def _stream_from_model(self, prompt: str, flight, report_parts: List[str],
+                           emit: Callable[[str, str], None]) -> bool:
+        """调用模型并消费流式响应，分块同时推给调用方和共享流的跟随者；返回是否完整生成"""
+        emit(EVENT_LOG, f"📦 获取火山方舟共享客户端 | 目标模型：{self.model_name}\n")
+        ark = ArkAIClient()
+        try:
+            client = ark.acquire()
+        except Exception as e:
+            emit(EVENT_ERROR, f"火山方舟客户端初始化失败：{str(e)[:100]} | 请检查ARK_API_KEY是否正确")
+            return False
+        try:
+            return self._stream_with_client(client, prompt, flight, report_parts, emit)
+        finally:
+            ark.release(client)  # 流结束后才归还：期间保存配置重建客户端不会关闭本次请求所用的连接池
+
+    def _stream_with_client(self, client, prompt: str, flight, report_parts: List[str],
+                            emit: Callable[[str, str], None]) -> bool:
+        """用借到的客户端发起带看门狗的流式请求"""
+        emit(EVENT_LOG, f"🚀 正在调用模型 {self.model_name} | 开启流式响应\n")
+
+        def create_stream():
+            return client.responses.create(
+                model=self.model_name,  # 目标模型ID
+                input=prompt,           # 纯文本Prompt
+                temperature=GENERATION_TEMPERATURE,
+                stream=True,            # 核心：开启流式生成
+                thinking={"type": "disabled"},  # 关闭思考过程，避免无关内容
+            )
+
+        def on_text(text: str):
+            # 分块文本按模型输出原样拼接（空格/换行由模型给出，不再人为补换行）
+            report_parts.append(text)
+            flight.publish(text)
+            emit(EVENT_TEXT, text)
+
+        # 带看门狗的上游流：首字/分块间隔超时、瞬时错误退避重试、可选对冲，决策写入执行日志
+        streamer = ResilientStreamer(create_stream, parse_stream_chunk,
+                                     lambda message: emit(EVENT_LOG, message), self.is_canceled)
+        self._streamer = streamer
+        if self.is_canceled():
+            streamer.abort()  # 中断发生在流创建之前
+        emit(EVENT_LOG, "📥 开始接收流式内容，结果将实时输出到【生成结果】Tab...\n")
+        try:
+            result, reason = streamer.stream(on_text)
+        finally:
+            self._streamer = None
+        if result == RESULT_CANCELED or self.is_canceled():
+            self._emit_canceled(emit)
+            return False
+        if result != RESULT_OK:
+            err_info = reason[:150] + "..." if len(reason) > 150 else reason
+            emit(EVENT_LOG, f"❌ 模型调用失败：{err_info} | 请检查模型权限/ARK_API_KEY/网络\n")
+            emit(EVENT_ERROR, f"模型调用失败：{err_info}\n建议：1. 检查模型是否开通权限 "
+                              f"2. 验证ARK_API_KEY有效性 3. 确保网络能访问方舟平台")
+            return False
+        if streamer.retry_count or streamer.hedge_count:
+            emit(EVENT_LOG, f"📊 本次请求共发起 {streamer.attempt_count} 次上游调用"
+                            f"（重试 {streamer.retry_count} 次，对冲 {streamer.hedge_count} 次）\n")
+        return True
+
+    def _follow_flight(self, flight, emit: Callable[[str, str], None]) -> bool:
+        """
+        跟随进行中的相同请求：回放已生成部分并实时接收后续分块
+        :return: 发起者被中断、需要重新加入（由本会话或其他跟随者接手）时返回True，其余情况已发出终止事件
+        """
+        emit(EVENT_LOG, "🔗 相同模板+工作内容的请求正在生成，共享该请求的流式结果\n")
+        parts = []
+        try:
+            for text in flight.subscribe(self.is_canceled):
+                parts.append(text)
+                emit(EVENT_TEXT, text)
+        except FlightAbandoned:
+            if self.is_canceled():
+                self._emit_canceled(emit)
+                return False
+            emit(EVENT_LOG, "🔁 共享的生成请求已被其发起者中断，重新发起生成\n")
+            if parts:
+                emit(EVENT_RESET)
+            return True
+        except FlightAborted as e:
+            emit(EVENT_LOG, f"❌ 共享的生成请求已终止：{e}\n")
+            emit(EVENT_ERROR, "共享的生成请求失败，请重新点击生成")
+            return False
+        if self.is_canceled():
+            self._emit_canceled(emit)
+            return False
+        self.report_text = "".join(parts)
+        emit(EVENT_LOG, "✅ 共享流式生成完成\n")
+        emit(EVENT_DONE)
+        return False
+
+
+class GenerationEngine:
+    """与Qt无关的日报生成引擎：管理多个并发会话，并发上限由线程池大小控制"""
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self.max_concurrency = max(max_concurrency or global_config.http_pool_size, 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="gen-engine")
+        self._sessions: Dict[int, GenerationSession] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create_session(self, template_content: str, work_content: str,
+                       force_regenerate: bool = False) -> GenerationSession:
+        """创建生成会话（迭代 session.events() 时才真正开始生成）"""
+        with self._lock:
+            session = GenerationSession(self, next(self._ids), template_content, work_content, force_regenerate)
+            self._sessions[session.session_id] = session
+        return session
+
+    def cancel(self, session_id: int) -> bool:
+        """按会话ID中断"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return False
+        session.cancel()
+        return True
+
+    def cancel_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            session.cancel()
+
+    def active_sessions(self) -> List[GenerationSession]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def _remove_session(self, session_id: int):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def shutdown(self):
+        """中断全部会话并关闭线程池（程序退出时调用）"""
+        self.cancel_all()
+        self.executor.shutdown(wait=False)
+
+
+# 全局引擎实例，界面/命令行共用
+generation_engine = GenerationEngine()
@@ -0,0 +1,205 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterator, Optional, Tuple
+from config.app_config import CACHE_DB_PATH, global_config
+
+
+def make_cache_key(prompt: str, model_name: str, temperature: float) -> str:
+    """生成缓存键：对 (prompt, 模型名, 温度) 做内容哈希"""
+    raw = f"{model_name}\x00{temperature:.4f}\x00{prompt}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """生成结果持久化缓存（独立SQLite文件，LRU+总大小淘汰，支持TTL过期）"""
+
+    def __init__(self, db_path=CACHE_DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()  # 生成线程与主线程共用同一连接，串行访问
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """首次使用时才建连建表，不拖慢启动"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS generation_cache (
+                cache_key TEXT PRIMARY KEY,
+                model_name TEXT NOT NULL,
+                content TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                create_time REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hit_count INTEGER DEFAULT 0
+            )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_generation_cache_last_access ON generation_cache(last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """命中返回缓存内容并刷新访问时间；未命中/已过期返回None"""
+        if not global_config.cache_enabled:
+            return None
+        with self._lock:
+            try:
+                conn = self._get_conn()
+                row = conn.execute("SELECT content, create_time FROM generation_cache WHERE cache_key = ?",
+                                   (cache_key,)).fetchone()
+                if not row:
+                    return None
+                now = time.time()
+                if self._is_expired(row["create_time"], now):
+                    conn.execute("DELETE FROM generation_cache WHERE cache_key = ?", (cache_key,))
+                    conn.commit()
+                    return None
+                conn.execute("UPDATE generation_cache SET last_access = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                             (now, cache_key))
+                conn.commit()
+                return row["content"]
+            except sqlite3.Error as e:
+                print(f"读取生成缓存失败：{e}")
+                return None
+
+    def put(self, cache_key: str, model_name: str, content: str):
+        """写入缓存，写入后按TTL/条数/总大小淘汰最久未访问的记录"""
+        if not global_config.cache_enabled or not content:
+            return
+        with self._lock:
+            try:
+                conn = self._get_conn()
+                now = time.time()
+                conn.execute("""
+                INSERT OR REPLACE INTO generation_cache (cache_key, model_name, content, size_bytes, create_time, last_access, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                """, (cache_key, model_name, content, len(content.encode("utf-8")), now, now))
+                self._evict(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"写入生成缓存失败：{e}")
+                if self._conn:
+                    self._conn.rollback()
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock:
+            try:
+                conn = self._get_conn()
+                conn.execute("DELETE FROM generation_cache")
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"清空生成缓存失败：{e}")
+
+    def _is_expired(self, create_time: float, now: float) -> bool:
+        ttl_seconds = global_config.cache_ttl_hours * 3600
+        return ttl_seconds > 0 and now - create_time > ttl_seconds
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """淘汰策略：先删过期记录，再按最久未访问删除超出条数/总大小上限的记录"""
+        ttl_seconds = global_config.cache_ttl_hours * 3600
+        if ttl_seconds > 0:
+            conn.execute("DELETE FROM generation_cache WHERE create_time < ?", (now - ttl_seconds,))
+        max_entries = max(global_config.cache_max_entries, 1)
+        max_bytes = max(global_config.cache_max_size_mb, 1) * 1024 * 1024
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM generation_cache").fetchone()
+        if count <= max_entries and total <= max_bytes:
+            return
+        # 从最久未访问开始累计，直到剩余条数/大小都回到上限内
+        evict_keys = []
+        for row in conn.execute("SELECT cache_key, size_bytes FROM generation_cache ORDER BY last_access ASC"):
+            if count <= max_entries and total <= max_bytes:
+                break
+            evict_keys.append((row["cache_key"],))
+            count -= 1
+            total -= row["size_bytes"]
+        conn.executemany("DELETE FROM generation_cache WHERE cache_key = ?", evict_keys)
+
+
+class FlightAborted(Exception):
+    """共享的上游请求失败"""
+
+
+class FlightAbandoned(FlightAborted):
+    """发起者被中断，上游流未完成：跟随者重新加入，由其中一个接手发起请求"""
+
+
+class _Flight:
+    """一次进行中的上游生成：记录已收到的分块，供同键的跟随者回放+实时订阅"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.abandoned = False
+        self.followers = 0
+        self._cond = threading.Condition()
+
+    def publish(self, text: str):
+        with self._cond:
+            self.chunks.append(text)
+            self._cond.notify_all()
+
+    def finish(self, error: str = None, abandoned: bool = False):
+        with self._cond:
+            self.done = True
+            self.error = error
+            self.abandoned = abandoned
+            self._cond.notify_all()
+
+    def subscribe(self, is_canceled: Callable[[], bool]) -> Iterator[str]:
+        """从第一块开始回放，随后实时等待新分块；跟随者自身取消时立即退出"""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.chunks) and not self.done:
+                    if is_canceled():
+                        return
+                    self._cond.wait(0.05)
+                pending = self.chunks[index:]
+                index += len(pending)
+                done, error, abandoned = self.done, self.error, self.abandoned
+            for text in pending:
+                yield text
+            if done and index >= len(self.chunks):
+                if abandoned:
+                    raise FlightAbandoned(error or "发起者已中断")
+                if error:
+                    raise FlightAborted(error)
+                return
+
+
+class SingleFlight:
+    """进程内相同请求去重：同一缓存键只发起一次上游流，其余请求共享该流"""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def join(self, cache_key: str) -> Tuple[_Flight, bool]:
+        """加入请求：返回 (flight, 是否为发起者)"""
+        with self._lock:
+            flight = self._flights.get(cache_key)
+            if flight is not None:
+                flight.followers += 1
+                return flight, False
+            flight = _Flight()
+            self._flights[cache_key] = flight
+            return flight, True
+
+    def release(self, cache_key: str, flight: _Flight, error: str = None, abandoned: bool = False):
+        """
+        发起者结束（成功/失败/中断）时调用，唤醒所有跟随者并移除登记
+        :param abandoned: 发起者被中断（不是上游失败）：跟随者收到 FlightAbandoned 后重新 join，第一个成为新的发起者
+        """
+        flight.finish(error, abandoned)
+        with self._lock:
+            if self._flights.get(cache_key) is flight:
+                del self._flights[cache_key]
+
+
+# 全局实例，其他模块直接导入使用
+generation_cache = GenerationCache()
+single_flight = SingleFlight()
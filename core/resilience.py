@@ -0,0 +1,296 @@
+import queue
+import random
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+from config.app_config import global_config
+
+# 上游尝试的结果
+RESULT_OK = "ok"
+RESULT_RETRYABLE = "retryable"
+RESULT_FATAL = "fatal"
+RESULT_CANCELED = "canceled"
+
+# 可重试的HTTP状态码：请求超时/限流（5xx另行判断）；409冲突等其余4xx原样重发结果不会变化，不重试
+RETRYABLE_STATUS = (408, 429)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """判断异常是否为瞬时错误（429/5xx/超时/连接中断），鉴权、参数等错误不重试"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name or "Connect" in name or "RemoteProtocol" in name
+
+
+def backoff_delay(retry_no: int) -> float:
+    """指数退避+抖动：上限 cap=min(最大退避, 基数*2^(n-1))，在 [cap/2, cap] 内随机取值（秒）"""
+    cap = min(global_config.retry_backoff_max, global_config.retry_backoff_base * (2 ** (retry_no - 1)))
+    return random.uniform(cap / 2, cap)
+
+
+class LatencyTracker:
+    """首字耗时样本（滑动窗口），用于计算对冲请求的p95阈值"""
+
+    def __init__(self, max_samples: int = 200):
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, ttft_s: float):
+        with self._lock:
+            self._samples.append(ttft_s)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def hedge_threshold(self) -> float:
+        """对冲阈值（秒）：样本足够时取p95（不低于下限），否则取配置的默认延迟"""
+        with self._lock:
+            enough = len(self._samples) >= global_config.hedge_min_samples
+        floor = global_config.hedge_floor_ms / 1000
+        if not enough:
+            return max(global_config.hedge_delay_ms / 1000, floor)
+        return max(self.percentile(95), floor)
+
+
+# 进程内共享的首字耗时统计
+ttft_tracker = LatencyTracker()
+
+
+class _UpstreamAttempt:
+    """一次上游流式请求：在独立线程中阻塞读取，分块经队列交给看门狗循环；close() 可随时打断"""
+
+    def __init__(self, label: str, create_stream: Callable, parse_chunk: Callable, out_queue: queue.Queue):
+        self.label = label
+        self._create_stream = create_stream
+        self._parse_chunk = parse_chunk
+        self._queue = out_queue
+        self._stream = None
+        self._closed = threading.Event()
+        self.start_time = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"ark-{label}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        try:
+            stream = self._create_stream()
+            self._stream = stream
+            if self._closed.is_set():
+                return
+            for chunk in stream:
+                if self._closed.is_set():
+                    return
+                text = self._parse_chunk(chunk)
+                if text:
+                    self._queue.put((self, "text", text))
+            self._queue.put((self, "end", None))
+        except Exception as e:
+            if not self._closed.is_set():
+                self._queue.put((self, "error", e))
+        finally:
+            # 无论正常结束/出错/被关闭，都释放响应，连接归还（或移出）连接池，不会泄漏
+            self._close_stream()
+
+    def _close_stream(self):
+        stream = self._stream
+        if stream is not None and hasattr(stream, "close"):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def _interrupt_socket(self):
+        """跨线程关闭响应不会唤醒阻塞中的recv：HTTP/1.1 下直接shutdown该连接独占的socket，读取立即报错退出；
+        HTTP/2 连接由多个请求复用，不能shutdown，仅依赖close()取消该流"""
+        response = getattr(self._stream, "response", None)
+        if response is None or getattr(response, "http_version", "") != "HTTP/1.1":
+            return
+        if getattr(response, "is_closed", False):
+            return  # 响应已读完关闭，连接已归还连接池（可能正被其他请求复用），不能再shutdown
+        try:
+            network_stream = response.extensions.get("network_stream")
+            sock = network_stream.get_extra_info("socket") if network_stream is not None else None
+            if sock is not None:
+                sock.shutdown(socket.SHUT_RDWR)
+        except Exception:
+            pass
+
+    def close(self):
+        """关闭上游响应（释放连接，阻塞中的读取随之退出）"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._interrupt_socket()
+        self._close_stream()
+
+
+class ResilientStreamer:
+    """带看门狗的上游流：首字/分块间隔超时、瞬时错误指数退避重试、可选p95对冲请求；所有决策写入日志"""
+
+    def __init__(self, create_stream: Callable, parse_chunk: Callable, log: Callable[[str], None],
+                 is_canceled: Callable[[], bool]):
+        """
+        :param create_stream: 发起一次流式请求并返回可迭代的流（可在任意线程调用）
+        :param parse_chunk: 把单个响应块解析为文本
+        :param log: 日志回调（写入执行日志）
+        :param is_canceled: 是否已被用户中断
+        """
+        self._create_stream = create_stream
+        self._parse_chunk = parse_chunk
+        self._log = log
+        self._is_canceled = is_canceled
+        self._abort_event = threading.Event()
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None  # 当前尝试组的消息队列（中断时投递唤醒消息）
+        self._attempts: List[_UpstreamAttempt] = []
+        self.attempt_count = 0
+        self.retry_count = 0
+        self.hedge_count = 0
+
+    def stream(self, on_text: Callable[[str], None]) -> Tuple[str, str]:
+        """执行流式请求直到完成/失败/中断，返回 (结果, 原因)"""
+        max_retries = max(global_config.retry_max_retries, 0)
+        retry_no = 0
+        while True:
+            result, reason, got_text = self._run_attempt_group(on_text)
+            if result in (RESULT_OK, RESULT_CANCELED, RESULT_FATAL):
+                return result, reason
+            # 已经输出过内容的流不重试，避免结果重复拼接
+            if got_text:
+                self._log(f"❌ 生成中途失败（{reason}），已输出部分内容，不再重试\n")
+                return RESULT_FATAL, reason
+            if retry_no >= max_retries:
+                self._log(f"❌ {reason}，已重试{retry_no}次仍失败，放弃请求\n")
+                return RESULT_FATAL, reason
+            retry_no += 1
+            self.retry_count += 1
+            delay = backoff_delay(retry_no)
+            self._log(f"🔁 {reason}，{delay:.1f}s 后进行第{retry_no}/{max_retries}次重试（指数退避+抖动）\n")
+            if not self._sleep(delay):
+                return RESULT_CANCELED, "用户中断"
+
+    def abort(self):
+        """立即中断（可在任意线程调用）：关闭全部上游响应，并唤醒等待中的看门狗循环/退避等待"""
+        self._abort_event.set()
+        with self._lock:
+            attempts = list(self._attempts)
+            out_queue = self._queue
+        for attempt in attempts:
+            attempt.close()
+        if out_queue is not None:
+            out_queue.put((None, "abort", None))
+
+    def _aborted(self) -> bool:
+        return self._abort_event.is_set() or self._is_canceled()
+
+    def _sleep(self, seconds: float) -> bool:
+        """可中断的等待，返回是否正常等待完毕"""
+        self._abort_event.wait(seconds)
+        return not self._aborted()
+
+    def _start_attempt(self, label: str, out_queue: queue.Queue, attempts: List[_UpstreamAttempt]):
+        self.attempt_count += 1
+        attempt = _UpstreamAttempt(label, self._create_stream, self._parse_chunk, out_queue)
+        with self._lock:
+            attempts.append(attempt)
+            aborted = self._abort_event.is_set()
+        if aborted:
+            attempt.close()  # abort() 与发起请求并发时，新请求直接作废
+        attempt.start()
+        return attempt
+
+    def _run_attempt_group(self, on_text: Callable[[str], None]) -> Tuple[str, str, bool]:
+        """一次尝试（主请求+可能的对冲请求），先出首字者胜出，其余立即关闭"""
+        out_queue = queue.Queue()
+        attempts: List[_UpstreamAttempt] = []
+        with self._lock:
+            self._queue = out_queue
+            self._attempts = attempts
+        self._start_attempt(f"请求{self.attempt_count + 1}", out_queue, attempts)
+        start = time.monotonic()
+        ttft_timeout = global_config.ttft_timeout
+        idle_timeout = global_config.idle_timeout
+        hedge_at = start + ttft_tracker.hedge_threshold() if global_config.hedge_enabled else None
+        winner: Optional[_UpstreamAttempt] = None
+        last_activity = start
+        got_text = False
+
+        def close_all(keep=None):
+            for item in attempts:
+                if item is not keep:
+                    item.close()
+
+        try:
+            while True:
+                if self._aborted():
+                    close_all()
+                    return RESULT_CANCELED, "用户中断", got_text
+                now = time.monotonic()
+                if winner is None:
+                    deadline = start + ttft_timeout
+                    # 对冲：主请求首字耗时超过p95阈值仍无输出，追加一个并行请求
+                    if hedge_at is not None and now >= hedge_at and len(attempts) == 1:
+                        self.hedge_count += 1
+                        self._log(f"🪁 首字等待已超过对冲阈值 {hedge_at - start:.1f}s，发起对冲请求\n")
+                        self._start_attempt("对冲请求", out_queue, attempts)
+                        hedge_at = None
+                else:
+                    deadline = last_activity + idle_timeout
+                if now >= deadline:
+                    close_all()
+                    phase = "首字超时" if winner is None else "分块间隔超时"
+                    limit = ttft_timeout if winner is None else idle_timeout
+                    self._log(f"⏰ {phase}：超过 {limit:g}s 无新内容，已关闭上游连接\n")
+                    return RESULT_RETRYABLE, phase, got_text
+                wait = min(deadline - now, 0.1)
+                if hedge_at is not None:
+                    wait = min(wait, max(hedge_at - now, 0))
+                try:
+                    attempt, kind, payload = out_queue.get(timeout=max(wait, 0.001))
+                except queue.Empty:
+                    continue
+                if kind == "abort":
+                    continue  # 中断唤醒：回到循环开头处理
+                if winner is not None and attempt is not winner:
+                    continue  # 落败请求的残留消息
+                if kind == "text":
+                    if winner is None:
+                        winner = attempt
+                        ttft = time.monotonic() - attempt.start_time
+                        ttft_tracker.record(time.monotonic() - start)
+                        if len(attempts) > 1:
+                            self._log(f"🏁 {attempt.label}率先返回首字（{ttft * 1000:.0f} ms），关闭其余请求\n")
+                        close_all(keep=winner)
+                    last_activity = time.monotonic()
+                    got_text = True
+                    on_text(payload)
+                elif kind == "end":
+                    if winner is None:
+                        close_all(keep=attempt)
+                    winner = None  # 正常读完的响应由读取线程自行关闭，连接归还连接池
+                    return RESULT_OK, "", got_text
+                elif kind == "error":
+                    attempt.close()
+                    alive = [item for item in attempts if not item._closed.is_set()]
+                    retryable = is_retryable_error(payload)
+                    err_info = str(payload)[:120]
+                    if winner is None and alive:
+                        self._log(f"⚠️ {attempt.label}失败（{err_info}），等待其余请求\n")
+                        continue
+                    if retryable:
+                        return RESULT_RETRYABLE, f"瞬时错误：{err_info}", got_text
+                    return RESULT_FATAL, err_info, got_text
+        finally:
+            if winner is not None:
+                winner.close()
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from typing import Callable, List, Optional
+
+
+class StreamPacer:
+    """流式输出节流器：缓冲模型分块，按时间/字数预算批量刷新到界面，不阻塞读取循环"""
+
+    def __init__(self, emit: Callable[[str], None], flush_interval_ms: int = 50,
+                 flush_chars: int = 64, max_throughput: bool = False):
+        """
+        :param emit: 刷新回调（通常为 text_signal.emit，跨线程信号投递不会阻塞）
+        :param flush_interval_ms: 时间预算：距上次刷新超过该毫秒数即刷新
+        :param flush_chars: 字数预算：缓冲字符数达到该值即刷新
+        :param max_throughput: 最大吞吐模式：不做任何缓冲，每块到达立即转发
+        """
+        self._emit = emit
+        self.flush_interval = max(flush_interval_ms, 0) / 1000
+        self.flush_chars = max(flush_chars, 1)
+        self.max_throughput = max_throughput
+        # 缓冲区（list拼接，避免字符串反复拷贝）
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        # 耗时统计：以请求发起时刻为起点
+        self.start_time = time.perf_counter()
+        self._last_flush = self.start_time
+        self.first_token_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.chunk_count = 0
+        self.flush_count = 0
+
+    def feed(self, text: str):
+        """接收一块模型输出，仅做内存追加和预算判断，不做任何等待"""
+        if not text:
+            return
+        now = time.perf_counter()
+        if self.first_token_time is None:
+            self.first_token_time = now
+        self.chunk_count += 1
+
+        # 最大吞吐模式：直接透传
+        if self.max_throughput:
+            self._emit(text)
+            self.flush_count += 1
+            self._last_flush = now
+            return
+
+        self._buffer.append(text)
+        self._buffered_chars += len(text)
+        if self._buffered_chars >= self.flush_chars or now - self._last_flush >= self.flush_interval:
+            self.flush(now)
+
+    def tick(self, now: float = None):
+        """定时检查：缓冲内容已超过时间预算仍未刷新时补刷一次（上游停顿时缓冲的尾部内容不会一直不显示）"""
+        if now is None:
+            now = time.perf_counter()
+        if self._buffer and now - self._last_flush >= self.flush_interval:
+            self.flush(now)
+
+    async def run_deadline(self):
+        """在消费事件的同一事件循环中按时间预算周期调用 tick()，由调用方在流结束时取消"""
+        if self.max_throughput or self.flush_interval <= 0:
+            return  # 不缓冲，无需补刷
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.tick()
+
+    def flush(self, now: float = None):
+        """把缓冲区内容一次性刷新出去"""
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_chars = 0
+        self._last_flush = now if now is not None else time.perf_counter()
+        self.flush_count += 1
+        self._emit(text)
+
+    def close(self):
+        """结束流：刷新剩余内容并记录总耗时"""
+        self.flush()
+        if self.end_time is None:
+            self.end_time = time.perf_counter()
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        """首字耗时（毫秒），未收到任何内容时为None"""
+        if self.first_token_time is None:
+            return None
+        return (self.first_token_time - self.start_time) * 1000
+
+    @property
+    def wall_time_ms(self) -> float:
+        """总耗时（毫秒），流未结束时取当前时刻"""
+        end = self.end_time if self.end_time is not None else time.perf_counter()
+        return (end - self.start_time) * 1000
+
+    def summary(self) -> str:
+        """耗时统计文本（用于执行日志）"""
+        ttft = f"{self.ttft_ms:.0f} ms" if self.ttft_ms is not None else "无输出"
+        mode = "最大吞吐" if self.max_throughput else f"{self.flush_interval * 1000:.0f}ms/{self.flush_chars}字批量"
+        return (f"⏱️ 首字耗时：{ttft} | 总耗时：{self.wall_time_ms:.0f} ms | "
+                f"接收分块：{self.chunk_count} | 界面刷新：{self.flush_count} 次（{mode}）")
@@ -0,0 +1,50 @@
+from typing import Callable, Dict, Iterable, Iterator
+
+# 携带增量文本（delta字段）的流式事件类型
+TEXT_DELTA_EVENTS = (
+    "response.output_text.delta",
+    "response.doubao_app_call_output_text.delta",
+)
+
+
+def _delta_text(chunk) -> str:
+    return chunk.delta or ""
+
+
+def _legacy_text(chunk) -> str:
+    """无type字段的旧版SDK分块：直接读取text，或拼接嵌套output中的全部文本"""
+    text = getattr(chunk, "text", None)
+    if text:
+        return text
+    outputs = getattr(chunk, "output", None)
+    if not outputs:
+        return ""
+    parts = []
+    for output in outputs:
+        for content in getattr(output, "content", None) or ():
+            content_text = getattr(content, "text", None)
+            if content_text:
+                parts.append(content_text)
+    return "".join(parts)
+
+
+# 事件类型 -> 文本提取函数；未登记的事件（created/in_progress/done/completed等）不产生文本。
+# output_text.done 携带的是完整文本，内容已经通过delta输出过，不能再次拼接
+_EXTRACTORS: Dict[str, Callable[[object], str]] = {event_type: _delta_text for event_type in TEXT_DELTA_EVENTS}
+
+
+def parse_stream_chunk(chunk) -> str:
+    """解析单个流式响应块为文本，按模型输出原样返回（保留空格/换行），无文本时返回空串"""
+    event_type = getattr(chunk, "type", None)
+    if event_type is None:
+        return _legacy_text(chunk)
+    extractor = _EXTRACTORS.get(event_type)
+    return extractor(chunk) if extractor is not None else ""
+
+
+def iter_stream_text(stream: Iterable) -> Iterator[str]:
+    """逐块解析流式响应，只产出非空文本"""
+    for chunk in stream:
+        text = parse_stream_chunk(chunk)
+        if text:
+            yield text
@@ -0,0 +1,124 @@
+import threading
+from collections import deque
+from typing import List, Optional, Set, Tuple
+from db.change_events import TEMPLATES_TABLE, ChangeEvent, change_bus
+from db.history_dao import TemplateDAO
+
+# 系统默认日报模板名称（不可删除，无默认标记时兜底）
+BUILTIN_TEMPLATE_NAME = "默认日报模板"
+# 保留的最近变更条数（窗口落后更多版本时整体刷新）
+CHANGE_LOG_SIZE = 100
+
+
+class TemplateCache:
+    """
+    模板进程内缓存（模板数量少、读多写少）：首次使用时一次查询全部加载，之后读取均为内存查找
+    - 写穿透：新增/编辑/删除/设默认直接写库，内存按变更总线的模板事件更新（只重读受影响的行），
+      其他入口（批量生成、其他窗口）写入的模板同样即时生效
+    - 变更计数：每次修改 version+1 并记录变更的模板名，已打开的窗口按 changes_since 增量刷新
+    """
+
+    def __init__(self):
+        self.template_dao = TemplateDAO()
+        self._lock = threading.RLock()  # 批量生成线程与主线程共用
+        self._templates = {}  # 模板名 -> 模板信息（与 templates 表一行对应）
+        self._loaded = False
+        self.version = 0
+        self._changes = deque(maxlen=CHANGE_LOG_SIZE)  # (version, 模板名)
+        change_bus.subscribe(TEMPLATES_TABLE, self._on_templates_changed)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._templates = {t["template_name"]: t for t in self.template_dao.get_all_templates()}
+            self._loaded = True
+
+    def _record_change(self, *names: str):
+        self.version += 1
+        for name in names:
+            self._changes.append((self.version, name))
+
+    def _on_templates_changed(self, event: ChangeEvent):
+        """模板写入提交后（发布方线程同步回调）：移除删除的行，重读新增/修改的行（含建表默认值/触发器生成的列）"""
+        with self._lock:
+            if event.reload:
+                self.invalidate()
+                return
+            if not self._loaded:
+                return  # 尚未加载，首次读取时自然是最新数据
+            names = []
+            for template_id in event.inserted | event.updated | event.deleted:
+                for name, template in list(self._templates.items()):
+                    if template["id"] == template_id:
+                        del self._templates[name]
+                        names.append(name)
+            for template_id in event.inserted | event.updated:
+                template = self.template_dao.get_template_by_id(template_id)
+                if template:
+                    self._templates[template["template_name"]] = template
+                    names.append(template["template_name"])
+            if names:
+                self._record_change(*names)
+
+    # ========== 读取（内存） ==========
+    def get(self, template_name: str) -> Optional[dict]:
+        with self._lock:
+            self._ensure_loaded()
+            template = self._templates.get(template_name)
+            return dict(template) if template else None
+
+    def get_default(self) -> Optional[dict]:
+        """当前默认模板（无默认标记时取系统默认日报模板）"""
+        with self._lock:
+            self._ensure_loaded()
+            for template in self._templates.values():
+                if template["is_default"] == 1:
+                    return dict(template)
+            template = self._templates.get(BUILTIN_TEMPLATE_NAME)
+            return dict(template) if template else None
+
+    def get_all(self, template_type: str = None) -> List[dict]:
+        """模板列表（可按类型筛选），排序同数据库查询：默认模板在前，其余按创建时间倒序"""
+        with self._lock:
+            self._ensure_loaded()
+            templates = [dict(t) for t in self._templates.values()
+                         if not template_type or t["template_type"] == template_type]
+        templates.sort(key=lambda t: t["create_time"] or "", reverse=True)
+        templates.sort(key=lambda t: t["is_default"] or 0, reverse=True)
+        return templates
+
+    def changes_since(self, version: int) -> Tuple[int, Optional[Set[str]]]:
+        """
+        自 version 之后变更过的模板名
+        :return: (当前版本, 变更模板名集合)；版本过旧、变更记录已被淘汰时集合为None（需整体刷新）
+        """
+        with self._lock:
+            if version == self.version:
+                return self.version, set()
+            if not self._changes or self._changes[0][0] > version:
+                return self.version, None
+            return self.version, {name for changed, name in self._changes if changed > version}
+
+    # ========== 写入（写穿透，内存由变更事件同步） ==========
+    def add(self, template_name: str, template_type: str, content: str) -> bool:
+        return self.template_dao.add_template(template_name, template_type, content)
+
+    def update(self, template_name: str, template_type: str, content: str) -> bool:
+        return self.template_dao.update_template(template_name, template_type, content)
+
+    def set_default(self, template_name: str) -> bool:
+        return self.template_dao.set_default_template(template_name)
+
+    def delete(self, template_name: str) -> bool:
+        return self.template_dao.delete_template(template_name)
+
+    def invalidate(self):
+        """丢弃缓存（数据库被外部修改后调用），下次读取时重新加载"""
+        with self._lock:
+            self._loaded = False
+            self._templates = {}
+            self._changes.clear()
+            self.version += 1
+
+
+# 全局模板缓存实例（主窗口/模板窗口/批量生成共用）
+template_cache = TemplateCache()
@@ -0,0 +1,67 @@
+import threading
+from typing import Callable, Dict, FrozenSet, Iterable, List
+
+# 发布变更的表
+HISTORY_TABLE = "history"
+TEMPLATES_TABLE = "templates"
+
+
+class ChangeEvent:
+    """一次已提交写入的变更：表名 + 新增/修改/删除的行ID；reload 为无法逐行描述的变更（如全文索引就绪），订阅方整体刷新"""
+
+    def __init__(self, table: str, version: int, inserted: Iterable[int] = (), updated: Iterable[int] = (),
+                 deleted: Iterable[int] = (), reload: bool = False):
+        self.table = table
+        self.version = version
+        self.inserted: FrozenSet[int] = frozenset(inserted)
+        self.updated: FrozenSet[int] = frozenset(updated)
+        self.deleted: FrozenSet[int] = frozenset(deleted)
+        self.reload = reload
+
+    def __repr__(self):
+        return (f"ChangeEvent({self.table} v{self.version}: +{len(self.inserted)} ~{len(self.updated)} "
+                f"-{len(self.deleted)}{' reload' if self.reload else ''})")
+
+
+class ChangeBus:
+    """
+    进程内数据变更发布/订阅：DAO 在写事务提交后发布受影响的行ID，视图/缓存据此只更新相关行
+    - 回调在发布方线程同步执行（数据库线程、导入线程等），界面经 ui.components.change_feed 转回主线程
+    - 每张表维护变更计数，查询结果缓存比较计数即可判断是否过期
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._subscribers: Dict[str, List[Callable[[ChangeEvent], None]]] = {}
+
+    def version(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    def subscribe(self, table: str, callback: Callable[[ChangeEvent], None]):
+        with self._lock:
+            self._subscribers.setdefault(table, []).append(callback)
+
+    def unsubscribe(self, table: str, callback: Callable[[ChangeEvent], None]):
+        with self._lock:
+            if callback in self._subscribers.get(table, []):
+                self._subscribers[table].remove(callback)
+
+    def publish(self, table: str, inserted: Iterable[int] = (), updated: Iterable[int] = (),
+                deleted: Iterable[int] = (), reload: bool = False) -> ChangeEvent:
+        """写事务提交后调用（未提交就通知，订阅方读回的可能还是旧数据）"""
+        with self._lock:
+            version = self._versions.get(table, 0) + 1
+            self._versions[table] = version
+            subscribers = list(self._subscribers.get(table, []))
+        event = ChangeEvent(table, version, inserted, updated, deleted, reload)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"⚠️ 变更通知处理失败（{table}）：{e}")
+        return event
+
+
+# 全局变更总线（DAO/导入/后台迁移发布，模板缓存与界面订阅）
+change_bus = ChangeBus()
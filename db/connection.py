@@ -0,0 +1,145 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+from config.app_config import DB_PATH, global_config
+
+# 可取消查询：每执行多少条SQLite虚拟机指令检查一次取消标记（越小响应越快，开销越大）
+CANCEL_CHECK_STEPS = 1000
+
+
+class QueryCancelled(Exception):
+    """查询已被更新的查询取代（经 read(cancel=...) 中断），调用方应直接丢弃，不视为数据库错误"""
+
+
+def configure_connection(conn: sqlite3.Connection, read_only: bool = False):
+    """统一设置连接参数：WAL、同步级别、页缓存、内存映射、忙等待，并注册触发器依赖的SQL函数"""
+    # 局部导入，避免与 db.history_search / db.template_snapshot / db.history_compression 循环导入
+    from db.history_compression import register_compression_functions
+    from db.history_search import register_search_functions
+    from db.template_snapshot import register_snapshot_functions
+    conn.row_factory = sqlite3.Row  # 支持按列名访问
+    conn.execute(f"PRAGMA busy_timeout = {int(global_config.db_busy_timeout_ms)}")
+    if not read_only:
+        # journal_mode 持久化在库文件中，写连接设置一次即可
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = {-int(global_config.db_cache_size_kb)}")  # 负数单位为KB
+    conn.execute(f"PRAGMA mmap_size = {int(global_config.db_mmap_size_mb) * 1024 * 1024}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    register_search_functions(conn)
+    register_snapshot_functions(conn)
+    register_compression_functions(conn)
+
+
+class ConnectionManager:
+    """
+    数据库连接管理（进程内共用，替代各DAO/窗口各自建连）
+    - 写：单一写连接，进程内加锁串行（SQLite同一时刻只有一个写事务），退出上下文时提交/回滚
+    - 读：只读连接池，WAL模式下读写互不阻塞，用完归还
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._write_lock = threading.RLock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_depth = 0  # 同一线程嵌套 write() 时只在最外层提交
+        self._readers = queue.LifoQueue()  # 空闲读连接（后进先出，常用连接页缓存更热）
+        self._all_readers: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        self._closed = False
+
+    def _open(self, read_only: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               cached_statements=global_config.db_statement_cache_size)
+        configure_connection(conn, read_only)
+        return conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """获取写连接（持锁），正常退出提交，异常回滚后继续抛出"""
+        with self._write_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("数据库连接已关闭")
+            if self._writer is None:
+                self._writer = self._open(read_only=False)
+            self._write_depth += 1
+            try:
+                yield self._writer
+                if self._write_depth == 1:
+                    self._writer.commit()
+            except BaseException:
+                if self._write_depth == 1:
+                    self._writer.rollback()
+                raise
+            finally:
+                self._write_depth -= 1
+
+    @contextmanager
+    def read(self, cancel: Optional[Callable[[], bool]] = None) -> Iterator[sqlite3.Connection]:
+        """
+        借用一个只读连接，池中无空闲且未达上限时新建，达到上限时等待归还
+        :param cancel: 取消检查函数（返回True表示查询已过期）：借用前已取消则不执行；
+                       执行中经进度回调中断正在运行的语句，两种情况都抛出 QueryCancelled
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("数据库连接已关闭")
+        if cancel is not None and cancel():
+            raise QueryCancelled()
+        conn = self._borrow()
+        if cancel is not None:
+            conn.set_progress_handler(lambda: 1 if cancel() else 0, CANCEL_CHECK_STEPS)
+        try:
+            yield conn
+        except sqlite3.OperationalError as e:
+            if cancel is not None and cancel():
+                raise QueryCancelled() from e
+            raise
+        finally:
+            if cancel is not None:
+                conn.set_progress_handler(None, 0)
+            if self._closed:
+                conn.close()
+            else:
+                self._readers.put(conn)
+
+    def _borrow(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if len(self._all_readers) < max(global_config.db_read_pool_size, 1):
+                conn = self._open(read_only=True)
+                self._all_readers.append(conn)
+                return conn
+        return self._readers.get()
+
+    def close(self):
+        """关闭全部连接（程序退出时调用）：先合并WAL并更新查询优化统计"""
+        with self._write_lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._writer is not None:
+                try:
+                    self._writer.execute("PRAGMA optimize")
+                    self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error as e:
+                    print(f"数据库关闭前整理失败：{e}")
+                self._writer.close()
+                self._writer = None
+        # 只关闭空闲读连接，借出中的连接在归还时关闭
+        while True:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+
+# 全局连接管理实例，DAO/初始化/后台任务统一从这里取连接
+connection_manager = ConnectionManager()
@@ -1,5 +1,6 @@
-import sqlite3
 from config.app_config import DB_PATH
+from db.connection import connection_manager
+from db.migrations import run_migrations
 import os
 
 def init_database():
@@ -12,33 +13,17 @@ def init_database():
     if not os.path.exists(db_dir):
         os.makedirs(db_dir)
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # 1. 创建历史记录表（history）- 保持原有结构
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS history (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        create_time TEXT NOT NULL,
-        template_content TEXT NOT NULL,
-        work_content TEXT NOT NULL,
-        report_content TEXT NOT NULL
-    )
-    """)
+    # 按版本号执行结构迁移；大表数据迁移限时执行，剩余在后台继续
+    run_migrations()
+    with connection_manager.write() as conn:
+        _ensure_default_template(conn)
+    print(f"数据库初始化完成，路径：{DB_PATH}")
 
-    # 2. 创建模板表（templates）- 保持原有结构
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS templates (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        template_name TEXT UNIQUE NOT NULL,
-        template_type TEXT NOT NULL,
-        content TEXT NOT NULL,
-        create_time TEXT NOT NULL,
-        is_default INTEGER DEFAULT 0
-    )
-    """)
 
-    # 3. 初始化默认日报模板（仅当模板不存在时创建）
+def _ensure_default_template(conn):
+    """初始化默认日报模板（在写连接的事务中执行，由调用方提交）"""
+    cursor = conn.cursor()
+    # 初始化默认日报模板（仅当模板不存在时创建）
     cursor.execute("SELECT * FROM templates WHERE template_name = '默认日报模板'")
     if not cursor.fetchone():
         # 插入初始默认模板（仅首次创建）
@@ -54,11 +39,6 @@ def init_database():
             cursor.execute("UPDATE templates SET is_default = 1 WHERE template_name = '默认日报模板'")
             print("修复：无默认模板，将默认日报模板设为默认")
 
-    # 提交并关闭连接
-    conn.commit()
-    conn.close()
-    print(f"数据库初始化完成，路径：{DB_PATH}")
-
 # 程序启动时执行一次初始化
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_database()
\ No newline at end of file
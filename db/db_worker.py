@@ -0,0 +1,154 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+from config.app_config import global_config
+from db.history_dao import HistoryDAO, TemplateDAO
+
+# 任务类型：普通任务（读或即时写）按提交顺序执行；新增历史进入写队列批量提交
+_TASK_CALL = "call"
+_TASK_INSERT = "insert"
+_TASK_STOP = "stop"
+
+
+class DBSession:
+    """数据库线程内的DAO集合（连接由连接管理器统一提供）"""
+
+    def __init__(self):
+        self.history = HistoryDAO()
+        self.templates = TemplateDAO()
+
+
+class _AsyncDAO:
+    """异步DAO门面：调用与同步DAO同名的方法，返回Future（结果在数据库线程中计算）"""
+
+    def __init__(self, worker: "DBWorker", dao_name: str):
+        self._worker = worker
+        self._dao_name = dao_name
+
+    def __getattr__(self, method_name: str) -> Callable[..., Future]:
+        def call(*args, **kwargs) -> Future:
+            return self._worker.submit(lambda session: getattr(getattr(session, self._dao_name), method_name)(*args, **kwargs))
+        return call
+
+
+class _AsyncHistoryDAO(_AsyncDAO):
+    """历史记录异步DAO：add_history 走写后台（批量提交），其余方法按提交顺序执行"""
+
+    def add_history(self, template_content: str, work_content: str, report_content: str,
+                    create_time: str = None) -> Future:
+        return self._worker.add_history(template_content, work_content, report_content, create_time)
+
+
+class DBWorker:
+    """
+    数据库后台线程：界面线程只提交任务、拿Future，不再阻塞于查询/提交
+    - 顺序保证：任务严格按提交顺序执行；任何任务执行前先提交此前排队的写入（读到的一定包含之前的写）
+    - 写后台：新增历史先进入写队列，凑满批量或到达刷新间隔后同一事务提交
+    - 退出落盘：shutdown() 提交全部待写记录后再结束线程
+    """
+
+    def __init__(self, batch_size: int = None, flush_interval_ms: int = None):
+        self.batch_size = max(batch_size or global_config.db_write_batch_size, 1)
+        self.flush_interval = (flush_interval_ms if flush_interval_ms is not None
+                               else global_config.db_write_flush_interval_ms) / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.history = _AsyncHistoryDAO(self, "history")
+        self.templates = _AsyncDAO(self, "templates")
+
+    # ---------- 提交任务 ----------
+    def submit(self, func: Callable[[DBSession], object]) -> Future:
+        """提交任务（func在数据库线程中以DBSession为参数执行），返回Future"""
+        return self._put(_TASK_CALL, func)
+
+    def add_history(self, template_content: str, work_content: str, report_content: str,
+                    create_time: str = None) -> Future:
+        """写后台新增历史记录，Future结果为新记录ID（失败为-1），批量提交后才返回"""
+        return self._put(_TASK_INSERT, (template_content, work_content, report_content, create_time))
+
+    def flush(self, timeout: float = None) -> bool:
+        """等待此前提交的任务（含待写记录）全部完成"""
+        future = self.submit(lambda session: None)
+        try:
+            future.result(timeout)
+            return True
+        except Exception:
+            return False
+
+    def _put(self, kind: str, payload) -> Future:
+        future = Future()
+        with self._lock:
+            if self._stopped:
+                future.set_exception(RuntimeError("数据库线程已关闭"))
+                return future
+            if self._thread is None:
+                # 首次使用时才启动线程，不拖慢启动
+                self._thread = threading.Thread(target=self._run, name="db-worker", daemon=True)
+                self._thread.start()
+            self._queue.put((kind, payload, future))
+        return future
+
+    def shutdown(self, timeout: float = 10.0):
+        """提交全部待写记录后结束线程（程序退出时调用）"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put((_TASK_STOP, None, None))
+        thread.join(timeout)
+
+    # ---------- 数据库线程 ----------
+    def _run(self):
+        session = DBSession()
+        pending = []  # 待写记录 [(payload, future)]
+        deadline = 0.0
+        while True:
+            try:
+                timeout = max(deadline - time.monotonic(), 0) if pending else None
+                kind, payload, future = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                # 到达刷新间隔，提交已排队的写入
+                self._write_batch(session, pending)
+                continue
+            if kind == _TASK_INSERT:
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.append((payload, future))
+                if len(pending) >= self.batch_size:
+                    self._write_batch(session, pending)
+                continue
+            # 其他任务执行前先提交写队列，保证按提交顺序可见
+            self._write_batch(session, pending)
+            if kind == _TASK_STOP:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(payload(session))
+            except Exception as e:
+                future.set_exception(e)
+
+    @staticmethod
+    def _write_batch(session: DBSession, pending: List[tuple]):
+        if not pending:
+            return
+        records = [payload for payload, _ in pending]
+        history_ids = session.history.add_histories(records)
+        if not history_ids:
+            # 整批失败时逐条重试，只让真正有问题的记录失败
+            history_ids = [session.history.add_history(*record) for record in records]
+        for (_, future), history_id in zip(pending, history_ids):
+            if future.set_running_or_notify_cancel():
+                future.set_result(history_id)
+        pending.clear()
+
+
+# 全局数据库线程实例（界面各处共用，程序退出时 shutdown 落盘）
+db_worker = DBWorker()
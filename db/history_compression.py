@@ -0,0 +1,280 @@
+"""
+历史记录大文本透明压缩（默认关闭，[DB_CONFIG] compress_enabled = True 开启）：
+work_content/report_content 超过阈值时以 zlib（可带自训练预置字典）压缩为BLOB存储
+- 读取：history_full 视图经 history_text() 解压，只有读取完整内容的行才会解压
+- 预览：压缩行在写入时另存未压缩的前若干字（work_preview/report_preview），列表分页不解压
+- 压缩后的列只有本程序注册的 history_text() 能还原，外部数据库工具看到的是BLOB；需要外部查看时用导出功能，
+  或执行 --decompress 全部改回明文
+- 字典存放在各自的库中，解压时从正在查询的连接读取，进程内按库路径缓存（迁移演练/--db 指定的库互不干扰）
+- 一次性重压缩/解压（项目根目录）：python -m db.history_compression --recompress [--no-train] [--vacuum] | --decompress
+"""
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+from config.app_config import global_config
+
+# 压缩的历史记录列；界面预览截取字符数（预览不压缩）
+COMPRESSED_COLUMNS = ("work_content", "report_content")
+PREVIEW_CHARS = 60
+# 压缩数据头：无字典 / 带字典（后接2字节字典ID），数据体为raw deflate
+_MAGIC_PLAIN = b"\x1fZ0"
+_MAGIC_DICT = b"\x1fZD"
+_WBITS = -15
+# 压缩内部状态的内存级别：默认级别8每次新建压缩对象都要分配/清零较大的哈希表（日报这种不足1KB的短文本
+# 反而成为主要开销），级别5输出相同、耗时约为1/5；解压不受影响
+_MEM_LEVEL = 5
+# 字典大小上限（zlib预置字典窗口为32KB）；训练样本数
+DICT_MAX_BYTES = 32 * 1024
+DICT_SAMPLE_ROWS = 2000
+# 重压缩每批处理的记录数
+RECOMPRESS_BATCH_SIZE = 500
+
+_lock = threading.Lock()
+# 以下缓存均按库区分（键首项为 _db_key）：字典写入后不再变化
+_dictionaries: Dict[Tuple[str, int], bytes] = {}  # (库, 字典ID) -> 字典内容
+_active_dictionaries: Dict[str, Optional[Tuple[int, bytes]]] = {}  # 库 -> 当前字典（无字典为None）
+_primed: Dict[Tuple[str, Optional[int], int], "zlib._Compress"] = {}  # (库, 字典ID, 压缩级别) -> 已载入字典的压缩对象模板
+
+
+def _db_key(conn: sqlite3.Connection) -> str:
+    """连接所在库的缓存键：文件库为路径，内存库按连接区分"""
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return path or f":memory:{id(conn)}"
+
+
+# ========== 编解码 ==========
+def encode_text(conn: sqlite3.Connection, text: str) -> Tuple[Union[str, bytes], Optional[str]]:
+    """
+    按配置压缩大文本
+    :return: (存储值, 预览)；未压缩时原样返回文本、预览为None（预览直接截取原文）
+    """
+    if not text or not global_config.db_compress_enabled:
+        return text, None
+    raw = text.encode("utf-8")
+    if len(raw) < global_config.db_compress_min_bytes:
+        return text, None
+    db_key = _db_key(conn)
+    active = _get_active_dictionary(conn, db_key)
+    compressor = _new_compressor(db_key, active)
+    header = _MAGIC_DICT + active[0].to_bytes(2, "big") if active else _MAGIC_PLAIN
+    packed = header + compressor.compress(raw) + compressor.flush()
+    if len(packed) >= len(raw) * 0.9:
+        return text, None  # 压缩收益不足，保持明文
+    return packed, text[:PREVIEW_CHARS]
+
+
+def _new_compressor(db_key: str, active: Optional[Tuple[int, bytes]]):
+    """复制已载入字典的压缩对象（每次新建都要重新处理字典）"""
+    level = global_config.db_compress_level
+    key = (db_key, active[0] if active else None, level)
+    template = _primed.get(key)
+    if template is None:
+        if active:
+            template = zlib.compressobj(level, zlib.DEFLATED, _WBITS, _MEM_LEVEL, zdict=active[1])
+        else:
+            template = zlib.compressobj(level, zlib.DEFLATED, _WBITS, _MEM_LEVEL)
+        _primed[key] = template
+    return template.copy()
+
+
+def decode_text(value, conn: sqlite3.Connection, db_key: str = None) -> Optional[str]:
+    """
+    还原存储值：压缩BLOB解压为文本，明文原样返回
+    :param conn: 值所在库的连接（带字典的压缩值从该库读取字典）
+    """
+    if not isinstance(value, bytes):
+        return value
+    if value.startswith(_MAGIC_DICT):
+        dict_id = int.from_bytes(value[3:5], "big")
+        decompressor = zlib.decompressobj(_WBITS, zdict=_get_dictionary(conn, db_key or _db_key(conn), dict_id))
+        return (decompressor.decompress(value[5:]) + decompressor.flush()).decode("utf-8")
+    if value.startswith(_MAGIC_PLAIN):
+        return zlib.decompress(value[3:], _WBITS).decode("utf-8")
+    return value.decode("utf-8", errors="replace")
+
+
+def register_compression_functions(conn: sqlite3.Connection):
+    """注册解压SQL函数（history_full 视图与全文索引触发器依赖），字典从本连接所在的库读取"""
+    db_key = _db_key(conn)
+    conn.create_function("history_text", 1, lambda value: decode_text(value, conn, db_key), deterministic=True)
+
+
+# ========== 字典 ==========
+def ensure_history_compression(conn: sqlite3.Connection):
+    """创建字典表和预览列（已存在时跳过，由迁移在事务中调用）"""
+    register_compression_functions(conn)
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS history_compression_dicts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dictionary BLOB NOT NULL,
+        sample_count INTEGER NOT NULL,
+        create_time TEXT NOT NULL
+    )
+    """)
+    history_columns = {row[1] for row in cursor.execute("PRAGMA table_info(history)")}
+    for column in ("work_preview", "report_preview"):
+        if column not in history_columns:
+            cursor.execute(f"ALTER TABLE history ADD COLUMN {column} TEXT")
+
+
+def train_dictionary(samples: List[str], max_bytes: int = DICT_MAX_BYTES) -> bytes:
+    """
+    从样本中训练预置字典：取多篇日报中重复出现的行（按出现篇数×长度打分），
+    高分片段放在字典末尾（zlib 匹配距离越近编码越短）
+    """
+    counter = Counter()
+    for text in samples:
+        for line in {line.strip() for line in (text or "").splitlines()}:
+            if 4 <= len(line) <= 200:
+                counter[line] += 1
+    picked, total = [], 0
+    for line, count in sorted(counter.items(), key=lambda item: item[1] * len(item[0].encode("utf-8")), reverse=True):
+        if count < 2:
+            break
+        data = (line + "\n").encode("utf-8")
+        if total + len(data) > max_bytes:
+            continue
+        picked.append(data)
+        total += len(data)
+    return b"".join(reversed(picked))
+
+
+def save_dictionary(conn: sqlite3.Connection, zdict: bytes, sample_count: int) -> int:
+    """保存新字典并设为该库的当前字典（需在写连接的事务中调用），返回字典ID"""
+    cursor = conn.execute("INSERT INTO history_compression_dicts (dictionary, sample_count, create_time) VALUES (?, ?, ?)",
+                          (zdict, sample_count, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    dict_id = cursor.lastrowid
+    db_key = _db_key(conn)
+    with _lock:
+        _dictionaries[(db_key, dict_id)] = zdict
+        _active_dictionaries[db_key] = (dict_id, zdict)
+    return dict_id
+
+
+def _get_active_dictionary(conn: sqlite3.Connection, db_key: str) -> Optional[Tuple[int, bytes]]:
+    with _lock:
+        if db_key in _active_dictionaries:
+            return _active_dictionaries[db_key]
+    try:
+        row = conn.execute("SELECT id, dictionary FROM history_compression_dicts ORDER BY id DESC LIMIT 1").fetchone()
+    except sqlite3.Error:
+        row = None
+    with _lock:
+        active = _active_dictionaries.setdefault(db_key, (row[0], bytes(row[1])) if row else None)
+        if active:
+            _dictionaries[(db_key, active[0])] = active[1]
+        return active
+
+
+def _get_dictionary(conn: sqlite3.Connection, db_key: str, dict_id: int) -> bytes:
+    with _lock:
+        zdict = _dictionaries.get((db_key, dict_id))
+    if zdict is not None:
+        return zdict
+    # 解压函数运行在查询过程中：SQLite 允许在自定义函数内用同一连接执行嵌套查询
+    row = conn.execute("SELECT dictionary FROM history_compression_dicts WHERE id = ?", (dict_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"历史记录压缩字典不存在：{dict_id}")
+    with _lock:
+        return _dictionaries.setdefault((db_key, dict_id), bytes(row[0]))
+
+
+# ========== 一次性重压缩 ==========
+def _stored_bytes(conn: sqlite3.Connection) -> int:
+    columns = " + ".join(f"COALESCE(length(CAST({column} AS BLOB)), 0)" for column in COMPRESSED_COLUMNS)
+    return conn.execute(f"SELECT COALESCE(SUM({columns}), 0) FROM history").fetchone()[0]
+
+
+def recompress_history(train: bool = True, batch_size: int = RECOMPRESS_BATCH_SIZE, manager=None) -> dict:
+    """
+    按当前配置重新压缩全部历史记录（可选先用现有日报训练新字典），返回前后大小统计
+    关闭压缩时执行即把全部记录改回明文；逐批在写事务中改写，全文索引内容不变（文本未变化时触发器不重建索引）
+    :param manager: 连接管理器（默认程序数据库）
+    """
+    if manager is None:
+        from db.connection import connection_manager as manager
+    start = time.perf_counter()
+    with manager.read() as conn:
+        before = _stored_bytes(conn)
+    if train and global_config.db_compress_enabled:
+        with manager.read() as conn:
+            samples = [decode_text(row[0], conn) for row in conn.execute(
+                "SELECT report_content FROM history ORDER BY random() LIMIT ?", (DICT_SAMPLE_ROWS,))]
+        zdict = train_dictionary(samples)
+        if zdict:
+            with manager.write() as conn:
+                dict_id = save_dictionary(conn, zdict, len(samples))
+            print(f"📚 已训练压缩字典 #{dict_id}：{len(zdict)} 字节（样本{len(samples)}篇）")
+
+    last_id, rows = 0, 0
+    while True:
+        with manager.read() as conn:
+            batch = [(row["id"], decode_text(row["work_content"], conn), decode_text(row["report_content"], conn))
+                     for row in conn.execute(f"SELECT id, {', '.join(COMPRESSED_COLUMNS)} FROM history "
+                                             f"WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size))]
+        if not batch:
+            break
+        with manager.write() as conn:
+            for history_id, work_content, report_content in batch:
+                work_value, work_preview = encode_text(conn, work_content)
+                report_value, report_preview = encode_text(conn, report_content)
+                conn.execute("""
+                UPDATE history SET work_content = ?, report_content = ?, work_preview = ?, report_preview = ?
+                WHERE id = ?
+                """, (work_value, report_value, work_preview, report_preview, history_id))
+        rows += len(batch)
+        last_id = batch[-1][0]
+
+    with manager.read() as conn:
+        after = _stored_bytes(conn)
+    stats = {"rows": rows, "before_bytes": before, "after_bytes": after,
+             "elapsed_s": time.perf_counter() - start}
+    ratio = after / before if before else 1.0
+    action = "重压缩" if global_config.db_compress_enabled else "解压为明文"
+    print(f"🗜️ {action}完成：{rows}条记录 | 文本列 {before / 1024 / 1024:.2f} MB → {after / 1024 / 1024:.2f} MB"
+          f"（{ratio:.0%}）| 耗时 {stats['elapsed_s']:.1f} s")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="历史记录大文本压缩")
+    parser.add_argument("--recompress", action="store_true", help="按当前配置重新压缩全部历史记录")
+    parser.add_argument("--no-train", action="store_true", help="不训练新字典（沿用当前字典）")
+    parser.add_argument("--decompress", action="store_true", help="把全部历史记录改回明文（外部数据库工具可直接查看）")
+    parser.add_argument("--vacuum", action="store_true", help="完成后执行VACUUM释放空间")
+    args = parser.parse_args(argv)
+    if not args.recompress and not args.decompress:
+        parser.print_help()
+        return 0
+    if args.decompress:
+        global_config.db_compress_enabled = False  # 仅本次运行生效，不写回配置文件
+    from db.connection import connection_manager
+    from db.db_init import init_database
+    from config.app_config import DB_PATH
+    import os
+    init_database()
+    file_before = os.path.getsize(DB_PATH)
+    recompress_history(train=not args.no_train)
+    if args.vacuum:
+        with connection_manager.write() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        # VACUUM 不能在事务中执行，使用独立的自动提交连接
+        conn = sqlite3.connect(DB_PATH, isolation_level=None)
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        print(f"📦 数据库文件：{file_before / 1024 / 1024:.1f} MB → {os.path.getsize(DB_PATH) / 1024 / 1024:.1f} MB")
+    connection_manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
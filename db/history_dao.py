@@ -1,40 +1,95 @@
 import sqlite3
 from datetime import datetime
-from config.app_config import DB_PATH
+from typing import Callable, Iterator, List, Optional, Tuple
+from db.connection import connection_manager
+from db.change_events import HISTORY_TABLE, TEMPLATES_TABLE, change_bus
+from db.history_compression import PREVIEW_CHARS, encode_text
+from db.history_hash import history_content_hash
+from db.history_search import (FTS_TABLE, HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_LIMIT, build_match_query,
+                               is_index_ready, restore_cjk)
+from db.template_snapshot import HISTORY_VIEW, SNAPSHOT_TABLE, get_snapshot_id
+
+# 历史记录分页：每页条数（界面只展示前几十个字的预览，完整内容按ID按需读取）
+HISTORY_PAGE_SIZE = 200
+# 按ID批量查询时每条语句的ID个数（低于SQLite参数个数上限）
+_ID_QUERY_CHUNK = 500
+# 预览查询列：只取ID、时间和预览（压缩文本取写入时保存的预览列），不读取、不解压完整文本
+_PREVIEW_COLUMNS = (f"h.id, h.create_time, substr(h.template_content, 1, {PREVIEW_CHARS}) AS template_preview, "
+                    f"h.work_preview, h.report_preview")
+# 完整记录列（模板文本经 history_full 视图按快照还原，大文本解压）
+_HISTORY_COLUMNS = "h.id, h.create_time, h.template_content, h.work_content, h.report_content"
+# 模板类型筛选：类型→模板内容哈希→快照ID，全程走索引；尚未迁移的存量记录仍按模板全文匹配
+_TEMPLATE_TYPE_FILTER = (f" AND (h.template_snapshot_id IN (SELECT s.id FROM templates t JOIN {SNAPSHOT_TABLE} s"
+                         f" ON s.content_hash = t.content_hash WHERE t.template_type = ?)"
+                         f" OR (h.template_snapshot_id IS NULL AND h.template_content IN"
+                         f" (SELECT content FROM templates WHERE template_type = ?)))")
 
 class HistoryDAO:
     """历史记录数据访问对象（新增template_content字段支持+条件查询+健壮性优化）"""
     def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH)
-        self.conn.row_factory = sqlite3.Row  # 支持按列名访问
-
-    def __del__(self):
-        if self.conn:
-            self.conn.close()
+        # 连接由连接管理器统一持有：读走只读连接池，写走单一写连接（不再每个窗口各自建连）
+        self.db = connection_manager
 
-    def add_history(self, template_content: str, work_content: str, report_content: str) -> int:
-        """新增历史记录（新增template_content参数）"""
+    def add_history(self, template_content: str, work_content: str, report_content: str,
+                    create_time: str = None) -> int:
+        """新增历史记录（新增template_content参数；create_time为空时取当前时间，批量补录时可指定）"""
         try:
-            cursor = self.conn.cursor()
-            create_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cursor.execute("""
-            INSERT INTO history (create_time, template_content, work_content, report_content)
-            VALUES (?, ?, ?, ?)
-            """, (create_time, template_content, work_content, report_content))
-            self.conn.commit()
+            with self.db.write() as conn:
+                create_time = create_time or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                # 模板按内容哈希去重存入快照表，历史记录只保存快照ID；大文本压缩存储
+                work_value, work_preview = encode_text(conn, work_content)
+                report_value, report_preview = encode_text(conn, report_content)
+                cursor = conn.execute("""
+                INSERT INTO history (create_time, template_content, work_content, report_content, template_snapshot_id,
+                                     work_preview, report_preview, content_hash)
+                VALUES (?, '', ?, ?, ?, ?, ?, ?)
+                """, (create_time, work_value, report_value, get_snapshot_id(conn, template_content),
+                      work_preview, report_preview,
+                      history_content_hash(create_time, template_content, work_content, report_content)))
+            change_bus.publish(HISTORY_TABLE, inserted=[cursor.lastrowid])
             return cursor.lastrowid
         except Exception as e:
-            self.conn.rollback()
             print(f"新增历史记录失败：{e}")
             return -1
 
+    def add_histories(self, records: List[tuple]) -> List[int]:
+        """
+        批量新增历史记录（同一事务提交，供写后台批量落库）
+        :param records: (template_content, work_content, report_content, create_time) 列表，create_time可为None
+        :return: 与records一一对应的新记录ID；失败时整批回滚并返回空列表
+        """
+        try:
+            with self.db.write() as conn:
+                cursor = conn.cursor()
+                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                history_ids = []
+                snapshot_ids = {}  # 同批次相同模板只查一次快照
+                for template_content, work_content, report_content, create_time in records:
+                    if template_content not in snapshot_ids:
+                        snapshot_ids[template_content] = get_snapshot_id(conn, template_content)
+                    work_value, work_preview = encode_text(conn, work_content)
+                    report_value, report_preview = encode_text(conn, report_content)
+                    create_time = create_time or now
+                    cursor.execute("""
+                    INSERT INTO history (create_time, template_content, work_content, report_content, template_snapshot_id,
+                                         work_preview, report_preview, content_hash)
+                    VALUES (?, '', ?, ?, ?, ?, ?, ?)
+                    """, (create_time, work_value, report_value, snapshot_ids[template_content],
+                          work_preview, report_preview,
+                          history_content_hash(create_time, template_content, work_content, report_content)))
+                    history_ids.append(cursor.lastrowid)
+            change_bus.publish(HISTORY_TABLE, inserted=history_ids)
+            return history_ids
+        except Exception as e:
+            print(f"批量新增历史记录失败：{e}")
+            return []
+
     def get_all_template_types(self):
         """查询所有唯一的模板类型（从templates表查询，适配筛选）"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT DISTINCT template_type FROM templates WHERE template_type IS NOT NULL")
-            template_types = [row["template_type"] for row in cursor.fetchall()]
-            return template_types
+            with self.db.read() as conn:
+                rows = conn.execute("SELECT DISTINCT template_type FROM templates WHERE template_type IS NOT NULL").fetchall()
+            return [row["template_type"] for row in rows]
         except sqlite3.Error as e:
             print(f"查询模板类型失败: {e}")
             return []
@@ -43,47 +98,214 @@ class HistoryDAO:
     def get_history_by_conditions(self, keyword: str = "", template_type: str = "") -> list:
         """
         按条件查询历史记录（适配搜索关键词+模板类型筛选）
-        :param keyword: 搜索关键词（匹配时间/模板内容/工作内容/生成结果）
-        :param template_type: 模板类型（先查对应模板内容，再匹配历史记录的template_content）
-        :return: 符合条件的历史记录列表
+        :param keyword: 搜索关键词（匹配时间/模板内容/工作内容/生成结果，空格分隔多个词）
+        :param template_type: 模板类型（按模板内容哈希关联历史记录引用的模板快照）
+        :return: 符合条件的历史记录列表；走全文索引时按相关度排序，并附带高亮摘要 snippet
         """
         try:
-            cursor = self.conn.cursor()
-            # 基础SQL和参数列表
-            sql = "SELECT * FROM history WHERE 1=1"
-            params = []
-
-            # 1. 模板类型筛选：先查templates表中该类型的所有模板内容，再模糊匹配历史记录的template_content
-            if template_type:
-                # 子查询：获取指定模板类型的所有模板内容
-                sql += " AND template_content IN (SELECT content FROM templates WHERE template_type = ?)"
-                params.append(template_type)
-
-            # 2. 关键词搜索：匹配生成时间/模板内容/工作内容/生成结果
-            if keyword:
-                sql += """ AND (create_time LIKE ? 
-                              OR template_content LIKE ? 
-                              OR work_content LIKE ? 
-                              OR report_content LIKE ?)"""
-                like_key = f"%{keyword}%"
-                params.extend([like_key, like_key, like_key, like_key])
-
-            # 按生成时间倒序
-            sql += " ORDER BY create_time DESC"
-            cursor.execute(sql, params)
-            return [dict(row) for row in cursor.fetchall()]
+            with self.db.read() as conn:
+                sql, params, match_query = self._conditions_query(conn, keyword, template_type)
+                histories = [dict(row) for row in conn.execute(sql, params).fetchall()]
+                if match_query:
+                    self._attach_snippets(conn, histories, match_query)
+                return histories
         except sqlite3.Error as e:
             print(f"条件查询历史记录失败：{e}")
-            self.conn.rollback()
             return []
+
+    def iter_history_by_conditions(self, keyword: str = "", template_type: str = "",
+                                   cancel: Optional[Callable[[], bool]] = None, by_time: bool = False) -> Iterator[dict]:
+        """
+        按条件逐条读取完整记录（顺序同 get_history_by_conditions，不含snippet），供大批量导出边读边写
+        迭代期间占用一个只读连接，迭代结束或生成器关闭时归还；cancel 同 get_history_page
+        :param by_time: 全文检索时也按生成时间倒序（按天分组导出需要同一天的记录相邻）
+        """
+        with self.db.read(cancel) as conn:
+            sql, params, _ = self._conditions_query(conn, keyword, template_type, by_time)
+            for row in conn.execute(sql, params):
+                yield dict(row)
+
+    def _conditions_query(self, conn: sqlite3.Connection, keyword: str, template_type: str,
+                          by_time: bool = False) -> Tuple[str, list, str]:
+        """
+        条件查询SQL（完整记录列）：全文索引就绪时按bm25相关度排序（by_time 时按生成时间倒序），否则模糊匹配并按生成时间倒序
+        :return: (sql, 参数, 全文检索表达式)；未走全文索引时表达式为空
+        """
+        match_query = build_match_query(keyword) if keyword else ""
+        if match_query and is_index_ready(conn):
+            sql = f"""
+            SELECT {_HISTORY_COLUMNS} FROM {FTS_TABLE} JOIN {HISTORY_VIEW} h ON h.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH ?"""
+            params = [match_query]
+            if template_type:
+                sql += _TEMPLATE_TYPE_FILTER
+                params.extend([template_type, template_type])
+            return sql + (" ORDER BY h.create_time DESC, h.id DESC" if by_time else " ORDER BY rank"), params, match_query
+        # 基础SQL和参数列表
+        sql = f"SELECT {_HISTORY_COLUMNS} FROM {HISTORY_VIEW} h WHERE 1=1"
+        params = []
+
+        # 1. 模板类型筛选：按模板类型关联模板快照
+        if template_type:
+            sql += _TEMPLATE_TYPE_FILTER
+            params.extend([template_type, template_type])
+
+        # 2. 关键词搜索：匹配生成时间/模板内容/工作内容/生成结果
+        if keyword:
+            sql += """ AND (h.create_time LIKE ?
+                          OR h.template_content LIKE ?
+                          OR h.work_content LIKE ?
+                          OR h.report_content LIKE ?)"""
+            like_key = f"%{keyword}%"
+            params.extend([like_key, like_key, like_key, like_key])
+
+        # 按生成时间倒序
+        return sql + " ORDER BY h.create_time DESC, h.id DESC", params, ""
+
+    def _attach_snippets(self, conn: sqlite3.Connection, histories: list, match_query: str):
+        """全文检索结果中相关度最高的前若干条附带snippet()命中片段高亮"""
+        top_ids = [history["id"] for history in histories[:SNIPPET_LIMIT]]
+        if top_ids:
+            snippets = {row[0]: restore_cjk(row[1] or "") for row in conn.execute(f"""
+            SELECT rowid, snippet({FTS_TABLE}, -1, ?, ?, '…', 32) FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH ? AND rowid IN ({",".join("?" * len(top_ids))})
+            """, [HIGHLIGHT_START, HIGHLIGHT_END, match_query] + top_ids).fetchall()}
+            for history in histories[:SNIPPET_LIMIT]:
+                history["snippet"] = snippets.get(history["id"], "")
     # ========== 新增方法结束 ==========
 
+    # ========== 分页预览查询（keyset分页，耗时与总记录数无关） ==========
+    def get_history_page(self, keyword: str = "", template_type: str = "", cursor: Optional[tuple] = None,
+                         page_size: int = HISTORY_PAGE_SIZE,
+                         cancel: Optional[Callable[[], bool]] = None) -> Tuple[List[dict], Optional[tuple]]:
+        """
+        分页查询历史记录预览（只含id/create_time/各列前若干字预览，全文检索时另含高亮摘要snippet）
+        :param cursor: 上一页返回的游标，None为第一页
+        :param cancel: 取消检查函数，查询被新条件取代时中断并抛出 QueryCancelled
+        :return: (本页记录, 下一页游标)；下一页游标为None表示没有更多
+        """
+        match_query = build_match_query(keyword) if keyword else ""
+        try:
+            with self.db.read(cancel) as conn:
+                if match_query and is_index_ready(conn):
+                    rows = self._page_by_rank(conn, match_query, template_type, cursor, page_size)
+                else:
+                    rows = self._page_by_time(conn, keyword, template_type, cursor, page_size)
+        except sqlite3.Error as e:
+            print(f"分页查询历史记录失败：{e}")
+            return [], None
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if not has_more or not rows:
+            return rows, None
+        last = rows[-1]
+        if match_query and "rank" in last:
+            return rows, ("rank", last["rank"], last["id"])
+        return rows, ("time", last["create_time"], last["id"])
+
+    def _page_by_time(self, conn: sqlite3.Connection, keyword: str, template_type: str, cursor: Optional[tuple],
+                      page_size: int) -> List[dict]:
+        """按生成时间倒序分页：游标为上一页最后一条的 (create_time, id)，走 idx_history_create_time 索引"""
+        sql = f"SELECT {_PREVIEW_COLUMNS} FROM {HISTORY_VIEW} h WHERE 1=1"
+        params = []
+        if template_type:
+            sql += _TEMPLATE_TYPE_FILTER
+            params.extend([template_type, template_type])
+        if keyword:
+            # 全文索引尚未就绪时的回退路径
+            sql += """ AND (h.create_time LIKE ? OR h.template_content LIKE ?
+                          OR h.work_content LIKE ? OR h.report_content LIKE ?)"""
+            params.extend([f"%{keyword}%"] * 4)
+        if cursor is not None:
+            sql += " AND (h.create_time, h.id) < (?, ?)"
+            params.extend(cursor[1:])
+        sql += " ORDER BY h.create_time DESC, h.id DESC LIMIT ?"
+        params.append(page_size + 1)
+        return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    def _page_by_rank(self, conn: sqlite3.Connection, match_query: str, template_type: str, cursor: Optional[tuple],
+                      page_size: int) -> List[dict]:
+        """全文检索按相关度分页：游标为上一页最后一条的 (rank, id)，本页记录附带高亮摘要"""
+        sql = f"""
+        SELECT {_PREVIEW_COLUMNS}, {FTS_TABLE}.rank AS rank
+        FROM {FTS_TABLE} JOIN {HISTORY_VIEW} h ON h.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH ?"""
+        params = [match_query]
+        if template_type:
+            sql += _TEMPLATE_TYPE_FILTER
+            params.extend([template_type, template_type])
+        if cursor is not None:
+            sql += f" AND ({FTS_TABLE}.rank > ? OR ({FTS_TABLE}.rank = ? AND {FTS_TABLE}.rowid > ?))"
+            params.extend([cursor[1], cursor[1], cursor[2]])
+        sql += f" ORDER BY {FTS_TABLE}.rank, {FTS_TABLE}.rowid LIMIT ?"
+        params.append(page_size + 1)
+        rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+        page_ids = [row["id"] for row in rows[:page_size]]
+        if page_ids:
+            snippets = {row[0]: restore_cjk(row[1] or "") for row in conn.execute(f"""
+            SELECT rowid, snippet({FTS_TABLE}, -1, ?, ?, '…', 32) FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH ? AND rowid IN ({",".join("?" * len(page_ids))})
+            """, [HIGHLIGHT_START, HIGHLIGHT_END, match_query] + page_ids).fetchall()}
+            for row in rows:
+                row["snippet"] = snippets.get(row["id"], "")
+        return rows
+
+    def count_history(self, keyword: str = "", template_type: str = "",
+                      cancel: Optional[Callable[[], bool]] = None) -> int:
+        """符合条件的记录总数（无条件时走create_time覆盖索引计数；cancel 同 get_history_page）"""
+        match_query = build_match_query(keyword) if keyword else ""
+        try:
+            with self.db.read(cancel) as conn:
+                if match_query and is_index_ready(conn):
+                    sql = f"SELECT COUNT(*) FROM {FTS_TABLE} JOIN history h ON h.id = {FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH ?"
+                    params = [match_query]
+                else:
+                    sql = f"SELECT COUNT(*) FROM {HISTORY_VIEW} h WHERE 1=1"
+                    params = []
+                    if keyword:
+                        sql += """ AND (h.create_time LIKE ? OR h.template_content LIKE ?
+                                      OR h.work_content LIKE ? OR h.report_content LIKE ?)"""
+                        params.extend([f"%{keyword}%"] * 4)
+                if template_type:
+                    sql += _TEMPLATE_TYPE_FILTER
+                    params.extend([template_type, template_type])
+                return conn.execute(sql, params).fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"统计历史记录数量失败：{e}")
+            return 0
+
+    def get_history_previews(self, history_ids: List[int], template_type: str = "",
+                             newer_than: Optional[tuple] = None) -> List[dict]:
+        """
+        按ID读取预览（变更通知后把新增记录补入已加载的表格），按生成时间倒序
+        :param newer_than: 已加载范围末尾的 (create_time, id)，只返回排在它之前的记录（其余的随后续分页加载）
+        """
+        rows = []
+        try:
+            with self.db.read() as conn:
+                for start in range(0, len(history_ids), _ID_QUERY_CHUNK):
+                    chunk = list(history_ids[start:start + _ID_QUERY_CHUNK])
+                    sql = f"SELECT {_PREVIEW_COLUMNS} FROM {HISTORY_VIEW} h WHERE h.id IN ({', '.join('?' * len(chunk))})"
+                    params = chunk
+                    if template_type:
+                        sql += _TEMPLATE_TYPE_FILTER
+                        params.extend([template_type, template_type])
+                    if newer_than is not None:
+                        sql += " AND (h.create_time, h.id) > (?, ?)"
+                        params.extend(newer_than)
+                    rows.extend(dict(row) for row in conn.execute(sql, params))
+        except sqlite3.Error as e:
+            print(f"按ID查询历史记录预览失败：{e}")
+            return []
+        rows.sort(key=lambda row: (row["create_time"], row["id"]), reverse=True)
+        return rows
+
     def get_all_history(self) -> list:
         """获取所有历史记录（含template_content）"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT * FROM history ORDER BY create_time DESC")
-            return [dict(row) for row in cursor.fetchall()]
+            with self.db.read() as conn:
+                rows = conn.execute(f"SELECT {_HISTORY_COLUMNS} FROM {HISTORY_VIEW} h ORDER BY h.create_time DESC").fetchall()
+            return [dict(row) for row in rows]
         except sqlite3.Error as e:
             print(f"查询全量历史记录失败：{e}")
             return []
@@ -91,21 +313,21 @@ class HistoryDAO:
     def delete_history(self, history_id: int) -> bool:
         """删除指定历史记录"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM history WHERE id = ?", (history_id,))
-            self.conn.commit()
-            return cursor.rowcount > 0
+            with self.db.write() as conn:
+                cursor = conn.execute("DELETE FROM history WHERE id = ?", (history_id,))
+            deleted = cursor.rowcount > 0
+            if deleted:
+                change_bus.publish(HISTORY_TABLE, deleted=[history_id])
+            return deleted
         except Exception as e:
-            self.conn.rollback()
             print(f"删除历史记录失败：{e}")
             return False
 
     def get_history_by_id(self, history_id: int) -> dict:
         """根据ID获取单条记录（含template_content）"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT * FROM history WHERE id = ?", (history_id,))
-            row = cursor.fetchone()
+            with self.db.read() as conn:
+                row = conn.execute(f"SELECT {_HISTORY_COLUMNS} FROM {HISTORY_VIEW} h WHERE h.id = ?", (history_id,)).fetchone()
             return dict(row) if row else None
         except sqlite3.Error as e:
             print(f"查询单条历史记录失败：{e}")
@@ -114,105 +336,109 @@ class HistoryDAO:
 class TemplateDAO:
     """模板数据访问对象（无修改，保持原有功能）"""
     def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH)
-        self.conn.row_factory = sqlite3.Row
-
-    def __del__(self):
-        if self.conn:
-            self.conn.close()
+        self.db = connection_manager
 
     def add_template(self, template_name: str, template_type: str, content: str) -> bool:
         """新增模板（名称唯一，默认is_default=0）"""
         try:
-            cursor = self.conn.cursor()
-            create_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cursor.execute("""
-            INSERT INTO templates (template_name, template_type, content, create_time, is_default)
-            VALUES (?, ?, ?, ?, 0)
-            """, (template_name, template_type, content, create_time))
-            self.conn.commit()
+            with self.db.write() as conn:
+                create_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                cursor = conn.execute("""
+                INSERT INTO templates (template_name, template_type, content, create_time, is_default)
+                VALUES (?, ?, ?, ?, 0)
+                """, (template_name, template_type, content, create_time))
+            change_bus.publish(TEMPLATES_TABLE, inserted=[cursor.lastrowid])
             return True
         except sqlite3.IntegrityError:
             return False
         except Exception as e:
             print(f"新增模板失败：{e}")
-            self.conn.rollback()
             return False
 
     def update_template(self, template_name: str, template_type: str, content: str) -> bool:
         """编辑保存模板（根据名称覆盖内容/类型）"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-            UPDATE templates
-            SET template_type = ?, content = ?
-            WHERE template_name = ?
-            """, (template_type, content, template_name))
-            self.conn.commit()
-            return cursor.rowcount > 0
+            with self.db.write() as conn:
+                updated = [row[0] for row in conn.execute("SELECT id FROM templates WHERE template_name = ?",
+                                                          (template_name,))]
+                conn.execute("""
+                UPDATE templates
+                SET template_type = ?, content = ?
+                WHERE template_name = ?
+                """, (template_type, content, template_name))
+            if updated:
+                change_bus.publish(TEMPLATES_TABLE, updated=updated)
+            return bool(updated)
         except Exception as e:
             print(f"编辑模板失败：{e}")
-            self.conn.rollback()
             return False
 
     def get_all_templates(self, template_type: str = None) -> list:
         """获取模板列表（可选按类型筛选，包含is_default）"""
-        cursor = self.conn.cursor()
-        if template_type:
-            cursor.execute("SELECT * FROM templates WHERE template_type = ? ORDER BY is_default DESC, create_time DESC", (template_type,))
-        else:
-            cursor.execute("SELECT * FROM templates ORDER BY is_default DESC, create_time DESC")
-        return [dict(row) for row in cursor.fetchall()]
+        with self.db.read() as conn:
+            if template_type:
+                rows = conn.execute("SELECT * FROM templates WHERE template_type = ? ORDER BY is_default DESC, create_time DESC",
+                                    (template_type,)).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM templates ORDER BY is_default DESC, create_time DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def get_template_by_id(self, template_id: int) -> dict:
+        """按ID获取模板（变更通知只带ID）"""
+        with self.db.read() as conn:
+            row = conn.execute("SELECT * FROM templates WHERE id = ?", (template_id,)).fetchone()
+        return dict(row) if row else None
 
     def get_template_by_name(self, template_name: str) -> dict:
         """按名称获取模板"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM templates WHERE template_name = ?", (template_name,))
-        row = cursor.fetchone()
+        with self.db.read() as conn:
+            row = conn.execute("SELECT * FROM templates WHERE template_name = ?", (template_name,)).fetchone()
         return dict(row) if row else None
 
     def get_default_template(self) -> dict:
         """获取当前默认模板（is_default=1）"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM templates WHERE is_default = 1")
-        row = cursor.fetchone()
+        with self.db.read() as conn:
+            row = conn.execute("SELECT * FROM templates WHERE is_default = 1").fetchone()
         return dict(row) if row else self.get_template_by_name("默认日报模板")
 
     def set_default_template(self, template_name: str) -> bool:
         """设为默认模板：先置空所有，再标记当前（修复rowcount判断+强制提交+无回滚）"""
         try:
-            cursor = self.conn.cursor()
-            # 步骤1：将所有模板的默认标记置0（必执行，不影响结果判断）
-            cursor.execute("UPDATE templates SET is_default = 0")
-            # 步骤2：将指定模板标记为默认（核心更新）
-            cursor.execute("UPDATE templates SET is_default = 1 WHERE template_name = ?", (template_name,))
-            # 关键修复：直接提交，不根据rowcount判断（避免前置更新影响）
-            self.conn.commit()
+            with self.db.write() as conn:
+                # 默认标记会变化的模板：原默认模板 + 新默认模板
+                updated = [row[0] for row in conn.execute(
+                    "SELECT id FROM templates WHERE is_default = 1 OR template_name = ?", (template_name,))]
+                # 步骤1：将所有模板的默认标记置0（必执行，不影响结果判断）
+                conn.execute("UPDATE templates SET is_default = 0")
+                # 步骤2：将指定模板标记为默认（核心更新）
+                conn.execute("UPDATE templates SET is_default = 1 WHERE template_name = ?", (template_name,))
+            change_bus.publish(TEMPLATES_TABLE, updated=updated)
             # 二次校验：查询数据库确认是否设置成功（保证结果准确）
-            cursor.execute("SELECT is_default FROM templates WHERE template_name = ?", (template_name,))
-            row = cursor.fetchone()
-            return row and row["is_default"] == 1
+            template = self.get_template_by_name(template_name)
+            return bool(template and template["is_default"] == 1)
         except Exception as e:
             print(f"设为默认模板失败：{e}")
-            self.conn.rollback()
             return False
 
     def delete_template(self, template_name: str) -> bool:
         """删除模板（默认日报模板不可删）"""
         try:
-            cursor = self.conn.cursor()
             if template_name == "默认日报模板":
                 return False
             template = self.get_template_by_name(template_name)
             if not template:
                 return False
             is_current_default = template["is_default"] == 1
-            cursor.execute("DELETE FROM templates WHERE template_name = ?", (template_name,))
-            if is_current_default:
-                cursor.execute("UPDATE templates SET is_default = 1 WHERE template_name = '默认日报模板'")
-            self.conn.commit()
-            return cursor.rowcount > 0
+            updated = []
+            with self.db.write() as conn:
+                cursor = conn.execute("DELETE FROM templates WHERE template_name = ?", (template_name,))
+                deleted = cursor.rowcount > 0
+                if is_current_default:
+                    conn.execute("UPDATE templates SET is_default = 1 WHERE template_name = '默认日报模板'")
+                    updated = [row[0] for row in conn.execute("SELECT id FROM templates WHERE template_name = '默认日报模板'")]
+            if deleted:
+                change_bus.publish(TEMPLATES_TABLE, updated=updated, deleted=[template["id"]])
+            return deleted
         except Exception as e:
             print(f"删除模板失败：{e}")
-            self.conn.rollback()
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,40 @@
+"""
+历史记录内容哈希（迁移 v5）：history.content_hash 列、存量记录分批回填，以及新增/导入记录共用的哈希算法
+哈希作为导入去重键；迁移层、DAO 与导入导出模块都只依赖本模块
+"""
+import hashlib
+import sqlite3
+from db.template_snapshot import HISTORY_VIEW
+
+# 内容哈希回填每批条数（导入前同步补齐时使用，后台迁移按 db_migrate_batch_size）
+HASH_BATCH_SIZE = 2000
+
+
+def history_content_hash(create_time: str, template_content: str, work_content: str, report_content: str) -> str:
+    """历史记录内容哈希（生成时间+模板+工作内容+生成结果），作为导入去重键"""
+    raw = "\x00".join(value or "" for value in (create_time, template_content, work_content, report_content))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def ensure_history_hash(conn: sqlite3.Connection):
+    """添加 history.content_hash 列及索引（已存在时跳过，由迁移在事务中调用），存量记录由后台分批回填"""
+    history_columns = {row[1] for row in conn.execute("PRAGMA table_info(history)")}
+    if "content_hash" not in history_columns:
+        conn.execute("ALTER TABLE history ADD COLUMN content_hash TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_history_content_hash ON history (content_hash)")
+
+
+def has_unhashed_history(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM history WHERE content_hash IS NULL LIMIT 1").fetchone() is not None
+
+
+def hash_history_batch(conn: sqlite3.Connection, batch_size: int) -> int:
+    """为一批存量记录计算内容哈希（需在写连接的事务中调用），返回本批条数"""
+    rows = conn.execute(f"""
+    SELECT id, create_time, template_content, work_content, report_content FROM {HISTORY_VIEW}
+    WHERE id IN (SELECT id FROM history WHERE content_hash IS NULL ORDER BY id LIMIT ?)
+    """, (batch_size,)).fetchall()
+    conn.executemany("UPDATE history SET content_hash = ? WHERE id = ?",
+                     [(history_content_hash(row["create_time"], row["template_content"], row["work_content"],
+                                            row["report_content"]), row["id"]) for row in rows])
+    return len(rows)
@@ -0,0 +1,184 @@
+import re
+import sqlite3
+
+# 全文索引表名及被索引的history列（顺序即FTS列顺序）
+FTS_TABLE = "history_fts"
+FTS_COLUMNS = ("create_time", "template_content", "work_content", "report_content")
+# 搜索结果摘要的高亮标记
+HIGHLIGHT_START = "«"
+HIGHLIGHT_END = "»"
+# 只为相关度最高的前N条生成摘要（snippet()需逐条读取并定位原文，全量生成会拖慢宽泛关键词的搜索）
+SNIPPET_LIMIT = 100
+
+# 中日韩字符（CJK统一表意文字/扩展A/兼容区、日文假名、韩文音节）
+_CJK_CLASS = "㐀-䶿一-鿿豈-﫿぀-ヿ가-힯"
+_CJK_CHAR = re.compile(f"([{_CJK_CLASS}])")
+_HAS_CJK = re.compile(f"[{_CJK_CLASS}]")
+_SEGMENTED_CJK = re.compile(f" ?({re.escape(HIGHLIGHT_START)}?)([{_CJK_CLASS}])({re.escape(HIGHLIGHT_END)}?) ?")
+_ADJACENT_MARKS = re.compile(f"{re.escape(HIGHLIGHT_END)}{re.escape(HIGHLIGHT_START)}")
+
+
+class _SegmentTable(dict):
+    """segment_cjk 的 str.translate 映射表：中日韩字符映射为前后加空格，其余字符原样保留（用到时才填充）"""
+
+    def __missing__(self, code: int) -> str:
+        char = chr(code)
+        value = f" {char} " if _CJK_CHAR.match(char) else char
+        self[code] = value
+        return value
+
+
+_SEGMENT_TABLE = _SegmentTable()
+
+
+def segment_cjk(text) -> str:
+    """
+    中文分词预处理：每个中日韩字符前后加空格，交给FTS5的unicode61分词器后即为单字词元
+    （unicode61会把连续汉字整句当成一个词，无法按词搜索；多字关键词再按相邻单字组成短语查询，等价于n-gram匹配）
+    逐字查表替换（比正则逐个匹配替换快一个数量级，索引回填/批量导入时每行都要调用）
+    """
+    if not text:
+        return ""
+    return str(text).translate(_SEGMENT_TABLE)
+
+
+def restore_cjk(segmented: str) -> str:
+    """segment_cjk 的逆操作（用于摘要展示，摘要首尾可能被截断，逐字去掉两侧各一个空格），同时合并相邻的高亮片段"""
+    return _ADJACENT_MARKS.sub("", _SEGMENTED_CJK.sub(r"\1\2\3", segmented)).strip()
+
+
+def build_match_query(keyword: str) -> str:
+    """
+    把用户输入的关键词转为FTS5查询：空白分隔的多个词为AND关系；
+    每个词作为短语查询（中文按相邻单字匹配），末尾为字母/数字时按前缀匹配，贴近原LIKE的包含语义
+    """
+    phrases = []
+    for term in keyword.split():
+        tokens = segment_cjk(term).split()
+        # unicode61 会把标点当分隔符，这里同样只保留字母/数字/中文，避免FTS5语法错误
+        words = [word for word in (re.sub(r"[^\w]+", " ", token).strip() for token in tokens) if word]
+        if not words:
+            continue
+        phrase = '"' + " ".join(words).replace('"', '""') + '"'
+        if not _HAS_CJK.search(words[-1][-1]):
+            phrase += "*"
+        phrases.append(phrase)
+    return " AND ".join(phrases)
+
+
+def register_search_functions(conn: sqlite3.Connection):
+    """注册索引触发器依赖的SQL函数（所有会写history表的连接都必须注册）"""
+    conn.create_function("segment_cjk", 1, segment_cjk, deterministic=True)
+
+
+def _indexed_values(row: str) -> str:
+    """触发器中某行（new/old）写入索引的各列表达式（模板文本按快照还原，压缩文本解压后索引）"""
+    from db.template_snapshot import resolved_template_sql
+    columns = {column: f"{row}.{column}" for column in FTS_COLUMNS}
+    columns["template_content"] = resolved_template_sql(row)
+    for column in ("work_content", "report_content"):
+        columns[column] = f"history_text({row}.{column})"
+    return ", ".join(f"segment_cjk({expr})" for expr in columns.values())
+
+
+def ensure_history_fts(conn: sqlite3.Connection):
+    """创建全文索引表和回填进度表（已存在时跳过，由迁移在事务中调用）"""
+    register_search_functions(conn)
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,))
+    created = cursor.fetchone() is None
+    columns = ", ".join(FTS_COLUMNS)
+    cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({columns}, tokenize = 'unicode61')")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS history_fts_state (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+    """)
+    if created:
+        # 新建索引：标记需要回填已有记录
+        cursor.execute("INSERT OR REPLACE INTO history_fts_state (key, value) VALUES ('backfill_done', '0')")
+        cursor.execute("INSERT OR REPLACE INTO history_fts_state (key, value) VALUES ('backfill_last_id', '0')")
+
+
+def create_fts_triggers(conn: sqlite3.Connection):
+    """按最新定义重建索引同步触发器（每次启动执行）"""
+    from db.template_snapshot import resolved_template_sql
+    cursor = conn.cursor()
+    columns = ", ".join(FTS_COLUMNS)
+    # 触发器：history增删改时同步索引（索引存放分词后的文本，rowid即history.id）
+    for trigger in ("history_fts_insert", "history_fts_delete", "history_fts_update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute(f"""
+    CREATE TRIGGER history_fts_insert AFTER INSERT ON history BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {_indexed_values("new")});
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER history_fts_delete AFTER DELETE ON history BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """)
+    # 只在被索引的文本实际变化时重建该行索引（模板转为快照引用、文本重压缩时内容不变，不触发）
+    cursor.execute(f"""
+    CREATE TRIGGER history_fts_update AFTER UPDATE ON history
+    WHEN new.create_time IS NOT old.create_time
+         OR history_text(new.work_content) IS NOT history_text(old.work_content)
+         OR history_text(new.report_content) IS NOT history_text(old.report_content)
+         OR {resolved_template_sql("new")} IS NOT {resolved_template_sql("old")}
+    BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {_indexed_values("new")});
+    END
+    """)
+
+
+def is_index_ready(conn: sqlite3.Connection) -> bool:
+    """已有记录是否回填完成（未完成时搜索回退为LIKE，保证结果完整）"""
+    try:
+        row = conn.execute("SELECT value FROM history_fts_state WHERE key = 'backfill_done'").fetchone()
+    except sqlite3.Error:
+        return False
+    return row is not None and row[0] == "1"
+
+
+def backfill_history_fts_batch(conn: sqlite3.Connection, batch_size: int) -> int:
+    """
+    按ID顺序检查一批记录，把尚未进入索引的写入索引（需在写连接的事务中调用），返回本批检查的条数
+    回填位置记录在 backfill_last_id（该ID之前的记录均已索引），每批只扫描新的一段，不随已索引量变慢
+    """
+    from db.template_snapshot import HISTORY_VIEW
+    row = conn.execute("SELECT value FROM history_fts_state WHERE key = 'backfill_last_id'").fetchone()
+    last_id = int(row[0]) if row else 0
+    ids = [row[0] for row in conn.execute("SELECT id FROM history WHERE id > ? ORDER BY id LIMIT ?",
+                                          (last_id, batch_size))]
+    if not ids:
+        return 0
+    columns = ", ".join(FTS_COLUMNS)
+    values = ", ".join(f"segment_cjk({column})" for column in FTS_COLUMNS)
+    conn.execute(f"""
+    INSERT INTO {FTS_TABLE} (rowid, {columns})
+    SELECT id, {values} FROM {HISTORY_VIEW} h
+    WHERE id BETWEEN ? AND ? AND NOT EXISTS (SELECT 1 FROM {FTS_TABLE} WHERE rowid = h.id)
+    """, (ids[0], ids[-1]))
+    conn.execute("INSERT OR REPLACE INTO history_fts_state (key, value) VALUES ('backfill_last_id', ?)",
+                 (str(ids[-1]),))
+    return len(ids)
+
+
+def suspend_fts_indexing(conn: sqlite3.Connection):
+    """
+    暂停新增记录的索引触发器（批量导入用，需在写连接的事务中调用），标记索引未就绪；
+    期间新增的记录（含其他写入）在恢复触发器后由回填补齐，搜索在回填完成前回退为模糊匹配
+    """
+    if is_index_ready(conn):
+        # 当前记录均已索引，回填从现有最大ID之后开始
+        conn.execute("INSERT OR REPLACE INTO history_fts_state (key, value) "
+                     "SELECT 'backfill_last_id', COALESCE(MAX(id), 0) FROM history")
+    conn.execute("INSERT OR REPLACE INTO history_fts_state (key, value) VALUES ('backfill_done', '0')")
+    conn.execute("DROP TRIGGER IF EXISTS history_fts_insert")
+
+
+def finish_backfill(conn: sqlite3.Connection):
+    """回填完成：标记索引就绪，搜索切换到全文索引"""
+    conn.execute("INSERT OR REPLACE INTO history_fts_state (key, value) VALUES ('backfill_done', '1')")
@@ -0,0 +1,266 @@
+"""
+历史记录批量导入/导出（JSONL/CSV），用于在不同电脑间迁移数据，无需拷贝整个数据库文件
+- 导出：从数据库游标逐行写文件，内存占用与记录数无关；先写临时文件，完成后再替换目标文件
+- 导入：逐行读取，按批 executemany 写入（每批一个事务），按内容哈希去重（重复导入同一文件不会产生重复记录）
+- 大文件导入期间暂停全文索引触发器，导入后由后台回填索引（回填完成前搜索自动回退为模糊匹配）
+- 命令行（项目根目录）：python -m db.history_transfer export|import 文件路径 [--format jsonl|csv]
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+from config.app_config import global_config
+from db.connection import connection_manager
+from db.change_events import HISTORY_TABLE, change_bus
+from db.history_compression import encode_text
+from db.history_hash import HASH_BATCH_SIZE, hash_history_batch, history_content_hash
+from db.history_search import create_fts_triggers, suspend_fts_indexing
+from db.template_snapshot import HISTORY_VIEW, get_snapshot_id
+
+# 导入/导出文件中的字段（顺序即CSV列顺序；导入时 id 仅作参考，不写入）
+TRANSFER_FIELDS = ("id", "create_time", "template_content", "work_content", "report_content")
+SUPPORTED_FORMATS = ("jsonl", "csv")
+# 导出进度回调间隔（行）
+EXPORT_PROGRESS_EVERY = 2000
+# 导入文件超过该大小时暂停全文索引触发器，导入后后台回填
+BULK_INDEX_THRESHOLD_BYTES = 4 * 1024 * 1024
+# 去重查询每次最多带的哈希参数个数（低于SQLite参数上限）
+_HASH_QUERY_CHUNK = 500
+
+# 进度回调：(已处理条数, 已完成量, 总量)，导出按条数、导入按已读取字节数计算
+ProgressCallback = Callable[[int, int, int], None]
+
+
+def _guess_format(path: str, fmt: Optional[str]) -> str:
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt == "json":
+        fmt = "jsonl"
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"不支持的文件格式：{fmt or '未知'}（仅支持 {' / '.join(SUPPORTED_FORMATS)}）")
+    return fmt
+
+
+# ========== 导出 ==========
+def export_history(path: str, fmt: str = None, progress: Optional[ProgressCallback] = None,
+                   cancel: Optional[Callable[[], bool]] = None) -> int:
+    """
+    流式导出全部历史记录（按ID顺序），返回导出条数；取消时不生成目标文件并返回 -1
+    CSV 使用 UTF-8 BOM，Excel 可直接打开
+    """
+    fmt = _guess_format(path, fmt)
+    part_path = path + ".part"
+    count = 0
+    try:
+        with connection_manager.read() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+            cursor = conn.execute(f"SELECT {', '.join(TRANSFER_FIELDS)} FROM {HISTORY_VIEW} ORDER BY id")
+            with open(part_path, "w", encoding="utf-8-sig" if fmt == "csv" else "utf-8", newline="") as f:
+                writer = csv.writer(f) if fmt == "csv" else None
+                if writer:
+                    writer.writerow(TRANSFER_FIELDS)
+                for row in cursor:
+                    if writer:
+                        writer.writerow(tuple(row))
+                    else:
+                        f.write(json.dumps(dict(row), ensure_ascii=False))
+                        f.write("\n")
+                    count += 1
+                    if count % EXPORT_PROGRESS_EVERY == 0 and count < total:
+                        if cancel and cancel():
+                            raise InterruptedError
+                        if progress:
+                            progress(count, count, total)
+        os.replace(part_path, path)
+        if progress:
+            progress(count, count, count)
+        return count
+    except InterruptedError:
+        return -1
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+
+# ========== 导入 ==========
+def _read_records(f, fmt: str) -> Iterator[Optional[dict]]:
+    """逐条读取记录，无法解析的行返回None（计入无效条数）"""
+    if fmt == "csv":
+        for row in csv.DictReader(f):
+            yield row
+        return
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield record if isinstance(record, dict) else None
+
+
+def _normalize(record: Optional[dict], now: str) -> Optional[tuple]:
+    """转为 (create_time, template_content, work_content, report_content)，缺少工作内容/生成结果时视为无效"""
+    if not record or not record.get("work_content") or not record.get("report_content"):
+        return None
+    return (str(record.get("create_time") or now), str(record.get("template_content") or ""),
+            str(record["work_content"]), str(record["report_content"]))
+
+
+def _existing_hashes(conn: sqlite3.Connection, hashes: List[str]) -> set:
+    existing = set()
+    for start in range(0, len(hashes), _HASH_QUERY_CHUNK):
+        chunk = hashes[start:start + _HASH_QUERY_CHUNK]
+        placeholders = ", ".join("?" * len(chunk))
+        existing.update(row[0] for row in conn.execute(
+            f"SELECT content_hash FROM history WHERE content_hash IN ({placeholders})", chunk))
+    return existing
+
+
+def _import_batch(records: List[tuple], snapshot_ids: dict, stats: dict):
+    """去重后写入一批记录：压缩等CPU工作在写锁外完成，写事务内只做复查与 executemany"""
+    hashed, seen = [], set()
+    for record in records:
+        digest = history_content_hash(*record)
+        if digest in seen:
+            stats["skipped"] += 1
+            continue
+        seen.add(digest)
+        hashed.append((digest, record))
+    with connection_manager.read() as conn:
+        existing = _existing_hashes(conn, [digest for digest, _ in hashed])
+        encoded = []
+        for digest, (create_time, template_content, work_content, report_content) in hashed:
+            if digest in existing:
+                continue
+            work_value, work_preview = encode_text(conn, work_content)
+            report_value, report_preview = encode_text(conn, report_content)
+            encoded.append((digest, template_content,
+                            (create_time, work_value, report_value, work_preview, report_preview, digest)))
+    with connection_manager.write() as conn:
+        existing = _existing_hashes(conn, [digest for digest, _, _ in encoded])  # 期间可能有其他写入
+        rows = []
+        for digest, template_content, values in encoded:
+            if digest in existing:
+                continue
+            if template_content not in snapshot_ids:
+                snapshot_ids[template_content] = get_snapshot_id(conn, template_content)
+            rows.append(values[:3] + (snapshot_ids[template_content],) + values[3:])
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM history").fetchone()[0]
+        conn.executemany("""
+        INSERT INTO history (create_time, template_content, work_content, report_content, template_snapshot_id,
+                             work_preview, report_preview, content_hash)
+        VALUES (?, '', ?, ?, ?, ?, ?, ?)
+        """, rows)
+        # 持写锁期间只有本批写入，ID大于写入前最大值的即为新增记录
+        inserted = [row[0] for row in conn.execute("SELECT id FROM history WHERE id > ?", (last_id,))] if rows else []
+    if inserted:
+        change_bus.publish(HISTORY_TABLE, inserted=inserted)
+    stats["imported"] += len(rows)
+    stats["skipped"] += len(hashed) - len(rows)
+
+
+def _resume_fts_indexing():
+    """恢复索引触发器，在后台回填导入期间新增的记录"""
+    # 局部导入，避免与 db.migrations 循环导入
+    from db.migrations import JobRunner
+    with connection_manager.write() as conn:
+        create_fts_triggers(conn)
+    JobRunner(connection_manager).start_background()
+
+
+def _fill_pending_hashes():
+    """导入前补齐存量记录的内容哈希（后台迁移尚未完成时），保证去重覆盖全部已有记录"""
+    while True:
+        with connection_manager.write() as conn:
+            if hash_history_batch(conn, HASH_BATCH_SIZE) < HASH_BATCH_SIZE:
+                return
+
+
+def import_history(path: str, fmt: str = None, batch_size: int = None, progress: Optional[ProgressCallback] = None,
+                   cancel: Optional[Callable[[], bool]] = None) -> dict:
+    """
+    流式导入历史记录，返回统计：read 读取条数 / imported 新增条数 / skipped 重复跳过 / invalid 无效行 / canceled
+    每批单独提交，取消或出错时已提交的批次保留（再次导入同一文件会跳过已导入的记录）
+    """
+    fmt = _guess_format(path, fmt)
+    batch_size = batch_size or global_config.db_import_batch_size
+    total_bytes = os.path.getsize(path)
+    stats = {"read": 0, "imported": 0, "skipped": 0, "invalid": 0, "canceled": False, "elapsed_s": 0.0}
+    start = time.perf_counter()
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    snapshot_ids = {}  # 同一次导入中相同模板只查一次快照
+    _fill_pending_hashes()
+    bulk = total_bytes >= BULK_INDEX_THRESHOLD_BYTES
+    if bulk:
+        with connection_manager.write() as conn:
+            suspend_fts_indexing(conn)
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            batch = []
+            for record in _read_records(f, fmt):
+                stats["read"] += 1
+                normalized = _normalize(record, now)
+                if normalized is None:
+                    stats["invalid"] += 1
+                    continue
+                batch.append(normalized)
+                if len(batch) >= batch_size:
+                    if cancel and cancel():
+                        stats["canceled"] = True
+                        break
+                    _import_batch(batch, snapshot_ids, stats)
+                    batch = []
+                    if progress:
+                        progress(stats["read"], f.buffer.tell(), total_bytes)
+            if batch and not stats["canceled"]:
+                _import_batch(batch, snapshot_ids, stats)
+    finally:
+        if bulk:
+            _resume_fts_indexing()
+    if progress and not stats["canceled"]:
+        progress(stats["read"], total_bytes, total_bytes)
+    stats["elapsed_s"] = time.perf_counter() - start
+    print(f"📥 历史记录导入{'已取消' if stats['canceled'] else '完成'}：读取{stats['read']}条，新增{stats['imported']}条，"
+          f"重复跳过{stats['skipped']}条，无效{stats['invalid']}条，耗时 {stats['elapsed_s']:.1f} s")
+    return stats
+
+
+def _print_progress(rows: int, done: int, total: int):
+    percent = done * 100 // total if total else 100
+    print(f"\r  {percent:3d}%  {rows}条", end="\n" if done >= total else "", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="历史记录批量导入/导出（JSONL/CSV）")
+    parser.add_argument("action", choices=("export", "import"), help="export 导出 / import 导入")
+    parser.add_argument("path", help="文件路径")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, help="文件格式（默认按扩展名判断）")
+    parser.add_argument("--batch-size", type=int, help="导入每批提交的记录数")
+    args = parser.parse_args(argv)
+    # 局部导入，避免循环导入
+    from db.db_init import init_database
+    init_database()
+    try:
+        if args.action == "export":
+            start = time.perf_counter()
+            count = export_history(args.path, args.format, progress=_print_progress)
+            print(f"📤 已导出{count}条记录到 {args.path}，耗时 {time.perf_counter() - start:.1f} s")
+        else:
+            import_history(args.path, args.format, args.batch_size, progress=_print_progress)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"\n{'导出' if args.action == 'export' else '导入'}失败：{e}")
+        return 1
+    finally:
+        connection_manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
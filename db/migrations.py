@@ -0,0 +1,313 @@
+"""
+数据库结构迁移：按 PRAGMA user_version 记录的版本号顺序执行迁移
+- 结构迁移：建表/加列/建索引，每个迁移一个事务，成功后递增 user_version 并记录耗时
+- 数据迁移（大表改写）：分批执行，进度保存在数据本身（可中断，下次启动继续）；
+  启动时在限定时间内先跑一部分，剩余转入后台线程，不阻塞界面
+- 视图/触发器依赖程序内注册的SQL函数，每次启动按最新定义重建
+- 命令行（项目根目录）：python -m db.migrations --status | --dry-run
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+from config.app_config import DB_PATH, global_config
+from db.connection import ConnectionManager, connection_manager
+from db.change_events import HISTORY_TABLE, change_bus
+from db.history_compression import ensure_history_compression
+from db.history_hash import ensure_history_hash, has_unhashed_history, hash_history_batch
+from db.history_search import (backfill_history_fts_batch, create_fts_triggers, ensure_history_fts, finish_backfill,
+                               is_index_ready)
+from db.template_snapshot import (create_history_view, ensure_template_snapshots, finish_template_migration,
+                                  has_unmigrated_templates, migrate_history_templates_batch)
+
+
+class BatchJob:
+    """分批数据迁移：pending 判断是否还有待处理数据，run_batch 处理一批并返回条数，finish 在全部完成后执行"""
+
+    def __init__(self, name: str, pending: Callable[[sqlite3.Connection], bool],
+                 run_batch: Callable[[sqlite3.Connection, int], int],
+                 finish: Optional[Callable[[sqlite3.Connection, int], None]] = None):
+        self.name = name
+        self.pending = pending
+        self.run_batch = run_batch
+        self.finish = finish
+
+
+class Migration:
+    """单个结构迁移：version 从1开始连续递增，apply 在写事务中执行（须可重复执行，兼容无版本号的旧库）"""
+
+    def __init__(self, version: int, name: str, apply: Callable[[sqlite3.Connection], None],
+                 job: Optional[BatchJob] = None):
+        self.version = version
+        self.name = name
+        self.apply = apply
+        self.job = job
+
+
+def _create_base_tables(conn: sqlite3.Connection):
+    cursor = conn.cursor()
+    # 历史记录表（history）
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        create_time TEXT NOT NULL,
+        template_content TEXT NOT NULL,
+        work_content TEXT NOT NULL,
+        report_content TEXT NOT NULL
+    )
+    """)
+    # 模板表（templates）
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        template_name TEXT UNIQUE NOT NULL,
+        template_type TEXT NOT NULL,
+        content TEXT NOT NULL,
+        create_time TEXT NOT NULL,
+        is_default INTEGER DEFAULT 0
+    )
+    """)
+
+
+# 历史记录按生成时间分页的索引（keyset分页：create_time+id）
+PAGE_INDEX = "idx_history_create_time"
+
+
+def has_page_index(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+                        (PAGE_INDEX,)).fetchone() is not None
+
+
+def create_page_index(conn: sqlite3.Connection, batch_size: int) -> int:
+    """建分页索引（存量大表上耗时与行数成正比，作为数据迁移执行，受启动限时约束；建好前分页查询仍可用，只是较慢）"""
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {PAGE_INDEX} ON history (create_time, id)")
+    return 0
+
+
+# 迁移列表（只追加，不修改已发布的迁移）
+MIGRATIONS: List[Migration] = [
+    Migration(1, "基础表与分页索引", _create_base_tables,
+              BatchJob("历史记录分页索引", lambda conn: not has_page_index(conn), create_page_index)),
+    Migration(2, "模板快照去重", ensure_template_snapshots,
+              BatchJob("历史记录模板去重", has_unmigrated_templates, migrate_history_templates_batch,
+                       finish_template_migration)),
+    Migration(3, "大文本压缩（字典表、预览列）", ensure_history_compression),
+    Migration(4, "历史记录全文索引", ensure_history_fts,
+              BatchJob("全文索引回填", lambda conn: not is_index_ready(conn), backfill_history_fts_batch,
+                       lambda conn, total: finish_backfill(conn))),
+    Migration(5, "历史记录内容哈希（导入去重）", ensure_history_hash,
+              BatchJob("历史记录内容哈希", has_unhashed_history, hash_history_batch)),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _refresh_definitions(conn: sqlite3.Connection):
+    """重建视图和触发器（依赖全部结构迁移完成）"""
+    create_history_view(conn)
+    create_fts_triggers(conn)
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _ensure_migration_log(conn: sqlite3.Connection):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_time TEXT NOT NULL,
+        elapsed_ms REAL NOT NULL
+    )
+    """)
+
+
+def apply_schema_migrations(manager: ConnectionManager = connection_manager) -> List[dict]:
+    """执行全部未应用的结构迁移并重建视图/触发器，返回每个迁移的耗时记录"""
+    report = []
+    with manager.write() as conn:
+        _ensure_migration_log(conn)
+        current = get_schema_version(conn)
+    if current > LATEST_VERSION:
+        print(f"⚠️ 数据库版本 v{current} 高于程序支持的 v{LATEST_VERSION}，可能由新版程序创建")
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        start = time.perf_counter()
+        with manager.write() as conn:
+            # 显式开启事务：DDL 与版本号一同提交，中途失败整体回滚，下次启动重试
+            conn.execute("BEGIN IMMEDIATE")
+            migration.apply(conn)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+            conn.execute("INSERT OR REPLACE INTO schema_migrations (version, name, applied_time, elapsed_ms) "
+                         "VALUES (?, ?, ?, ?)", (migration.version, migration.name,
+                                                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"), elapsed_ms))
+        report.append({"version": migration.version, "name": migration.name, "elapsed_ms": elapsed_ms})
+        print(f"🗃️ 数据库迁移 v{migration.version}（{migration.name}）完成，耗时 {elapsed_ms:.1f} ms")
+    with manager.write() as conn:
+        _refresh_definitions(conn)
+    return report
+
+
+# 同一时刻只有一个 JobRunner 在执行（启动后台线程与导入后触发的回填可能同时存在）
+_run_lock = threading.Lock()
+
+
+class JobRunner:
+    """按迁移顺序执行分批数据迁移：每批单独持有写连接，批次之间让出写锁，不阻塞界面保存记录"""
+
+    def __init__(self, manager: ConnectionManager = connection_manager, batch_size: Optional[int] = None):
+        self.manager = manager
+        self.batch_size = batch_size or global_config.db_migrate_batch_size
+        self.jobs = [migration.job for migration in MIGRATIONS if migration.job]
+        self.totals = {job.name: 0 for job in self.jobs}
+        self.elapsed = {job.name: 0.0 for job in self.jobs}
+        self._index = 0
+        self._done = False  # 当前任务已无待处理数据
+        self._ran = False   # 当前任务本次执行过批次（无待处理数据时不执行 finish）
+
+    def run(self, deadline: Optional[float] = None) -> bool:
+        """执行到全部完成或超过 deadline（perf_counter 时间点），返回是否全部完成；出错时保留进度，下次启动继续"""
+        with _run_lock:
+            return self._run(deadline)
+
+    def _run(self, deadline: Optional[float]) -> bool:
+        while self._index < len(self.jobs):
+            job = self.jobs[self._index]
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            start = time.perf_counter()
+            try:
+                if not self._done:
+                    with self.manager.read() as conn:
+                        self._done = not job.pending(conn)
+                if not self._done:
+                    with self.manager.write() as conn:
+                        count = job.run_batch(conn, self.batch_size)
+                    self.totals[job.name] += count
+                    self._done = count < self.batch_size
+                    self._ran = True
+                if self._done:
+                    if job.finish and self._ran:
+                        with self.manager.write() as conn:
+                            job.finish(conn, self.totals[job.name])
+                        # 任务完成可能改变查询结果（如全文索引就绪后搜索改走索引），通知界面整体刷新
+                        change_bus.publish(HISTORY_TABLE, reload=True)
+                    self._next_job()
+            except sqlite3.Error as e:
+                print(f"{job.name}失败（下次启动继续）：{e}")
+                self._next_job()
+            finally:
+                self.elapsed[job.name] += (time.perf_counter() - start) * 1000
+        return True
+
+    def _next_job(self):
+        self._index += 1
+        self._done = False
+        self._ran = False
+
+    def start_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run, name="db-migrate", daemon=True)
+        thread.start()
+        return thread
+
+
+def run_migrations(manager: ConnectionManager = connection_manager, startup_budget_ms: Optional[int] = None):
+    """
+    启动时调用：结构迁移同步执行；数据迁移在 startup_budget_ms 内尽量完成，剩余转入后台线程
+    :return: 后台线程（全部完成时为None）
+    """
+    apply_schema_migrations(manager)
+    budget = global_config.db_migrate_startup_budget_ms if startup_budget_ms is None else startup_budget_ms
+    runner = JobRunner(manager)
+    if runner.run(deadline=time.perf_counter() + budget / 1000):
+        return None
+    print(f"⏳ 数据迁移未在启动限时（{budget} ms）内完成，转入后台继续")
+    return runner.start_background()
+
+
+def dry_run(db_path: str = DB_PATH) -> List[dict]:
+    """在数据库副本上完整执行全部迁移（含数据迁移），输出计划与耗时，不修改原库"""
+    if not os.path.exists(db_path):
+        print(f"数据库不存在：{db_path}")
+        return []
+    fd, copy_path = tempfile.mkstemp(suffix=".db", prefix="dry_run_")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(copy_path)
+        try:
+            source.backup(target)  # 在线备份，原库可同时被程序使用
+        finally:
+            target.close()
+            source.close()
+        copy_ms = (time.perf_counter() - start) * 1000
+        manager = ConnectionManager(copy_path)
+        with manager.read() as conn:
+            current = get_schema_version(conn)
+        print(f"数据库：{db_path}（{os.path.getsize(db_path) / 1024 / 1024:.1f} MB，复制耗时 {copy_ms:.0f} ms）")
+        print(f"当前版本 v{current}，目标版本 v{LATEST_VERSION}")
+        report = apply_schema_migrations(manager)
+        if not report:
+            print("结构迁移：无")
+        runner = JobRunner(manager)
+        runner.run()
+        for job in runner.jobs:
+            report.append({"job": job.name, "rows": runner.totals[job.name], "elapsed_ms": runner.elapsed[job.name]})
+            print(f"数据迁移「{job.name}」：{runner.totals[job.name]}条，耗时 {runner.elapsed[job.name]:.1f} ms")
+        manager.close()
+        return report
+    finally:
+        for path in (copy_path, copy_path + "-wal", copy_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def print_status(manager: ConnectionManager = connection_manager):
+    with manager.read() as conn:
+        current = get_schema_version(conn)
+        try:
+            applied = conn.execute("SELECT version, name, applied_time, elapsed_ms FROM schema_migrations "
+                                   "ORDER BY version").fetchall()
+        except sqlite3.Error:
+            applied = []
+        pending_jobs = [migration.job.name for migration in MIGRATIONS
+                        if migration.job and migration.version <= current and migration.job.pending(conn)]
+    print(f"数据库版本 v{current} / 最新 v{LATEST_VERSION}")
+    for row in applied:
+        print(f"  v{row['version']} {row['name']}：{row['applied_time']}，{row['elapsed_ms']:.1f} ms")
+    for migration in MIGRATIONS:
+        if migration.version > current:
+            print(f"  v{migration.version} {migration.name}：待执行")
+    print(f"未完成的数据迁移：{'、'.join(pending_jobs) if pending_jobs else '无'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="数据库结构迁移")
+    parser.add_argument("--status", action="store_true", help="查看当前版本与待执行迁移")
+    parser.add_argument("--dry-run", action="store_true", help="在数据库副本上试运行全部迁移并输出耗时")
+    parser.add_argument("--db", default=DB_PATH, help="数据库路径（默认为程序数据库）")
+    args = parser.parse_args(argv)
+    if args.dry_run:
+        dry_run(args.db)
+    elif args.status:
+        if not os.path.exists(args.db):
+            print(f"数据库不存在：{args.db}")
+            return 1
+        manager = ConnectionManager(args.db)
+        print_status(manager)
+        manager.close()
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+from typing import Hashable, Optional
+from config.app_config import global_config
+from db.change_events import HISTORY_TABLE, ChangeBus, change_bus
+
+
+class QueryResultCache:
+    """
+    历史记录查询结果缓存（LRU）：键为查询条件（+分页游标），值为DAO返回的结果
+    - 失效：历史记录表的变更计数变化后整体清空；查询期间发生写入的结果不存入（按发起时的计数判断）
+    - 只在主线程读写（结果经 on_main_thread 回到主线程后才存入），不加锁
+    """
+
+    def __init__(self, bus: ChangeBus = change_bus, table: str = HISTORY_TABLE, max_entries: int = None):
+        self.bus = bus
+        self.table = table
+        self.max_entries = max(max_entries or global_config.db_search_cache_entries, 0)
+        self._entries = OrderedDict()
+        self._version = bus.version(table)
+
+    @property
+    def version(self) -> int:
+        """查询发起前取当前计数，结果返回后连同结果一起传给 put"""
+        return self.bus.version(self.table)
+
+    def _check_version(self):
+        if self._version != self.version:
+            self._entries.clear()
+            self._version = self.version
+
+    def get(self, key: Hashable) -> Optional[object]:
+        self._check_version()
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: object, version: int):
+        """存入查询结果；version 为查询发起时的计数，与当前不一致说明结果可能已过期，不存入"""
+        self._check_version()
+        if version != self._version or value is None or not self.max_entries:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+# 全局查询结果缓存（历史记录窗口关闭后保留，再次打开或回退到之前的关键词时直接命中）
+history_query_cache = QueryResultCache()
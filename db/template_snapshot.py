@@ -0,0 +1,118 @@
+import hashlib
+import sqlite3
+from datetime import datetime
+from db.history_compression import PREVIEW_CHARS
+
+# 历史记录引用的模板快照表（按内容哈希去重，多条历史共用同一份模板文本）
+SNAPSHOT_TABLE = "template_snapshots"
+# 历史记录完整视图：模板文本按快照还原、大文本解压，读取完整记录/预览均经此视图
+HISTORY_VIEW = "history_full"
+
+
+def content_hash(text) -> str:
+    """模板内容哈希（SHA-256十六进制），作为快照去重键"""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def register_snapshot_functions(conn: sqlite3.Connection):
+    """注册模板哈希SQL函数（模板表触发器与存量迁移依赖，所有会写库的连接都必须注册）"""
+    conn.create_function("template_hash", 1, content_hash, deterministic=True)
+
+
+def resolved_template_sql(row: str) -> str:
+    """触发器中还原某行（new/old）完整模板文本的SQL表达式：有快照取快照内容，否则为存量行自身的文本"""
+    return (f"COALESCE((SELECT content FROM {SNAPSHOT_TABLE} WHERE id = {row}.template_snapshot_id), "
+            f"{row}.template_content)")
+
+
+def ensure_template_snapshots(conn: sqlite3.Connection):
+    """创建快照表、history/templates 的引用列与索引、模板哈希触发器（已存在时跳过，由迁移在事务中调用）"""
+    register_snapshot_functions(conn)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {SNAPSHOT_TABLE} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_hash TEXT UNIQUE NOT NULL,
+        content TEXT NOT NULL,
+        create_time TEXT NOT NULL
+    )
+    """)
+    history_columns = {row[1] for row in cursor.execute("PRAGMA table_info(history)")}
+    if "template_snapshot_id" not in history_columns:
+        cursor.execute(f"ALTER TABLE history ADD COLUMN template_snapshot_id INTEGER REFERENCES {SNAPSHOT_TABLE}(id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_template_snapshot ON history (template_snapshot_id)")
+
+    # 模板表记录内容哈希，按类型筛选历史时走 (template_type, content_hash) 索引与快照表关联
+    template_columns = {row[1] for row in cursor.execute("PRAGMA table_info(templates)")}
+    if "content_hash" not in template_columns:
+        cursor.execute("ALTER TABLE templates ADD COLUMN content_hash TEXT")
+    cursor.execute("UPDATE templates SET content_hash = template_hash(content) WHERE content_hash IS NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_templates_type_hash ON templates (template_type, content_hash)")
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS templates_hash_insert AFTER INSERT ON templates BEGIN
+        UPDATE templates SET content_hash = template_hash(new.content) WHERE id = new.id;
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS templates_hash_update AFTER UPDATE OF content ON templates BEGIN
+        UPDATE templates SET content_hash = template_hash(new.content) WHERE id = new.id;
+    END
+    """)
+
+
+def create_history_view(conn: sqlite3.Connection):
+    """
+    按最新定义重建完整视图（每次启动执行）：大文本经 history_text() 解压，预览优先取写入时保存的未压缩预览列
+    依赖快照、压缩两个迁移添加的列
+    """
+    conn.execute(f"DROP VIEW IF EXISTS {HISTORY_VIEW}")
+    conn.execute(f"""
+    CREATE VIEW {HISTORY_VIEW} AS
+    SELECT h.id, h.create_time, COALESCE(s.content, h.template_content) AS template_content,
+           history_text(h.work_content) AS work_content, history_text(h.report_content) AS report_content,
+           COALESCE(h.work_preview, substr(h.work_content, 1, {PREVIEW_CHARS})) AS work_preview,
+           COALESCE(h.report_preview, substr(h.report_content, 1, {PREVIEW_CHARS})) AS report_preview,
+           h.template_snapshot_id
+    FROM history h LEFT JOIN {SNAPSHOT_TABLE} s ON s.id = h.template_snapshot_id
+    """)
+
+
+def get_snapshot_id(conn: sqlite3.Connection, template_content: str) -> int:
+    """取模板内容对应的快照ID，不存在时新建（需在写连接的事务中调用）"""
+    digest = content_hash(template_content)
+    conn.execute(f"INSERT OR IGNORE INTO {SNAPSHOT_TABLE} (content_hash, content, create_time) VALUES (?, ?, ?)",
+                 (digest, template_content or "", datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    return conn.execute(f"SELECT id FROM {SNAPSHOT_TABLE} WHERE content_hash = ?", (digest,)).fetchone()[0]
+
+
+def has_unmigrated_templates(conn: sqlite3.Connection) -> bool:
+    """是否还有未转为快照引用的存量历史记录"""
+    return conn.execute("SELECT 1 FROM history WHERE template_snapshot_id IS NULL LIMIT 1").fetchone() is not None
+
+
+def migrate_history_templates_batch(conn: sqlite3.Connection, batch_size: int) -> int:
+    """
+    把一批存量历史记录的模板文本转为快照引用（需在写连接的事务中调用），返回本批条数
+    已迁移记录的 template_content 置空；全文索引内容不变（update触发器只在还原后的文本变化时重建索引）
+    """
+    create_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    pending_ids = "SELECT id FROM history WHERE template_snapshot_id IS NULL ORDER BY id LIMIT ?"
+    conn.execute(f"""
+    INSERT OR IGNORE INTO {SNAPSHOT_TABLE} (content_hash, content, create_time)
+    SELECT template_hash(template_content), template_content, ? FROM history
+    WHERE id IN ({pending_ids})
+    """, (create_time, batch_size))
+    cursor = conn.execute(f"""
+    UPDATE history
+    SET template_snapshot_id = (SELECT id FROM {SNAPSHOT_TABLE}
+                                WHERE content_hash = template_hash(history.template_content)),
+        template_content = ''
+    WHERE id IN ({pending_ids})
+    """, (batch_size,))
+    return cursor.rowcount
+
+
+def finish_template_migration(conn: sqlite3.Connection, total: int):
+    """存量迁移完成后的汇总日志"""
+    snapshots = conn.execute(f"SELECT COUNT(*) FROM {SNAPSHOT_TABLE}").fetchone()[0]
+    print(f"📦 历史记录模板去重完成：迁移{total}条，共{snapshots}份模板快照（执行VACUUM后释放空间）")
@@ -1,14 +1,20 @@
 import sys
 import os
-import qdarkstyle  # 可选，若安装了可开启，增强科技风
 # 统一导入需要的Qt类，按模块划分避免混乱
 from PySide6.QtWidgets import QApplication, QMessageBox, QStyleFactory
-from PySide6.QtGui import QFont
+from PySide6.QtCore import QTimer
 from ui.main_window import DailyReportGenerator
+from core.ai_client import ArkAIClient
+from core.engine import generation_engine
 from config.app_config import global_config
 from db.db_init import init_database
+from db.db_worker import db_worker
+from db.connection import connection_manager
 from config.style_config import GLOBAL_FONT  # 从正确的样式文件导入全局字体
 
+# 窗口显示后延迟多久开始后台预热（毫秒），让出首帧绘制
+WARM_UP_DELAY_MS = 100
+
 if __name__ == "__main__":
     try:
         # 1. 先实例化QApplication（Qt GUI资源初始化，必须是第一个Qt相关操作）
@@ -36,13 +42,20 @@ if __name__ == "__main__":
             # 可选：自动保存环境变量的key到本地配置文件，避免下次启动再读取环境变量
             # global_config.save_config()
 
-        # 可选：开启qdarkstyle深色样式，和科技风更搭（需先安装：pip install qdarkstyle）
-        # app.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyside6'))
         app.setStyle(QStyleFactory.create('Fusion'))
 
+        # 4. 注册退出清理
+        app.aboutToQuit.connect(generation_engine.shutdown)
+        app.aboutToQuit.connect(ArkAIClient().close)
+        # 退出前提交数据库线程中尚未落库的写入
+        app.aboutToQuit.connect(db_worker.shutdown)
+        app.aboutToQuit.connect(connection_manager.close)
+
         # 5. 实例化主窗口并显示
         window = DailyReportGenerator()
         window.show()
+        # 窗口首帧绘制后再后台加载方舟SDK并预热长连接（首次生成省去TLS握手，不拖慢窗口显示）
+        QTimer.singleShot(WARM_UP_DELAY_MS, ArkAIClient().warm_up)
         # 6. 启动应用循环
         sys.exit(app.exec())
 
@@ -0,0 +1,65 @@
+"""
+测试公共夹具：全部测试使用临时数据库（不读写项目目录下的 daily_paper.db / generation_cache.db），界面测试使用 offscreen 平台
+运行（项目根目录）：python -m pytest -q tests
+"""
+import os
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+from config.app_config import global_config
+from db.connection import connection_manager
+
+_TEST_DIR = tempfile.mkdtemp(prefix="daily_paper_test_")
+# 在任何连接打开之前把全局连接指向临时库
+connection_manager.db_path = os.path.join(_TEST_DIR, "daily_paper.db")
+global_config.cache_enabled = False
+
+
+@pytest.fixture(scope="session")
+def database():
+    """初始化临时库（结构迁移 + 默认模板），返回全局连接管理器"""
+    from db.db_init import init_database
+    init_database()
+    yield connection_manager
+    # 局部导入，避免循环导入
+    from db.db_worker import db_worker
+    db_worker.shutdown()
+    connection_manager.close()
+
+
+@pytest.fixture
+def history_db(tmp_path):
+    """独立的临时库（结构迁移完成、后台数据迁移与全文索引回填尚未执行）与指向它的历史记录DAO"""
+    # 局部导入，避免循环导入
+    from db.connection import ConnectionManager
+    from db.history_dao import HistoryDAO
+    from db.migrations import apply_schema_migrations
+    manager = ConnectionManager(str(tmp_path / "history.db"))
+    apply_schema_migrations(manager)
+    dao = HistoryDAO()
+    dao.db = manager
+    yield manager, dao
+    manager.close()
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture
+def mock_ark(monkeypatch):
+    """只修改内存中的配置指向本地模拟方舟服务"""
+    # 局部导入，避免循环导入
+    from benchmarks.mock_ark_server import MockArkConfig, MockArkServer
+    from core.ai_client import ArkAIClient
+    with MockArkServer(MockArkConfig(ttft_ms=20, tokens_per_sec=400, chunk_chars=4, total_chars=160)) as server:
+        monkeypatch.setattr(global_config, "ark_api_key", "mock-test-key")
+        monkeypatch.setattr(global_config, "ark_base_url", server.base_url)
+        monkeypatch.setattr(global_config, "hedge_enabled", False)
+        yield server
+    ArkAIClient().close()
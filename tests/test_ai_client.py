@@ -0,0 +1,28 @@
+from config.app_config import global_config
+from core.ai_client import ArkAIClient
+
+
+def test_rebuild_keeps_pool_open_for_in_flight_stream(mock_ark, monkeypatch):
+    ark = ArkAIClient()
+    stream = ark.generate_report_stream("模板", "工作内容")
+    parts = [next(stream)]
+    old_http_client = ark._http_client
+
+    monkeypatch.setattr(global_config, "http_pool_size", global_config.http_pool_size + 1)
+    ark.get_client()  # 保存配置后重建：流还没读完
+    assert ark._http_client is not old_http_client
+    assert not old_http_client.is_closed
+
+    parts.extend(stream)
+    assert "".join(parts) == mock_ark.config.report_text()
+    assert old_http_client.is_closed  # 最后一个借用归还后关闭旧连接池
+    assert not ark._http_client.is_closed
+
+
+def test_rebuild_closes_idle_pool_immediately(mock_ark, monkeypatch):
+    ark = ArkAIClient()
+    ark.get_client()
+    old_http_client = ark._http_client
+    monkeypatch.setattr(global_config, "http_pool_size", global_config.http_pool_size + 1)
+    ark.get_client()
+    assert old_http_client.is_closed
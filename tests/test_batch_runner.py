@@ -0,0 +1,101 @@
+import json
+import threading
+import pytest
+from core.ai_client import ArkAIClient
+from core.batch_runner import BatchRecord, BatchRunner
+
+TEMPLATE = "### 今日工作\n### 明日计划"
+
+
+def _task(day: int, **extra) -> dict:
+    task = {"template_content": TEMPLATE, "work_content": f"批量任务{day}", "date": f"2024-06-{day:02d}"}
+    task.update(extra)
+    return task
+
+
+def _write_jsonl(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write((line if isinstance(line, str) else json.dumps(line, ensure_ascii=False)) + "\n")
+
+
+def _read_jsonl(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def upstream_calls(monkeypatch):
+    """统计同时进行中的上游请求数（借用共享客户端期间即为一次进行中的请求）"""
+    state = {"current": 0, "max": 0}
+    lock = threading.Lock()
+    acquire, release = ArkAIClient.acquire, ArkAIClient.release
+
+    def counting_acquire(self):
+        client = acquire(self)
+        with lock:
+            state["current"] += 1
+            state["max"] = max(state["max"], state["current"])
+        return client
+
+    def counting_release(self, client):
+        with lock:
+            state["current"] -= 1
+        release(self, client)
+
+    monkeypatch.setattr(ArkAIClient, "warm_up", lambda self: None)  # 预热也借用客户端，不计入生成请求
+    monkeypatch.setattr(ArkAIClient, "acquire", counting_acquire)
+    monkeypatch.setattr(ArkAIClient, "release", counting_release)
+    return state
+
+
+def test_invalid_values_are_rejected():
+    with pytest.raises(ValueError):
+        BatchRecord(1, [1, 2])
+    with pytest.raises(ValueError):
+        BatchRecord(1, {"work_content": "x", "date": 20260101})
+    with pytest.raises(ValueError):
+        BatchRecord(1, {"work_content": "x", "date": "2024-13-01"})
+    record = BatchRecord(1, {"work_content": 123, "author": 7, "date": "2024-06-01"})
+    assert record.work_content == "123" and record.author == "7"
+    assert record.create_time() == "2024-06-01 00:00:00"
+
+
+def test_batch_bounded_concurrency_and_history(database, mock_ark, upstream_calls, tmp_path):
+    input_path, output_path = tmp_path / "tasks.jsonl", tmp_path / "tasks.out.jsonl"
+    _write_jsonl(input_path, [_task(day) for day in range(1, 7)] + [
+        "不是JSON",
+        "[1, 2]",
+        {"work_content": "x", "date": 20260101},
+        {"template_content": TEMPLATE, "date": "2024-06-30"},
+    ])
+
+    summary = BatchRunner(str(input_path), str(output_path), concurrency=2).run()
+    assert (summary["total"], summary["ok"], summary["failed"], summary["invalid"]) == (6, 6, 0, 4)
+    assert 1 < upstream_calls["max"] <= 2
+
+    results = _read_jsonl(output_path)
+    assert sorted(item["line"] for item in results) == list(range(1, 7))
+    assert all(item["status"] == "ok" and item["history_id"] > 0 for item in results)
+    with database.read() as conn:
+        rows = conn.execute(f"SELECT id, create_time, report_content FROM history_full WHERE id IN "
+                            f"({', '.join(str(item['history_id']) for item in results)})").fetchall()
+    assert sorted(row["create_time"] for row in rows) == [f"2024-06-{day:02d} 00:00:00" for day in range(1, 7)]
+    assert all(row["report_content"] == mock_ark.config.report_text().strip() for row in rows)
+
+
+def test_batch_resume_skips_finished_lines(database, mock_ark, tmp_path):
+    input_path, output_path = tmp_path / "tasks.jsonl", tmp_path / "tasks.out.jsonl"
+    _write_jsonl(input_path, [_task(day, author="续跑") for day in range(1, 4)])
+    first = BatchRunner(str(input_path), str(output_path), concurrency=2).run()
+    assert first["ok"] == 3
+
+    # 追加一行失败记录（上次中断/失败的任务不算完成）和一条新任务
+    with open(output_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"key": BatchRecord(4, _task(4, author="续跑")).key, "status": "error"}) + "\n")
+        f.write('{"key": "半行')
+    _write_jsonl(input_path, [_task(day, author="续跑") for day in range(1, 5)])
+    completed = mock_ark.stats["completed"]
+    second = BatchRunner(str(input_path), str(output_path), concurrency=2).run()
+    assert (second["total"], second["skipped"], second["ok"]) == (4, 3, 1)
+    assert mock_ark.stats["completed"] == completed + 1
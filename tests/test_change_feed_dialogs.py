@@ -0,0 +1,73 @@
+import time
+from db.change_events import HISTORY_TABLE, TEMPLATES_TABLE, ChangeEvent
+from db.history_dao import HistoryDAO
+from ui.components.change_feed import change_feed
+from ui.components.history_table import HistoryTableModel
+from ui.template_window import TemplateWindow
+
+
+def _record_calls(monkeypatch, cls, name):
+    """在窗口创建前替换槽函数，记录收到变更通知的实例"""
+    calls = []
+    monkeypatch.setattr(cls, name, lambda self, event: calls.append(self))
+    return calls
+
+
+def test_closed_history_window_stops_receiving_changes(qapp, database, monkeypatch):
+    # 局部导入：HistoryWindow 导入时需要 QApplication
+    from ui.history_window import HistoryWindow
+    calls = _record_calls(monkeypatch, HistoryTableModel, "apply_change")
+    windows = []
+    for _ in range(3):
+        window = HistoryWindow()
+        window.reject()
+        windows.append(window)
+    open_window = HistoryWindow()
+
+    change_feed.history_changed.emit(ChangeEvent(HISTORY_TABLE, 1, inserted=[1]))
+
+    assert calls == [open_window.history_model]
+    open_window.reject()
+    change_feed.history_changed.emit(ChangeEvent(HISTORY_TABLE, 2, deleted=[1]))
+    assert len(calls) == 1
+
+
+def test_closed_template_window_stops_receiving_changes(qapp, database, monkeypatch):
+    calls = _record_calls(monkeypatch, TemplateWindow, "on_templates_changed")
+    closed_window = TemplateWindow()
+    closed_window.reject()
+    open_window = TemplateWindow()
+
+    change_feed.templates_changed.emit(ChangeEvent(TEMPLATES_TABLE, 1, updated=[1]))
+
+    assert calls == [open_window]
+    open_window.reject()
+    closed_window.reject()  # 重复关闭不应重复退订报错
+
+
+def _wait_until(qapp, condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        qapp.processEvents()
+        time.sleep(0.01)
+
+
+def test_export_waits_for_count_of_current_query(qapp, database):
+    from ui.history_window import HistoryWindow
+    HistoryDAO().add_history("### 今日工作", "导出按钮测试", "导出按钮测试日报")
+    window = HistoryWindow()
+    try:
+        # 总数统计返回前导出按钮不可用
+        assert window.total_count is None and not window.export_btn.isEnabled()
+        _wait_until(qapp, lambda: window.total_count is not None)
+        assert window.total_count > 0 and window.export_btn.isEnabled()
+
+        # 换条件后旧总数立即作废，不能按上一次的结果导出
+        window.search_input.setText("不存在的关键词")
+        window.on_search()
+        assert window.total_count is None and not window.export_btn.isEnabled()
+        _wait_until(qapp, lambda: window.total_count is not None)
+        assert window.total_count == 0 and not window.export_btn.isEnabled()
+    finally:
+        window.reject()
@@ -0,0 +1,70 @@
+import threading
+import pytest
+import db.history_dao
+from db.db_worker import DBWorker
+from db.history_dao import HistoryDAO
+
+TEMPLATE = "### 今日工作\n### 明日计划"
+
+
+@pytest.fixture
+def worker(history_db, monkeypatch):
+    """指向独立临时库的数据库线程（刷新间隔足够长，只有凑满批量、后续任务或退出才会提交）"""
+    manager, _ = history_db
+    monkeypatch.setattr(db.history_dao, "connection_manager", manager)
+    batches = []
+    add_histories = HistoryDAO.add_histories
+
+    def spy(self, records):
+        batches.append(len(records))
+        return add_histories(self, records)
+
+    monkeypatch.setattr(HistoryDAO, "add_histories", spy)
+    worker = DBWorker(batch_size=3, flush_interval_ms=60_000)
+    worker.batches = batches
+    yield worker
+    worker.shutdown()
+
+
+def _hold(worker) -> threading.Event:
+    """让数据库线程卡在一个任务上，使后续提交全部排队"""
+    release = threading.Event()
+    worker.submit(lambda session: release.wait(5))
+    return release
+
+
+def _record(n: int) -> tuple:
+    return TEMPLATE, f"工作{n}", f"日报{n}", f"2024-05-01 18:00:0{n}"
+
+
+def test_queued_inserts_commit_in_batches(worker):
+    release = _hold(worker)
+    futures = [worker.add_history(*_record(n)) for n in range(5)]
+    release.set()
+    # 凑满3条立即提交；剩余2条等到下一个任务
+    assert [f.result(5) for f in futures[:3]] and worker.batches == [3]
+    assert not futures[3].done()
+    assert worker.flush(5) and worker.batches == [3, 2]
+    ids = [f.result(0) for f in futures]
+    assert len(set(ids)) == 5 and min(ids) > 0
+
+
+def test_read_after_queued_writes_sees_them(worker):
+    release = _hold(worker)
+    futures = [worker.add_history(*_record(n)) for n in range(2)]
+    count = worker.history.count_history()
+    release.set()
+    # 读任务执行前先提交排队的写入
+    assert count.result(5) == 2
+    assert all(f.done() for f in futures) and worker.batches == [2]
+
+
+def test_shutdown_drains_pending_writes(worker, history_db):
+    _, dao = history_db
+    release = _hold(worker)
+    futures = [worker.add_history(*_record(n)) for n in range(2)]
+    release.set()
+    worker.shutdown()
+    assert worker.batches == [2]
+    assert sorted(f.result(0) for f in futures) == sorted(h["id"] for h in dao.get_all_history())
+    assert worker.add_history(*_record(9)).exception(0) is not None
@@ -0,0 +1,45 @@
+from PySide6.QtCore import QEventLoop, QTimer
+from core.generator import GenerateReportThread
+from ui.components.stream_renderer import LOG_MAX_BLOCKS
+
+
+def _run_thread(thread: GenerateReportThread, on_text=None):
+    loop = QEventLoop()
+    thread.finish_signal.connect(loop.quit)
+    if on_text is not None:
+        thread.text_signal.connect(on_text)
+    QTimer.singleShot(20000, loop.quit)  # 兜底，避免异常时卡死
+    thread.start()
+    loop.exec()
+    thread.wait(5000)
+
+
+def test_report_text_is_full_engine_result(qapp, mock_ark):
+    mock_ark.config.total_chars = 3000
+    thread = GenerateReportThread("模板", "超长日报", force_regenerate=True)
+    _run_thread(thread)
+    assert thread.report_text == mock_ark.config.report_text()
+
+
+def test_report_text_empty_when_canceled(qapp, mock_ark):
+    mock_ark.config.stall_after_chunks, mock_ark.config.stall_ms = 3, 10000
+    thread = GenerateReportThread("模板", "中断的日报", force_regenerate=True)
+    shown = []
+    _run_thread(thread, on_text=lambda text: (shown.append(text), thread.cancel()))
+    assert shown and thread.is_canceled()
+    assert thread.report_text == ""
+
+
+def test_main_window_only_bounds_log(qapp, database):
+    from ui.main_window import DailyReportGenerator
+    window = DailyReportGenerator()
+    try:
+        assert window.output_editor.maximumBlockCount() == 0
+        assert window.log_editor.maximumBlockCount() == LOG_MAX_BLOCKS
+        lines = LOG_MAX_BLOCKS * 5
+        window.output_renderer.append("\n".join(f"第{i}行" for i in range(lines)))
+        window.flush_render()
+        assert window.output_editor.blockCount() == lines
+        assert window.output_editor.toPlainText().startswith("第0行")
+    finally:
+        window.deleteLater()
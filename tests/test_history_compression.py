@@ -0,0 +1,97 @@
+import sqlite3
+import pytest
+from config.app_config import global_config
+from db.connection import ConnectionManager
+from db.history_compression import decode_text, encode_text, recompress_history, save_dictionary, train_dictionary
+from db.migrations import apply_schema_migrations
+
+REPORT = "### 今日工作\n完成登录模块联调，修复接口超时问题。\n### 明日计划\n压测与上线准备。\n" * 20
+
+
+@pytest.fixture
+def compression_on(monkeypatch):
+    monkeypatch.setattr(global_config, "db_compress_enabled", True)
+    monkeypatch.setattr(global_config, "db_compress_min_bytes", 64)
+
+
+def _new_db(tmp_path, name: str) -> ConnectionManager:
+    manager = ConnectionManager(str(tmp_path / name))
+    apply_schema_migrations(manager)
+    return manager
+
+
+def _insert(manager: ConnectionManager, work: str, report: str) -> int:
+    with manager.write() as conn:
+        work_value, work_preview = encode_text(conn, work)
+        report_value, report_preview = encode_text(conn, report)
+        return conn.execute("""
+        INSERT INTO history (create_time, template_content, work_content, report_content, work_preview, report_preview)
+        VALUES ('2024-05-01 10:00:00', '', ?, ?, ?, ?)
+        """, (work_value, report_value, work_preview, report_preview)).lastrowid
+
+
+def _read(manager: ConnectionManager, history_id: int) -> tuple:
+    with manager.read() as conn:
+        row = conn.execute("SELECT work_content, report_content FROM history_full WHERE id = ?", (history_id,)).fetchone()
+    return row["work_content"], row["report_content"]
+
+
+def _stored(manager: ConnectionManager, history_id: int):
+    with manager.read() as conn:
+        return conn.execute("SELECT report_content FROM history WHERE id = ?", (history_id,)).fetchone()[0]
+
+
+def test_compression_is_off_by_default(tmp_path):
+    manager = _new_db(tmp_path, "plain.db")
+    history_id = _insert(manager, "短内容", REPORT)
+    assert _stored(manager, history_id) == REPORT
+    manager.close()
+
+
+def test_round_trip_with_and_without_dictionary(tmp_path, compression_on):
+    manager = _new_db(tmp_path, "zip.db")
+    plain_id = _insert(manager, "短内容", REPORT)
+    assert isinstance(_stored(manager, plain_id), bytes)
+    with manager.write() as conn:
+        save_dictionary(conn, train_dictionary([REPORT, REPORT + "补充"]), 2)
+    dict_id = _insert(manager, REPORT, REPORT + "附加说明")
+    assert _read(manager, plain_id) == ("短内容", REPORT)
+    assert _read(manager, dict_id) == (REPORT, REPORT + "附加说明")
+    manager.close()
+
+
+def test_dictionaries_are_per_database(tmp_path, compression_on):
+    """两个库的字典ID相同、内容不同：各自按本库的字典解压（迁移演练/--db 指定的库）"""
+    first, second = _new_db(tmp_path, "first.db"), _new_db(tmp_path, "second.db")
+    with first.write() as conn:
+        save_dictionary(conn, train_dictionary([REPORT, REPORT]), 2)
+    other_report = "【周报】\n本周完成需求评审与排期。\n下周跟进测试反馈。\n" * 20
+    with second.write() as conn:
+        save_dictionary(conn, train_dictionary([other_report, other_report]), 2)
+    first_id = _insert(first, "甲", REPORT)
+    second_id = _insert(second, "乙", other_report)
+
+    # 不经过缓存：用全新连接读取同一个库
+    reopened = ConnectionManager(second.db_path)
+    assert _read(first, first_id)[1] == REPORT
+    assert _read(reopened, second_id)[1] == other_report
+    with sqlite3.connect(second.db_path) as conn:
+        assert decode_text(conn.execute("SELECT report_content FROM history").fetchone()[0], conn) == other_report
+    for manager in (first, second, reopened):
+        manager.close()
+
+
+def test_decompress_restores_plain_text(tmp_path, compression_on, monkeypatch):
+    manager = _new_db(tmp_path, "restore.db")
+    with manager.write() as conn:
+        save_dictionary(conn, train_dictionary([REPORT, REPORT]), 2)
+    history_id = _insert(manager, REPORT, REPORT)
+    assert isinstance(_stored(manager, history_id), bytes)
+
+    monkeypatch.setattr(global_config, "db_compress_enabled", False)
+    stats = recompress_history(manager=manager)
+
+    assert stats["rows"] == 1
+    assert _stored(manager, history_id) == REPORT
+    assert _read(manager, history_id) == (REPORT, REPORT)
+    manager.close()
@@ -0,0 +1,138 @@
+import csv
+import json
+import os
+import pytest
+from openpyxl import load_workbook
+import db.history_dao
+from db.migrations import JobRunner
+from db.history_transfer import TRANSFER_FIELDS
+from utils.excel_exporter import HISTORY_HEADERS, HISTORY_SHEET_TITLE, write_histories_to_excel
+from utils.history_exporters import MARKDOWN_MANIFEST, HistoryExporter, export_histories
+
+TEMPLATE = "### 今日工作\n### 明日计划"
+KEYWORD = "接口联调"
+
+
+@pytest.fixture
+def export_db(history_db, monkeypatch):
+    """指向独立临时库的导出环境：3条命中关键词（分布在两天）、1条不命中"""
+    manager, dao = history_db
+    monkeypatch.setattr(db.history_dao, "connection_manager", manager)
+    JobRunner(manager).run()
+    ids = dao.add_histories([
+        (TEMPLATE, "上午接口联调", "完成接口联调，修复2个问题", "2024-05-01 10:00:00"),
+        (TEMPLATE, "下午接口联调", "接口联调通过，含逗号、\"引号\"\n和换行", "2024-05-01 18:00:00"),
+        (TEMPLATE, "整理周报", "完成周报", "2024-05-02 09:00:00"),
+        (TEMPLATE, "继续接口联调", "接口联调收尾", "2024-05-03 18:00:00"),
+    ])
+    matched = [ids[0], ids[1], ids[3]]
+    yield dao, {history_id: dao.get_history_by_id(history_id) for history_id in matched}
+
+
+def _by_id(rows) -> dict:
+    return {int(row["id"]): {field: str(row[field]) for field in TRANSFER_FIELDS} for row in rows}
+
+
+def _expected(histories: dict) -> dict:
+    return _by_id(histories.values())
+
+
+def test_exporter_base_is_abstract():
+    with pytest.raises(TypeError):
+        HistoryExporter()
+
+
+def test_csv_export(export_db, tmp_path):
+    _, matched = export_db
+    path = str(tmp_path / "result.csv")
+    assert export_histories("csv", path, KEYWORD)["records"] == 3
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        assert tuple(reader.fieldnames) == TRANSFER_FIELDS
+        assert _by_id(reader) == _expected(matched)
+
+
+def test_jsonl_export(export_db, tmp_path):
+    _, matched = export_db
+    path = str(tmp_path / "result.jsonl")
+    assert export_histories("jsonl", path, KEYWORD)["records"] == 3
+    with open(path, encoding="utf-8") as f:
+        assert _by_id(json.loads(line) for line in f) == _expected(matched)
+
+
+def _sheet_rows(sheet) -> list:
+    return [tuple(row) for row in sheet.iter_rows(values_only=True)]
+
+
+def test_excel_export(export_db, tmp_path):
+    _, matched = export_db
+    path = str(tmp_path / "result.xlsx")
+    assert export_histories("xlsx", path, KEYWORD)["records"] == 3
+    workbook = load_workbook(path, read_only=True)
+    try:
+        assert workbook.sheetnames == [HISTORY_SHEET_TITLE]
+        header, *rows = _sheet_rows(workbook[HISTORY_SHEET_TITLE])
+    finally:
+        workbook.close()
+    assert header == HISTORY_HEADERS
+    assert [row[0] for row in rows] == [1, 2, 3]
+    assert _by_id(dict(zip(("id",) + TRANSFER_FIELDS[1:], row[1:])) for row in rows) == _expected(matched)
+
+
+def test_excel_splits_sheets(tmp_path):
+    histories = [{"id": n, "create_time": f"2024-05-0{n} 18:00:00", "template_content": TEMPLATE,
+                  "work_content": f"工作{n}", "report_content": None if n == 5 else f"日报{n}"} for n in range(1, 6)]
+    path = str(tmp_path / "split.xlsx")
+    assert write_histories_to_excel(iter(histories), path, rows_per_sheet=2) == 5
+    assert not os.path.exists(path + ".part")
+    workbook = load_workbook(path, read_only=True)
+    try:
+        assert workbook.sheetnames == [HISTORY_SHEET_TITLE, f"{HISTORY_SHEET_TITLE}_2", f"{HISTORY_SHEET_TITLE}_3"]
+        sheets = [_sheet_rows(sheet) for sheet in workbook.worksheets]
+    finally:
+        workbook.close()
+    # 每个工作表都有表头，序号跨工作表连续，空值显示为「无」
+    assert all(rows[0] == HISTORY_HEADERS for rows in sheets)
+    assert [len(rows) - 1 for rows in sheets] == [2, 2, 1]
+    data = [row for rows in sheets for row in rows[1:]]
+    assert [(row[0], row[1]) for row in data] == [(n, n) for n in range(1, 6)]
+    assert data[-1][-1] == "无"
+
+
+def _read(folder, relative_path: str) -> str:
+    with open(os.path.join(folder, *relative_path.split("/")), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_markdown_sync_rewrites_only_changed_days(export_db, tmp_path):
+    dao, matched = export_db
+    folder = str(tmp_path / "vault")
+    first, second = "2024-05/2024-05-01.md", "2024-05/2024-05-03.md"
+    stats = export_histories("markdown", folder, KEYWORD)
+    assert (stats["records"], stats["files_written"], stats["files_unchanged"]) == (3, 2, 0)
+    with open(os.path.join(folder, MARKDOWN_MANIFEST), encoding="utf-8") as f:
+        assert set(json.load(f)["files"]) == {first, second}
+    content = _read(folder, first)
+    # 当天记录按生成时间正序
+    assert content.startswith("# 2024-05-01 日报记录（2条）")
+    assert content.index("上午接口联调") < content.index("下午接口联调")
+    untouched = os.path.join(folder, "2024-05", "2024-05-03.md")
+    os.utime(untouched, (0, 0))
+    keep = os.path.join(folder, "notes.md")  # 目录中用户自己的文件不受影响
+    with open(keep, "w", encoding="utf-8") as f:
+        f.write("笔记")
+
+    # 只有新增记录的那一天重写
+    dao.add_history(TEMPLATE, "晚上接口联调", "接口联调补充", create_time="2024-05-01 21:00:00")
+    stats = export_histories("markdown", folder, KEYWORD)
+    assert (stats["files_written"], stats["files_unchanged"], stats["files_deleted"]) == (1, 1, 0)
+    assert "晚上接口联调" in _read(folder, first)
+    assert os.path.getmtime(untouched) == 0
+
+    # 某天不再有命中的记录：删除对应文件，目录中的其他文件保留
+    for history_id, history in matched.items():
+        if history["create_time"].startswith("2024-05-03"):
+            assert dao.delete_history(history_id)
+    stats = export_histories("markdown", folder, KEYWORD)
+    assert (stats["files_written"], stats["files_unchanged"], stats["files_deleted"]) == (0, 1, 1)
+    assert not os.path.exists(untouched) and os.path.exists(keep)
@@ -0,0 +1,53 @@
+from db.history_search import build_match_query
+from db.migrations import JobRunner
+
+TEMPLATE = "### 今日工作\n### 明日计划"
+
+
+def _page_all(dao, keyword: str = "", page_size: int = 4) -> list:
+    """按游标翻到最后一页，返回全部记录ID（按返回顺序）"""
+    ids, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = dao.get_history_page(keyword, cursor=cursor, page_size=page_size)
+        ids.extend(row["id"] for row in rows)
+        pages += 1
+        assert pages < 100, "游标没有推进"
+        if cursor is None:
+            return ids
+
+
+def test_time_pages_with_equal_timestamps(history_db):
+    manager, dao = history_db
+    # 5个时间点各5条：同一时间点内只能靠ID区分先后
+    ids = dao.add_histories([(TEMPLATE, f"工作{n}", f"日报{n}", f"2024-05-0{n % 5 + 1} 18:00:00")
+                             for n in range(25)])
+    paged = _page_all(dao)
+    assert len(paged) == len(set(paged)) == 25
+    with manager.read() as conn:
+        expected = [row[0] for row in conn.execute(
+            "SELECT id FROM history ORDER BY create_time DESC, id DESC")]
+    assert paged == expected and sorted(paged) == sorted(ids)
+    # 索引回填完成前的关键字搜索走LIKE，同样按时间游标翻页
+    assert _page_all(dao, "工作") == expected
+
+
+def test_rank_pages_with_tied_scores(history_db):
+    manager, dao = history_db
+    JobRunner(manager).run()
+    # 13条完全相同的内容相关度相等；另有得分不同的命中记录与不命中的记录
+    tied = dao.add_histories([(TEMPLATE, "接口联调", "接口联调完成", "2024-05-01 18:00:00")] * 13)
+    others = dao.add_histories([
+        (TEMPLATE, "接口联调，接口文档更新，接口评审", "日报", "2024-05-02 18:00:00"),
+        (TEMPLATE, "上午会议，下午接口联调，晚上整理材料和周报", "日报", "2024-05-03 18:00:00"),
+    ])
+    dao.add_history(TEMPLATE, "整理周报", "日报", create_time="2024-05-04 18:00:00")
+
+    first, cursor = dao.get_history_page("接口联调", page_size=4)
+    assert cursor[0] == "rank" and "rank" in first[0]
+    paged = _page_all(dao, "接口联调")
+    assert len(paged) == len(set(paged)) == dao.count_history("接口联调") == 15
+    assert set(paged) == set(tied + others)
+    with manager.read() as conn:
+        ranks = {row[0]: row[1] for row in conn.execute(
+            "SELECT rowid, rank FROM history_fts WHERE history_fts MATCH ?", (build_match_query("接口联调"),))}
+    assert [(ranks[i], i) for i in paged] == sorted((ranks[i], i) for i in paged)
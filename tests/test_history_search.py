@@ -0,0 +1,97 @@
+from db.connection import ConnectionManager
+from db.history_dao import HistoryDAO
+from db.history_search import (FTS_TABLE, backfill_history_fts_batch, build_match_query, is_index_ready,
+                               segment_cjk, suspend_fts_indexing)
+from db.migrations import JobRunner
+
+TEMPLATE = "### 今日工作\n### 明日计划"
+
+
+def _add(dao: HistoryDAO, work: str, day: int = 1) -> int:
+    return dao.add_history(TEMPLATE, work, f"日报：{work}", create_time=f"2024-05-{day:02d} 18:00:00")
+
+
+def _fts_ids(manager: ConnectionManager, keyword: str) -> list:
+    with manager.read() as conn:
+        return [row[0] for row in conn.execute(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? "
+                                               f"ORDER BY rowid", (build_match_query(keyword),))]
+
+
+def test_segment_and_match_query():
+    assert segment_cjk("登录API") == " 登  录 API"
+    assert build_match_query("登录模块") == '"登 录 模 块"'
+    assert build_match_query("api 联调") == '"api"* AND "联 调"'
+    assert build_match_query("!!!") == ""
+
+
+def test_cjk_phrase_matches_substring(history_db):
+    manager, dao = history_db
+    JobRunner(manager).run()
+    target = _add(dao, "完成登录模块联调，修复接口超时")
+    _add(dao, "模块评审与登录页联调")
+    assert _fts_ids(manager, "模块联调") == [target]  # 相邻字组成的短语，不是任意位置的单字
+    assert _fts_ids(manager, "录模") == [target]      # 词中间的子串同样命中
+    rows, _ = dao.get_history_page("模块联调")
+    assert [row["id"] for row in rows] == [target]
+    assert "«模»«块»" not in rows[0]["snippet"] and "«模块联调»" in rows[0]["snippet"]
+    assert dao.count_history("模块联调") == 1
+
+
+def test_triggers_follow_insert_update_delete(history_db):
+    manager, dao = history_db
+    JobRunner(manager).run()
+    history_id = _add(dao, "整理周报数据")
+    assert _fts_ids(manager, "周报") == [history_id]
+    with manager.write() as conn:
+        conn.execute("UPDATE history SET work_content = ?, report_content = ? WHERE id = ?",
+                     ("准备季度复盘", "日报：准备季度复盘", history_id))
+    assert _fts_ids(manager, "整理周报") == []
+    assert _fts_ids(manager, "季度复盘") == [history_id]
+    assert dao.delete_history(history_id)
+    assert _fts_ids(manager, "季度复盘") == []
+
+
+def test_like_fallback_until_backfill_finishes(history_db):
+    manager, dao = history_db
+    history_id = _add(dao, "压测报告整理")
+    with manager.read() as conn:
+        assert not is_index_ready(conn)
+    rows, _ = dao.get_history_page("测报")
+    assert [row["id"] for row in rows] == [history_id]
+    assert "rank" not in rows[0]  # 模糊匹配路径：按时间排序，无相关度
+    assert dao.count_history("测报") == 1
+
+    assert JobRunner(manager).run()
+    with manager.read() as conn:
+        assert is_index_ready(conn)
+    rows, _ = dao.get_history_page("测报")
+    assert [row["id"] for row in rows] == [history_id] and "rank" in rows[0]
+
+
+def test_backfill_resumes_from_last_id(history_db):
+    manager, dao = history_db
+    JobRunner(manager).run()
+    with manager.write() as conn:
+        suspend_fts_indexing(conn)  # 批量导入：新记录不经触发器进入索引
+    ids = [_add(dao, f"回填任务{day}", day) for day in range(1, 6)]
+    assert _fts_ids(manager, "回填任务") == []
+
+    with manager.write() as conn:
+        assert backfill_history_fts_batch(conn, 2) == 2
+        assert backfill_history_fts_batch(conn, 2) == 2
+    with manager.read() as conn:
+        last_id = conn.execute("SELECT value FROM history_fts_state WHERE key = 'backfill_last_id'").fetchone()[0]
+    assert int(last_id) == ids[3]
+    assert _fts_ids(manager, "回填任务") == ids[:4]
+
+    # 模拟重启：新的连接管理器从 backfill_last_id 之后继续，已索引的记录不重复写入
+    manager.close()
+    restarted = ConnectionManager(manager.db_path)
+    try:
+        assert JobRunner(restarted, batch_size=2).run()
+        assert _fts_ids(restarted, "回填任务") == ids
+        with restarted.read() as conn:
+            assert conn.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}").fetchone()[0] == len(ids)
+            assert is_index_ready(conn)
+    finally:
+        restarted.close()
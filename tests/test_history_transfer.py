@@ -0,0 +1,103 @@
+import json
+import os
+import pytest
+import db.history_transfer
+from db.connection import ConnectionManager
+from db.history_search import build_match_query
+from db.migrations import JobRunner, apply_schema_migrations
+from db.history_transfer import BULK_INDEX_THRESHOLD_BYTES, export_history, import_history
+
+TEMPLATE = "### 今日工作\n### 明日计划"
+FULL_COLUMNS = "create_time, template_content, work_content, report_content"
+
+
+@pytest.fixture
+def use_db(monkeypatch):
+    """让导入/导出指向指定的临时库"""
+    def use(manager: ConnectionManager):
+        monkeypatch.setattr(db.history_transfer, "connection_manager", manager)
+    return use
+
+
+def _fresh_db(path) -> ConnectionManager:
+    manager = ConnectionManager(str(path))
+    apply_schema_migrations(manager)
+    JobRunner(manager).run()
+    return manager
+
+
+def _rows(manager: ConnectionManager) -> list:
+    with manager.read() as conn:
+        return [tuple(row) for row in conn.execute(f"SELECT {FULL_COLUMNS} FROM history_full ORDER BY id")]
+
+
+def _triggers(manager: ConnectionManager) -> set:
+    with manager.read() as conn:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_round_trip_and_reimport(history_db, tmp_path, use_db, fmt):
+    source, dao = history_db
+    JobRunner(source).run()
+    dao.add_histories([
+        (TEMPLATE, "接口联调", "完成接口联调", "2024-05-01 18:00:00"),
+        ("### 本周工作", "周报，含逗号、\"引号\"\n和换行", "本周完成" * 2000, "2024-05-02 18:00:00"),  # 大文本压缩存储
+        (TEMPLATE, "整理文档", "完成文档整理", "2024-05-03 18:00:00"),
+    ])
+    path = str(tmp_path / f"history.{fmt}")
+    use_db(source)
+    assert export_history(path) == 3
+
+    target = _fresh_db(tmp_path / "target.db")
+    try:
+        use_db(target)
+        stats = import_history(path)
+        assert (stats["read"], stats["imported"], stats["skipped"], stats["invalid"]) == (3, 3, 0, 0)
+        assert _rows(target) == _rows(source)
+        # 重复导入同一文件按内容哈希全部跳过
+        stats = import_history(path)
+        assert (stats["imported"], stats["skipped"]) == (0, 3)
+        assert len(_rows(target)) == 3
+    finally:
+        target.close()
+
+
+def test_canceled_export_leaves_no_files(history_db, tmp_path, use_db, monkeypatch):
+    manager, dao = history_db
+    dao.add_histories([(TEMPLATE, f"工作{n}", f"日报{n}", None) for n in range(5)])
+    monkeypatch.setattr(db.history_transfer, "EXPORT_PROGRESS_EVERY", 2)
+    use_db(manager)
+    path = str(tmp_path / "history.jsonl")
+    assert export_history(path, cancel=lambda: True) == -1
+    assert not os.path.exists(path) and not os.path.exists(path + ".part")
+
+
+def test_bulk_import_restores_index_triggers(history_db, tmp_path, use_db, monkeypatch):
+    manager, _ = history_db
+    JobRunner(manager).run()
+    triggers = _triggers(manager)
+    assert "history_fts_insert" in triggers
+    path = tmp_path / "bulk.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        n = 0
+        while f.tell() < BULK_INDEX_THRESHOLD_BYTES:
+            f.write(json.dumps({"create_time": "2024-05-01 18:00:00", "template_content": TEMPLATE,
+                                "work_content": f"批量导入{n}", "report_content": "批量导入的日报内容" * 200 + str(n)},
+                               ensure_ascii=False) + "\n")
+            n += 1
+    suspended = []
+    runners = []
+    monkeypatch.setattr(JobRunner, "start_background", lambda self: runners.append(self) or self.run())
+    use_db(manager)
+    stats = import_history(str(path), batch_size=200, progress=lambda *args: suspended.append("history_fts_insert" not in
+                                                                              _triggers(manager)))
+    assert stats["imported"] == n
+    # 导入期间暂停插入触发器，结束后恢复并回填期间新增的记录
+    assert len(suspended) > 1 and all(suspended[:-1]) and not suspended[-1]
+    assert _triggers(manager) == triggers
+    assert [runner.manager for runner in runners] == [manager]
+    with manager.read() as conn:
+        indexed = conn.execute("SELECT COUNT(*) FROM history_fts WHERE history_fts MATCH ?",
+                               (build_match_query("批量导入"),)).fetchone()[0]
+    assert indexed == n
@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from db.connection import ConnectionManager
+from db.history_hash import history_content_hash
+from db.migrations import (LATEST_VERSION, JobRunner, apply_schema_migrations, dry_run, get_schema_version,
+                           has_page_index, run_migrations)
+
+LEGACY_ROWS = [
+    ("2024-05-0%d 18:00:00" % day, "### 今日工作\n### 明日计划", f"第{day}天的工作内容", f"第{day}天的日报")
+    for day in range(1, 6)
+]
+
+
+def _legacy_db(path: str):
+    """无版本号的旧库：只有最初的 history/templates 表"""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+    CREATE TABLE history (id INTEGER PRIMARY KEY AUTOINCREMENT, create_time TEXT NOT NULL,
+                          template_content TEXT NOT NULL, work_content TEXT NOT NULL, report_content TEXT NOT NULL);
+    CREATE TABLE templates (id INTEGER PRIMARY KEY AUTOINCREMENT, template_name TEXT UNIQUE NOT NULL,
+                            template_type TEXT NOT NULL, content TEXT NOT NULL, create_time TEXT NOT NULL,
+                            is_default INTEGER DEFAULT 0);
+    """)
+    conn.executemany("INSERT INTO history (create_time, template_content, work_content, report_content) "
+                     "VALUES (?, ?, ?, ?)", LEGACY_ROWS)
+    conn.commit()
+    conn.close()
+
+
+def test_fresh_database_reaches_latest_version(tmp_path):
+    manager = ConnectionManager(str(tmp_path / "fresh.db"))
+    try:
+        report = apply_schema_migrations(manager)
+        assert [item["version"] for item in report] == list(range(1, LATEST_VERSION + 1))
+        assert apply_schema_migrations(manager) == []  # 重复执行无操作
+        with manager.read() as conn:
+            assert get_schema_version(conn) == LATEST_VERSION
+            logged = conn.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0]
+        assert logged == LATEST_VERSION
+    finally:
+        manager.close()
+
+
+def test_legacy_database_migrates_and_backfills(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    _legacy_db(path)
+    manager = ConnectionManager(path)
+    try:
+        apply_schema_migrations(manager)
+        runner = JobRunner(manager, batch_size=2)  # 多批次执行
+        assert runner.run()
+        assert runner.totals["历史记录内容哈希"] == len(LEGACY_ROWS)
+        with manager.read() as conn:
+            rows = conn.execute("SELECT h.content_hash, v.create_time, v.template_content, v.work_content, "
+                                "v.report_content FROM history h JOIN history_full v ON v.id = h.id "
+                                "ORDER BY h.id").fetchall()
+        assert [tuple(row)[1:] for row in rows] == LEGACY_ROWS
+        assert [row["content_hash"] for row in rows] == [history_content_hash(*values) for values in LEGACY_ROWS]
+        with manager.read() as conn:
+            assert has_page_index(conn)
+        assert JobRunner(manager).run()  # 已全部完成，再次执行无待处理数据
+    finally:
+        manager.close()
+
+
+def test_page_index_built_after_startup_budget(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    _legacy_db(path)
+    manager = ConnectionManager(path)
+    try:
+        # 启动限时为0：结构迁移不建分页索引，全部数据迁移转入后台
+        thread = run_migrations(manager, startup_budget_ms=0)
+        assert thread is not None
+        thread.join(10)
+        assert not thread.is_alive()
+        with manager.read() as conn:
+            assert has_page_index(conn)
+            plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM history WHERE (create_time, id) < ('2024-05-03', 0) "
+                "ORDER BY create_time DESC, id DESC LIMIT 2"))
+        assert "idx_history_create_time" in plan
+    finally:
+        manager.close()
+
+
+def test_dry_run_leaves_source_untouched(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    _legacy_db(path)
+    report = dry_run(path)
+    assert any(item.get("version") == LATEST_VERSION for item in report)
+    conn = sqlite3.connect(path)
+    try:
+        assert get_schema_version(conn) == 0
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(history)")}
+    finally:
+        conn.close()
+    assert "content_hash" not in columns
+
+
+def test_migrations_do_not_import_transfer_code():
+    probe = "import sys, db.migrations; print('db.history_transfer' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == "False"
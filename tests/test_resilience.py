@@ -0,0 +1,114 @@
+import pytest
+from config.app_config import global_config
+from core import resilience
+from core.ai_client import ArkAIClient
+from core.resilience import (RESULT_FATAL, RESULT_OK, LatencyTracker, ResilientStreamer, backoff_delay,
+                             is_retryable_error)
+from core.stream_parser import parse_stream_chunk
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def fast_retry(monkeypatch):
+    """缩短退避与超时，并使用独立的首字耗时样本"""
+    monkeypatch.setattr(global_config, "retry_max_retries", 2)
+    monkeypatch.setattr(global_config, "retry_backoff_base", 0.01)
+    monkeypatch.setattr(global_config, "retry_backoff_max", 0.02)
+    monkeypatch.setattr(global_config, "ttft_timeout", 0.5)
+    monkeypatch.setattr(global_config, "idle_timeout", 0.5)
+    monkeypatch.setattr(resilience, "ttft_tracker", LatencyTracker())
+
+
+def _streamer(server, per_attempt=()):
+    """直连模拟服务的流式请求；per_attempt[i] 为第i次上游请求发起前对模拟服务配置的修改"""
+    client = ArkAIClient().get_client()
+    calls, logs = [], []
+
+    def create_stream():
+        if len(calls) < len(per_attempt):
+            for name, value in per_attempt[len(calls)].items():
+                setattr(server.config, name, value)
+        calls.append(True)
+        return client.responses.create(model="mock-model", input="模板", stream=True)
+
+    streamer = ResilientStreamer(create_stream, parse_stream_chunk, logs.append, lambda: False)
+    return streamer, logs
+
+
+def _run(streamer):
+    parts = []
+    result, reason = streamer.stream(parts.append)
+    return result, reason, "".join(parts)
+
+
+def test_backoff_delay_bounds(monkeypatch):
+    monkeypatch.setattr(global_config, "retry_backoff_base", 0.5)
+    monkeypatch.setattr(global_config, "retry_backoff_max", 3.0)
+    for retry_no, cap in ((1, 0.5), (2, 1.0), (3, 2.0), (4, 3.0), (8, 3.0)):
+        assert cap / 2 <= backoff_delay(retry_no) <= cap
+
+
+@pytest.mark.parametrize("status, retryable", [(400, False), (401, False), (409, False), (408, True),
+                                               (429, True), (500, True), (503, True)])
+def test_retryable_status(status, retryable):
+    assert is_retryable_error(_StatusError(status)) is retryable
+
+
+def test_ttft_stall_is_retried(mock_ark, fast_retry):
+    streamer, logs = _streamer(mock_ark, per_attempt=[{"ttft_ms": 5000}, {"ttft_ms": 20}])
+    result, _, text = _run(streamer)
+    assert result == RESULT_OK
+    assert text == mock_ark.config.report_text()
+    assert (streamer.attempt_count, streamer.retry_count) == (2, 1)
+    assert any("首字超时" in line for line in logs)
+
+
+def test_no_retry_after_text_was_emitted(mock_ark, fast_retry):
+    mock_ark.config.stall_after_chunks, mock_ark.config.stall_ms = 3, 5000
+    streamer, logs = _streamer(mock_ark)
+    result, reason, text = _run(streamer)
+    assert result == RESULT_FATAL and reason == "分块间隔超时"
+    assert text == mock_ark.config.report_text()[:3 * mock_ark.config.chunk_chars]
+    assert (streamer.attempt_count, streamer.retry_count) == (1, 0)
+    assert any("不再重试" in line for line in logs)
+
+
+@pytest.mark.parametrize("status", [400, 409])
+def test_client_error_fails_fast(mock_ark, fast_retry, status):
+    mock_ark.config.fail_first, mock_ark.config.error_status = 1, status
+    streamer, _ = _streamer(mock_ark)
+    result, _, text = _run(streamer)
+    assert result == RESULT_FATAL and text == ""
+    assert (streamer.attempt_count, streamer.retry_count) == (1, 0)
+
+
+def test_rate_limit_is_retried(mock_ark, fast_retry):
+    mock_ark.config.fail_first, mock_ark.config.error_status = 2, 429
+    streamer, _ = _streamer(mock_ark)
+    result, _, text = _run(streamer)
+    assert result == RESULT_OK and text == mock_ark.config.report_text()
+    assert (streamer.attempt_count, streamer.retry_count) == (3, 2)
+
+
+def test_hedge_fires_past_p95_and_closes_loser(mock_ark, fast_retry, monkeypatch):
+    monkeypatch.setattr(global_config, "hedge_enabled", True)
+    monkeypatch.setattr(global_config, "hedge_delay_ms", 60000)  # 样本足够时不使用默认延迟
+    monkeypatch.setattr(global_config, "hedge_floor_ms", 10)
+    monkeypatch.setattr(global_config, "hedge_min_samples", 5)
+    monkeypatch.setattr(global_config, "ttft_timeout", 10.0)
+    for _ in range(20):
+        resilience.ttft_tracker.record(0.1)
+    assert resilience.ttft_tracker.hedge_threshold() == pytest.approx(0.1)
+
+    streamer, logs = _streamer(mock_ark, per_attempt=[{"ttft_ms": 5000}, {"ttft_ms": 20}])
+    result, _, text = _run(streamer)
+    assert result == RESULT_OK and text == mock_ark.config.report_text()
+    assert (streamer.attempt_count, streamer.hedge_count, streamer.retry_count) == (2, 1, 0)
+    primary, hedge = streamer._attempts
+    assert primary._closed.is_set()  # 落败的主请求已被关闭
+    assert any("对冲请求率先返回首字" in line for line in logs)
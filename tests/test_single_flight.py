@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+import pytest
+from core.engine import EVENT_CANCELED, EVENT_DONE, EVENT_RESET, EVENT_TEXT, GenerationEngine
+from core.generation_cache import FlightAbandoned, FlightAborted, SingleFlight
+
+
+def test_abandoned_flight_lets_follower_take_over():
+    flights = SingleFlight()
+    flight, is_leader = flights.join("key")
+    follower_flight, follower_is_leader = flights.join("key")
+    assert is_leader and not follower_is_leader and follower_flight is flight
+
+    flight.publish("部分")
+    flights.release("key", flight, "上游生成未完成", abandoned=True)
+
+    received = []
+    with pytest.raises(FlightAbandoned):
+        for text in flight.subscribe(lambda: False):
+            received.append(text)
+    assert received == ["部分"]
+    new_flight, now_leader = flights.join("key")
+    assert now_leader and new_flight is not flight
+
+
+def test_failed_flight_still_fails_followers():
+    flights = SingleFlight()
+    flight, _ = flights.join("key")
+    flights.join("key")
+    flights.release("key", flight, "模型调用失败")
+    with pytest.raises(FlightAborted) as error:
+        list(flight.subscribe(lambda: False))
+    assert not isinstance(error.value, FlightAbandoned)
+
+
+@pytest.fixture
+def engine():
+    engine = GenerationEngine(max_concurrency=2)
+    yield engine
+    engine.shutdown()
+
+
+async def _collect(session, on_text=None):
+    """消费会话事件：返回事件类型序列与最终展示的文本（EVENT_RESET 时清空）"""
+    kinds, text = [], []
+    async for event in session.events():
+        kinds.append(event.kind)
+        if event.kind == EVENT_RESET:
+            text.clear()
+        elif event.kind == EVENT_TEXT:
+            text.append(event.text)
+            if on_text:
+                on_text()
+    return kinds, "".join(text)
+
+
+async def _wait(flag: threading.Event):
+    while not flag.is_set():
+        await asyncio.sleep(0.005)
+
+
+def test_identical_sessions_share_one_upstream_call(mock_ark, engine):
+    sessions = [engine.create_session("模板", "相同的工作内容", force_regenerate=True) for _ in range(2)]
+
+    async def scenario():
+        return await asyncio.gather(*(_collect(session) for session in sessions))
+
+    results = asyncio.run(scenario())
+    expected = mock_ark.config.report_text()
+    assert [kinds[-1] for kinds, _ in results] == [EVENT_DONE, EVENT_DONE]
+    assert [text for _, text in results] == [expected, expected]
+    assert mock_ark.stats["completed"] == 1
+
+
+def test_cancel_mid_stream_stops_promptly(mock_ark, engine):
+    mock_ark.config.stall_after_chunks, mock_ark.config.stall_ms = 3, 10000
+    session = engine.create_session("模板", "中断的工作内容", force_regenerate=True)
+    streaming = threading.Event()
+
+    async def scenario():
+        task = asyncio.ensure_future(_collect(session, on_text=streaming.set))
+        await _wait(streaming)
+        session.cancel()
+        return await task
+
+    start = time.perf_counter()
+    kinds, _ = asyncio.run(scenario())
+    assert time.perf_counter() - start < 5  # 不等服务端卡顿结束
+    assert kinds[-1] == EVENT_CANCELED
+    assert session.report_text == ""
+
+
+def test_follower_cancel_leaves_leader_running(mock_ark, engine):
+    leader = engine.create_session("模板", "相同的工作内容", force_regenerate=True)
+    follower = engine.create_session("模板", "相同的工作内容", force_regenerate=True)
+    leader_streaming, follower_streaming = threading.Event(), threading.Event()
+
+    async def scenario():
+        leader_task = asyncio.ensure_future(_collect(leader, on_text=leader_streaming.set))
+        await _wait(leader_streaming)
+        follower_task = asyncio.ensure_future(_collect(follower, on_text=follower_streaming.set))
+        await _wait(follower_streaming)
+        follower.cancel()
+        return await leader_task, await follower_task
+
+    (leader_kinds, leader_text), (follower_kinds, _) = asyncio.run(scenario())
+    assert follower_kinds[-1] == EVENT_CANCELED
+    assert leader_kinds[-1] == EVENT_DONE
+    assert leader_text == leader.report_text == mock_ark.config.report_text()
+    assert mock_ark.stats["completed"] == 1
+
+
+def test_leader_cancel_does_not_fail_follower(mock_ark, engine):
+    leader = engine.create_session("模板", "相同的工作内容", force_regenerate=True)
+    follower = engine.create_session("模板", "相同的工作内容", force_regenerate=True)
+    leader_streaming = threading.Event()
+
+    async def scenario():
+        leader_task = asyncio.ensure_future(_collect(leader, on_text=leader_streaming.set))
+        await _wait(leader_streaming)
+        follower_task = asyncio.ensure_future(_collect(follower))
+        await asyncio.sleep(0.05)  # 跟随者已回放部分分块
+        leader.cancel()
+        return await leader_task, await follower_task
+
+    (leader_kinds, _), (follower_kinds, follower_text) = asyncio.run(scenario())
+    assert leader_kinds[-1] == EVENT_CANCELED
+    assert follower_kinds[-1] == EVENT_DONE
+    assert EVENT_RESET in follower_kinds
+    assert follower_text == follower.report_text == mock_ark.config.report_text()
@@ -0,0 +1,30 @@
+import asyncio
+from core.stream_pacer import StreamPacer
+
+
+def test_tick_flushes_tail_after_interval():
+    emitted = []
+    pacer = StreamPacer(emitted.append, flush_interval_ms=50, flush_chars=1000)
+    start = pacer._last_flush
+    pacer.feed("尾部")
+    pacer.tick(start + 0.01)
+    assert emitted == []  # 未到时间预算
+    pacer.tick(start + 0.05)
+    assert emitted == ["尾部"]
+    pacer.tick(start + 1)
+    assert emitted == ["尾部"]  # 缓冲区为空时不重复刷新
+
+
+def test_stalled_upstream_still_shows_buffered_text():
+    emitted = []
+    pacer = StreamPacer(emitted.append, flush_interval_ms=20, flush_chars=1000)
+
+    async def scenario():
+        deadline = asyncio.ensure_future(pacer.run_deadline())
+        pacer.feed("开头")  # 刚刷新过：缓冲
+        pacer.feed("已缓冲")
+        await asyncio.sleep(0.1)  # 上游停顿，没有新分块到达
+        deadline.cancel()
+
+    asyncio.run(scenario())
+    assert "".join(emitted) == "开头已缓冲"
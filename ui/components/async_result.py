@@ -0,0 +1,39 @@
+from concurrent.futures import Future
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, Qt, Signal
+from db.connection import QueryCancelled
+
+
+class _ResultRelay(QObject):
+    """把后台线程完成的Future结果转发回主线程（信号跨线程自动排队）"""
+    ready = Signal(object)
+
+
+def on_main_thread(future: Future, callback: Callable[[object], None], context: Optional[QObject] = None):
+    """
+    Future完成后在主线程回调 callback(结果)，不阻塞界面
+    :param context: 回调所属窗口；窗口关闭（对象销毁）后结果直接丢弃，不再回调
+    """
+    relay = _ResultRelay(context)  # 在主线程创建，回调在主线程执行
+    relay.ready.connect(callback, Qt.QueuedConnection)
+    relay.ready.connect(relay.deleteLater, Qt.QueuedConnection)
+
+    def done(finished: Future):
+        if finished.cancelled():
+            return
+        error = finished.exception()
+        if error is not None:
+            # 查询被新条件取代（QueryCancelled）时结果本就会被丢弃，不视为失败
+            if not isinstance(error, QueryCancelled):
+                print(f"数据库后台任务失败：{error}")
+            try:
+                relay.deleteLater()  # 不再回调，及时释放（连续输入时每次取消都会留下一个）
+            except RuntimeError:
+                pass
+            return
+        try:
+            relay.ready.emit(finished.result())
+        except RuntimeError:
+            pass  # 所属窗口已关闭
+
+    future.add_done_callback(done)
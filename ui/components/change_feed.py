@@ -0,0 +1,17 @@
+from PySide6.QtCore import QObject, Signal
+from db.change_events import HISTORY_TABLE, TEMPLATES_TABLE, change_bus
+
+
+class ChangeFeed(QObject):
+    """把变更总线的事件转发到主线程（发布方可能是数据库线程/导入线程，信号跨线程自动排队），窗口连接信号增量刷新"""
+    history_changed = Signal(object)    # ChangeEvent
+    templates_changed = Signal(object)  # ChangeEvent
+
+    def __init__(self):
+        super().__init__()
+        change_bus.subscribe(HISTORY_TABLE, self.history_changed.emit)
+        change_bus.subscribe(TEMPLATES_TABLE, self.templates_changed.emit)
+
+
+# 全局界面变更通知（在主线程导入时创建，各窗口连接所需信号）
+change_feed = ChangeFeed()
@@ -0,0 +1,300 @@
+import threading
+from typing import List, Optional
+from PySide6.QtCore import QAbstractTableModel, QEvent, QModelIndex, QRect, Qt, Signal
+from PySide6.QtGui import QColor, QPainter
+from PySide6.QtWidgets import QStyle, QStyledItemDelegate
+from config.style_config import COLOR_DANGER, COLOR_MAIN, SMALL_FONT
+from db.db_worker import db_worker
+from db.query_cache import history_query_cache
+from ui.components.async_result import on_main_thread
+from ui.components.change_feed import change_feed
+
+# 表格列
+HISTORY_COLUMNS = ["序号", "生成时间", "模板预览", "工作内容预览", "生成结果预览", "操作"]
+ACTION_COLUMN = 5
+# 预览列展示字数：模板/工作内容/生成结果
+_PREVIEW_LENGTHS = {2: ("template_preview", 35), 3: ("work_preview", 35), 4: ("report_preview", 50)}
+
+
+def truncate_preview(text: str, max_len: int = 40) -> str:
+    """界面预览文本截断（导出时不使用此方法，导出完整内容）"""
+    if not text:
+        return "无"
+    clean_text = text.replace("\n\n", "\n").strip()
+    if len(clean_text) <= max_len:
+        return clean_text
+    return clean_text[:max_len] + "..."
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """
+    历史记录表格模型：只持有预览数据，滚动到底部时经 fetchMore 增量加载，分页查询在数据库线程执行并预取下一页
+    - 条件变化时取消旧查询（正在执行的语句经进度回调中断），第一页返回前保留旧结果，输入时表格不闪空
+    - 每页结果与总数按查询条件缓存，回退到之前的关键词时直接展示
+    - 订阅历史记录变更通知：删除的行直接移除，新增记录补入已加载范围，不整表重载
+    """
+    query_started = Signal()  # 条件变化，重新统计总数（count_ready 到达前总数未知）
+    count_ready = Signal(int)  # 当前条件下的记录总数
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.keyword = ""
+        self.template_type = ""
+        self._rows: List[dict] = []
+        self._next_cursor: Optional[tuple] = None
+        self._exhausted = True
+        self._generation = 0  # 查询代次：条件变化后丢弃旧查询的返回结果
+        self._cancel_event = threading.Event()  # 当前代次的取消标记，条件变化时置位
+        self._prefetch_epoch = 0  # 数据变更后递增：丢弃变更前发起的预取结果
+        self._prefetched = None  # 已返回、尚未追加的下一页 (记录, 游标)
+        self._loading = False
+        self._pending_fetch = False  # 视图已请求下一页但查询尚未返回
+        self._replace_rows = False  # 新条件的第一页尚未展示（到达后整体替换旧结果）
+        self._subscribed = True
+        change_feed.history_changed.connect(self.apply_change)
+
+    # ---------- 查询 ----------
+    def set_query(self, keyword: str = "", template_type: str = ""):
+        """按新条件重新加载：取消旧查询，异步查询第一页和总数，第一页返回后替换表格内容并预取第二页"""
+        self.cancel()
+        self._cancel_event = threading.Event()
+        self.keyword = keyword or ""
+        self.template_type = template_type or ""
+        self._generation += 1
+        self._next_cursor = None
+        self._exhausted = False
+        self._prefetched = None
+        self._loading = False
+        self._pending_fetch = True
+        self._replace_rows = True
+        self.query_started.emit()
+        self._start_prefetch()
+        self._start_count()
+
+    def cancel(self):
+        """取消当前条件下尚未完成的查询"""
+        self._cancel_event.set()
+
+    def detach(self):
+        """窗口关闭时调用：取消未完成的查询并退订变更通知（关闭后的模型不再响应新增/删除）"""
+        self.cancel()
+        if self._subscribed:
+            self._subscribed = False
+            change_feed.history_changed.disconnect(self.apply_change)
+
+    def _start_prefetch(self):
+        if self._exhausted or self._loading or self._prefetched is not None:
+            return
+        key = ("page", self.keyword, self.template_type, self._next_cursor)
+        token = (self._generation, self._prefetch_epoch)
+        cached = history_query_cache.get(key)
+        if cached is not None:
+            self._on_page_loaded(token, cached)
+            return
+        self._loading = True
+        version = history_query_cache.version
+        future = db_worker.history.get_history_page(self.keyword, self.template_type, self._next_cursor,
+                                                    cancel=self._cancel_event.is_set)
+        on_main_thread(future, lambda result: self._on_page_loaded(token, result, key, version), self)
+
+    def _on_page_loaded(self, token: tuple, result: tuple, key: tuple = None, version: int = None):
+        if token != (self._generation, self._prefetch_epoch):
+            return
+        if key is not None:
+            history_query_cache.put(key, result, version)
+        self._loading = False
+        self._prefetched = result
+        if self._pending_fetch:
+            self._pending_fetch = False
+            self._append_prefetched()
+
+    def _start_count(self):
+        key = ("count", self.keyword, self.template_type)
+        cached = history_query_cache.get(key)
+        if cached is not None:
+            self.count_ready.emit(cached)
+            return
+        generation, version = self._generation, history_query_cache.version
+        future = db_worker.history.count_history(self.keyword, self.template_type, cancel=self._cancel_event.is_set)
+        on_main_thread(future, lambda total: self._on_count_loaded(generation, total, key, version), self)
+
+    def _on_count_loaded(self, generation: int, total: int, key: tuple, version: int):
+        if generation != self._generation:
+            return
+        history_query_cache.put(key, total, version)
+        self.count_ready.emit(total)
+
+    def _append_prefetched(self):
+        histories, self._next_cursor = self._prefetched
+        self._prefetched = None
+        self._exhausted = self._next_cursor is None
+        if self._replace_rows:
+            self._replace_rows = False
+            self.beginResetModel()
+            self._rows = list(histories)
+            self.endResetModel()
+        elif histories:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(histories) - 1)
+            self._rows.extend(histories)
+            self.endInsertRows()
+        self._start_prefetch()
+
+    # ---------- 变更通知 ----------
+    def apply_change(self, event):
+        """历史记录变更（主线程）：删除的行直接移除，新增记录补入已加载范围，总数重新统计；无法逐行描述的变更整体重载"""
+        if event.reload:
+            self.set_query(self.keyword, self.template_type)
+            return
+        for history_id in event.deleted:
+            self.remove_history_row(history_id)
+        # 已预取/正在预取的下一页可能漏掉新增记录或仍含已删除记录，丢弃后重新预取
+        self._prefetch_epoch += 1
+        self._prefetched = None
+        self._loading = False
+        self._start_prefetch()
+        # 按相关度排序的搜索结果无法确定新增记录的位置，只更新总数；按时间排序时补入排在已加载末尾之前的记录
+        if event.inserted and not self.keyword and not self._replace_rows:
+            newer_than = None if self._exhausted else self._next_cursor[1:]
+            generation = self._generation
+            future = db_worker.history.get_history_previews(sorted(event.inserted), self.template_type, newer_than)
+            on_main_thread(future, lambda histories: self._insert_histories(generation, histories), self)
+        self._start_count()
+
+    def _insert_histories(self, generation: int, histories: List[dict]):
+        if generation != self._generation:
+            return
+        known = {history["id"] for history in self._rows}
+        groups = {}  # 插入位置 -> 该位置前插入的记录（均按生成时间倒序）
+        for history in histories:
+            if history["id"] not in known:
+                groups.setdefault(self._insert_position(history), []).append(history)
+        # 从后往前插入，前面的位置不受影响
+        for row in sorted(groups, reverse=True):
+            batch = groups[row]
+            self.beginInsertRows(QModelIndex(), row, row + len(batch) - 1)
+            self._rows[row:row] = batch
+            self.endInsertRows()
+
+    def _insert_position(self, history: dict) -> int:
+        """二分查找：已加载的行按 (create_time, id) 倒序"""
+        key = (history["create_time"], history["id"])
+        low, high = 0, len(self._rows)
+        while low < high:
+            middle = (low + high) // 2
+            if (self._rows[middle]["create_time"], self._rows[middle]["id"]) > key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        """追加下一页：优先使用已预取的结果，查询未返回时等待其完成后再追加"""
+        if parent.isValid() or self._exhausted or self._replace_rows:
+            return
+        if self._prefetched is None:
+            self._pending_fetch = True
+            self._start_prefetch()
+            return
+        self._append_prefetched()
+
+    # ---------- 访问 ----------
+    def loaded_count(self) -> int:
+        return len(self._rows)
+
+    def history_id(self, row: int) -> Optional[int]:
+        return self._rows[row]["id"] if 0 <= row < len(self._rows) else None
+
+    def remove_history_row(self, history_id: int):
+        """删除记录后只移除对应行，不重新加载"""
+        for row, history in enumerate(self._rows):
+            if history["id"] == history_id:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+                return
+
+    # ---------- QAbstractTableModel ----------
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HISTORY_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HISTORY_COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        history = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return str(index.row() + 1)
+            if column == 1:
+                return history["create_time"]
+            if column == 4 and history.get("snippet"):
+                # 全文检索命中时展示高亮摘要（«»标出命中词）
+                return history["snippet"]
+            if column in _PREVIEW_LENGTHS:
+                key, max_len = _PREVIEW_LENGTHS[column]
+                return truncate_preview(history[key], max_len)
+            return None
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter) if column == ACTION_COLUMN else int(Qt.AlignLeft | Qt.AlignTop)
+        if role == Qt.UserRole:
+            return history["id"]
+        return None
+
+
+class HistoryActionDelegate(QStyledItemDelegate):
+    """操作列委托：直接绘制「复制/删除」按钮并处理点击，不为每行创建真实控件"""
+    copy_requested = Signal(int)
+    delete_requested = Signal(int)
+
+    BUTTONS = (("复制", COLOR_MAIN), ("删除", COLOR_DANGER))
+    BUTTON_WIDTH = 44
+    BUTTON_HEIGHT = 22
+    BUTTON_SPACING = 6
+
+    def _button_rects(self, cell: QRect) -> List[QRect]:
+        total = len(self.BUTTONS) * self.BUTTON_WIDTH + (len(self.BUTTONS) - 1) * self.BUTTON_SPACING
+        left = cell.x() + (cell.width() - total) // 2
+        top = cell.y() + (cell.height() - self.BUTTON_HEIGHT) // 2
+        return [QRect(left + i * (self.BUTTON_WIDTH + self.BUTTON_SPACING), top, self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
+                for i in range(len(self.BUTTONS))]
+
+    def paint(self, painter: QPainter, option, index: QModelIndex):
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight().color().lighter(190))
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setFont(SMALL_FONT)
+        for rect, (text, color) in zip(self._button_rects(option.rect), self.BUTTONS):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(color))
+            painter.drawRoundedRect(rect, 3, 3)
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignCenter, text)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        size.setWidth(len(self.BUTTONS) * (self.BUTTON_WIDTH + self.BUTTON_SPACING) + 12)
+        return size
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        if event.type() != QEvent.MouseButtonRelease or event.button() != Qt.LeftButton:
+            return False
+        history_id = index.data(Qt.UserRole)
+        for rect, signal in zip(self._button_rects(option.rect), (self.copy_requested, self.delete_requested)):
+            if rect.contains(event.position().toPoint()):
+                signal.emit(history_id)
+                return True
+        return False
@@ -0,0 +1,52 @@
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtGui import QTextCursor
+from PySide6.QtWidgets import QPlainTextEdit
+
+# 单帧间隔（毫秒）：约60fps
+FRAME_INTERVAL_MS = 16
+# 日志域最大段落数（超出后自动丢弃最早段落，防止超长日志拖慢布局）；结果域不设上限，日报内容不能丢
+LOG_MAX_BLOCKS = 5000
+
+
+class FrameCoalescedRenderer(QObject):
+    """帧合并渲染器：缓冲流式文本，每个显示帧仅做一次光标插入+一次滚动到底部"""
+    flushed = Signal()  # 每帧实际写入后触发（用于切换Tab等附带操作）
+
+    def __init__(self, editor: QPlainTextEdit, frame_interval_ms: int = FRAME_INTERVAL_MS):
+        super().__init__(editor)
+        self.editor = editor
+        self._buffer = []
+        # 单次定时器：首个分块到达时启动，到点统一落盘到编辑器
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.setInterval(frame_interval_ms)
+        self._frame_timer.timeout.connect(self.flush)
+
+    def append(self, text: str):
+        """追加文本到缓冲区（仅内存操作，不触发重新布局）"""
+        if not text:
+            return
+        self._buffer.append(text)
+        if not self._frame_timer.isActive():
+            self._frame_timer.start()
+
+    def flush(self):
+        """把本帧缓冲内容一次性写入编辑器末尾，并滚动到底部"""
+        self._frame_timer.stop()
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        # 直接在文档末尾插入，不移动用户的编辑光标
+        cursor = QTextCursor(self.editor.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        scroll_bar = self.editor.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
+        self.flushed.emit()
+
+    def clear(self):
+        """丢弃未渲染内容并清空编辑器"""
+        self._frame_timer.stop()
+        self._buffer.clear()
+        self.editor.clear()
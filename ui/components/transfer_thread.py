@@ -0,0 +1,47 @@
+import threading
+from PySide6.QtCore import QThread, Signal
+from db.history_transfer import export_history, import_history
+from utils.history_exporters import export_histories
+
+# 导入/导出动作
+ACTION_EXPORT = "export"
+ACTION_IMPORT = "import"
+ACTION_EXPORT_FILTERED = "export_filtered"  # 按当前搜索/筛选条件导出（格式见 utils.history_exporters）
+
+
+class HistoryTransferThread(QThread):
+    """历史记录批量导入/导出线程（文件读写、导出文件生成与数据库批量写入都不在主线程执行）"""
+    progress_signal = Signal(int, int)  # (已处理条数, 百分比)
+    finish_signal = Signal(object)      # 导出全部：导出条数（取消为-1）；导入/筛选导出：统计字典
+    error_signal = Signal(str)
+
+    def __init__(self, action: str, path: str, parent=None, keyword: str = "", template_type: str = "",
+                 fmt: str = None):
+        super().__init__(parent)
+        self.action = action
+        self.path = path
+        # 仅筛选导出使用：当前搜索/筛选条件与导出格式
+        self.keyword = keyword
+        self.template_type = template_type
+        self.fmt = fmt
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """外部调用：请求取消（导出丢弃未完成的文件；导入保留已提交的批次）"""
+        self._cancel_event.set()
+
+    def _on_progress(self, rows: int, done: int, total: int):
+        self.progress_signal.emit(rows, done * 100 // total if total else 100)
+
+    def run(self):
+        try:
+            if self.action == ACTION_EXPORT:
+                result = export_history(self.path, progress=self._on_progress, cancel=self._cancel_event.is_set)
+            elif self.action == ACTION_EXPORT_FILTERED:
+                result = export_histories(self.fmt, self.path, self.keyword, self.template_type,
+                                          progress=self._on_progress, cancel=self._cancel_event.is_set)
+            else:
+                result = import_history(self.path, progress=self._on_progress, cancel=self._cancel_event.is_set)
+            self.finish_signal.emit(result)
+        except Exception as e:
+            self.error_signal.emit(str(e))
@@ -127,6 +127,9 @@ class ConfigWindow(QDialog):
 
         # 保存到本地config.ini文件，持久化存储
         global_config.save_config()
+        # 密钥/模型有变化时才重建共享客户端，并在后台重新预热连接
+        from core.ai_client import ArkAIClient
+        ArkAIClient().refresh_client()
 
         # 保存成功提示（提示模型名，提醒用户开通权限）
         QMessageBox.information(
@@ -1,27 +1,37 @@
 from PySide6.QtGui import QScreen
-from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
-                               QTableWidgetItem, QPushButton, QMessageBox, QLabel,
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableView,
+                               QPushButton, QMessageBox, QLabel,
                                QHeaderView, QFileDialog, QWidget, QApplication,
-                               QLineEdit, QComboBox, QFrame)
-from PySide6.QtCore import Qt
-from db.history_dao import HistoryDAO
+                               QLineEdit, QComboBox, QFrame, QProgressDialog)
+from PySide6.QtCore import Qt, QTimer
+from config.app_config import global_config
+from db.db_worker import db_worker
+from ui.components.async_result import on_main_thread
+from ui.components.history_table import ACTION_COLUMN, HistoryActionDelegate, HistoryTableModel
+from ui.components.transfer_thread import ACTION_EXPORT, ACTION_EXPORT_FILTERED, ACTION_IMPORT, HistoryTransferThread
 from utils.common_utils import CommonUtils
+from utils.history_exporters import available_exporters
 from config.style_config import (
     GLOBAL_FONT, BOLD_FONT, TITLE_FONT,
     MAIN_WINDOW_STYLE, CONTAINER_STYLE, TABLE_STYLE,
     BTN_TABLE_STYLE, BTN_MAIN_STYLE, LABEL_STYLE, MENU_STYLE
 )
-import pandas as pd
 from datetime import datetime
 
 class HistoryWindow(QDialog):
     """历史记录窗口（新增高级搜索/筛选、导出Excel功能【适配筛选结果导出】）"""
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.history_dao = HistoryDAO()
+        # 数据库读写均经数据库线程异步执行，结果回到主线程再更新界面
+        self.history_dao = db_worker.history
         self.setModal(True)
-        # 新增属性：保存当前筛选后的结果集，供导出使用
-        self.current_filtered_histories = []
+        # 当前筛选条件（表格只加载预览，导出/复制时按需读取完整内容）
+        self.current_keyword = ""
+        self.current_template_type = ""
+        self.total_count = None  # 当前条件下的记录总数（统计返回前为None）
+        self.transfer_thread = None
+        self.transfer_dialog = None
+        self.transfer_label = ""
         self.init_ui()
         # 初始化加载全量数据
         self.load_history_data()
@@ -58,7 +68,12 @@ class HistoryWindow(QDialog):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("支持：生成时间（如2024-05）、模板/工作/结果关键词")
         self.search_input.setMinimumWidth(300)
-        # 回车触发搜索
+        # 边输入边搜索：停止输入一段时间后再查询（连续输入只查最后一次）；回车立即搜索
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(global_config.db_search_debounce_ms)
+        self.search_timer.timeout.connect(self.on_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
         self.search_input.returnPressed.connect(self.on_search)
 
         # 2. 模板类型筛选下拉框
@@ -66,10 +81,8 @@ class HistoryWindow(QDialog):
         filter_label.setFont(BOLD_FONT)
         self.template_filter = QComboBox()
         self.template_filter.addItem("全部模板", "")  # 空值表示不筛选
-        # 从DAO获取所有模板类型
-        template_types = self.history_dao.get_all_template_types()
-        for t_type in template_types:
-            self.template_filter.addItem(t_type, t_type)
+        # 从DAO获取所有模板类型（异步返回后追加到下拉框）
+        on_main_thread(self.history_dao.get_all_template_types(), self._fill_template_types, self)
         self.template_filter.currentIndexChanged.connect(self.on_filter)  # 修正：移除多余的右括号
 
         # 3. 搜索按钮
@@ -108,22 +121,33 @@ class HistoryWindow(QDialog):
         table_layout = QVBoxLayout(table_container)
         table_layout.setContentsMargins(6, 6, 6, 6)
 
-        # 核心表格
-        self.history_table = QTableWidget()
-        self.columns = ["序号", "生成时间", "模板预览", "工作内容预览", "生成结果预览", "操作"]
-        self.history_table.setColumnCount(len(self.columns))
-        self.history_table.setHorizontalHeaderLabels(self.columns)
-        self.history_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.history_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.history_table.setSelectionMode(QTableWidget.SingleSelection)
+        # 核心表格（模型/视图：只渲染可见行，操作按钮由委托绘制，滚动到底部时增量加载）
+        self.history_model = HistoryTableModel(self)
+        self.history_model.query_started.connect(self._reset_total_count)
+        self.history_model.count_ready.connect(self._set_total_count)
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
+        self.action_delegate = HistoryActionDelegate(self.history_table)
+        self.action_delegate.copy_requested.connect(self.copy_history)
+        self.action_delegate.delete_requested.connect(self.delete_history)
+        self.history_table.setItemDelegateForColumn(ACTION_COLUMN, self.action_delegate)
+        self.history_table.setEditTriggers(QTableView.NoEditTriggers)
+        self.history_table.setSelectionBehavior(QTableView.SelectRows)
+        self.history_table.setSelectionMode(QTableView.SingleSelection)
+        self.history_table.setWordWrap(True)
         self.history_table.verticalHeader().setVisible(False)
-        # 列宽自适应优化
-        self.history_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        self.history_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        self.history_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.history_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
-        self.history_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.Stretch)
-        self.history_table.horizontalHeader().setSectionResizeMode(5, QHeaderView.ResizeToContents)
+        # 列宽：固定列不使用ResizeToContents（大数据量时会遍历全部行计算宽度）
+        header = self.history_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Fixed)
+        header.setSectionResizeMode(1, QHeaderView.Interactive)
+        header.setSectionResizeMode(2, QHeaderView.Stretch)
+        header.setSectionResizeMode(3, QHeaderView.Stretch)
+        header.setSectionResizeMode(4, QHeaderView.Stretch)
+        header.setSectionResizeMode(ACTION_COLUMN, QHeaderView.Fixed)
+        self.history_table.setColumnWidth(0, 60)
+        self.history_table.setColumnWidth(1, 160)
+        self.history_table.setColumnWidth(ACTION_COLUMN, 120)
+        self.history_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.history_table.verticalHeader().setDefaultSectionSize(70)
 
         table_layout.addWidget(self.history_table)
@@ -136,83 +160,74 @@ class HistoryWindow(QDialog):
         refresh_btn = QPushButton("🔄 刷新记录")
         refresh_btn.setStyleSheet(BTN_MAIN_STYLE)
         refresh_btn.clicked.connect(self.load_history_data)
-        # 导出Excel按钮（原有，功能已适配筛选结果）
-        export_btn = QPushButton("📊 导出Excel")
-        export_btn.setStyleSheet(BTN_MAIN_STYLE)
-        export_btn.clicked.connect(self.export_to_excel)
+        # 导出当前筛选结果（Excel/CSV/JSONL）与同步Markdown目录（按天一个文件，只重写有变化的文件）
+        self.export_btn = QPushButton("📊 导出筛选结果")
+        self.export_btn.setStyleSheet(BTN_MAIN_STYLE)
+        self.export_btn.setEnabled(False)  # 总数统计返回后再启用
+        self.export_btn.clicked.connect(self.export_filtered)
+        markdown_btn = QPushButton("📝 同步Markdown目录")
+        markdown_btn.setStyleSheet(BTN_MAIN_STYLE)
+        markdown_btn.clicked.connect(self.sync_markdown)
+
+        # 批量导入/导出（JSONL/CSV，用于迁移全部历史记录）
+        import_btn = QPushButton("📥 导入记录")
+        import_btn.setStyleSheet(BTN_MAIN_STYLE)
+        import_btn.clicked.connect(self.import_histories)
+        export_all_btn = QPushButton("📤 导出全部（JSONL/CSV）")
+        export_all_btn.setStyleSheet(BTN_MAIN_STYLE)
+        export_all_btn.clicked.connect(self.export_all_histories)
 
         btn_layout.addWidget(refresh_btn)
-        btn_layout.addWidget(export_btn)
+        btn_layout.addWidget(self.export_btn)
+        btn_layout.addWidget(markdown_btn)
+        btn_layout.addWidget(import_btn)
+        btn_layout.addWidget(export_all_btn)
         btn_layout.addStretch()
         main_layout.addLayout(btn_layout)
 
         # 窗口居中
         self.center_window()
 
+    def done(self, result):
+        """关闭窗口（含Esc/关闭按钮）时取消未完成的查询并退订变更通知，数据库线程不再执行无人接收的搜索"""
+        self.search_timer.stop()
+        self.history_model.detach()
+        if self.transfer_thread and self.transfer_thread.isRunning():
+            # 窗口随后会被销毁，先取消并等待导入/导出线程结束
+            self.transfer_thread.cancel()
+            self.transfer_thread.wait()
+        super().done(result)
+
     def center_window(self):
         screen_geometry = QScreen.availableGeometry(QApplication.primaryScreen())
         window_geometry = self.frameGeometry()
         window_geometry.moveCenter(screen_geometry.center())
         self.move(window_geometry.topLeft())
 
-    def _truncate_text(self, text: str, max_len: int = 40) -> str:
-        """界面预览文本截断（导出时不使用此方法，导出完整内容）"""
-        if not text:
-            return "无"
-        clean_text = text.replace("\n\n", "\n").strip()
-        if len(clean_text) <= max_len:
-            return clean_text
-        return clean_text[:max_len] + "..."
-
     def load_history_data(self, search_keyword="", template_type=""):
-        """加载历史记录（新增搜索/筛选参数，核心：保存当前筛选结果到类属性）"""
-        self.history_table.setRowCount(0)
-        # 调用带条件的查询方法
-        self.current_filtered_histories = self.history_dao.get_history_by_conditions(
-            keyword=search_keyword,
-            template_type=template_type
-        )
-        total = len(self.current_filtered_histories)
-        self.title_label.setText(f"📜 历史生成记录（共{total}条）")
-
-        for row_idx, history in enumerate(self.current_filtered_histories):
-            self.history_table.insertRow(row_idx)
-            history_id = history["id"]
-            self.history_table.setItem(row_idx, 0, QTableWidgetItem(str(row_idx + 1)))
-            self.history_table.setItem(row_idx, 1, QTableWidgetItem(history["create_time"]))
-            self.history_table.setItem(row_idx, 2, QTableWidgetItem(self._truncate_text(history["template_content"], 35)))
-            self.history_table.setItem(row_idx, 3, QTableWidgetItem(self._truncate_text(history["work_content"], 35)))
-            self.history_table.setItem(row_idx, 4, QTableWidgetItem(self._truncate_text(history["report_content"], 50)))
-
-            # 操作列小按钮
-            btn_widget = QWidget()
-            btn_layout = QHBoxLayout(btn_widget)
-            btn_layout.setSpacing(6)
-            btn_layout.setContentsMargins(4, 4, 4, 4)
-            btn_layout.setAlignment(Qt.AlignCenter)
-
-            copy_btn = QPushButton("复制")
-            copy_btn.setObjectName("tableBtn")
-            copy_btn.clicked.connect(lambda checked, hid=history_id: self.copy_history(hid))
-
-            del_btn = QPushButton("删除")
-            del_btn.setObjectName("tableDangerBtn")
-            del_btn.clicked.connect(lambda checked, hid=history_id: self.delete_history(hid))
-
-            btn_layout.addWidget(copy_btn)
-            btn_layout.addWidget(del_btn)
-            self.history_table.setCellWidget(row_idx, 5, btn_widget)
-
-        # 内容对齐
-        for row in range(total):
-            for col in range(5):
-                item = self.history_table.item(row, col)
-                if item:
-                    item.setTextAlignment(Qt.AlignLeft | Qt.AlignTop)
+        """加载历史记录（按搜索/筛选条件重新加载第一页和总数，打开窗口的耗时与总记录数无关）"""
+        self.current_keyword = search_keyword or ""
+        self.current_template_type = template_type or ""
+        self.history_model.set_query(self.current_keyword, self.current_template_type)
+
+    def _fill_template_types(self, template_types: list):
+        for t_type in template_types:
+            self.template_filter.addItem(t_type, t_type)
+
+    def _reset_total_count(self):
+        """条件变化后旧总数作废：统计返回前禁用导出，避免按旧条件的总数判断"""
+        self.total_count = None
+        self.export_btn.setEnabled(False)
+
+    def _set_total_count(self, total_count: int):
+        self.total_count = total_count
+        self.export_btn.setEnabled(total_count > 0)
+        self.title_label.setText(f"📜 历史生成记录（共{self.total_count}条）")
 
     # ========== 新增：搜索/筛选/重置逻辑 ==========
     def on_search(self):
-        """执行搜索逻辑"""
+        """执行搜索逻辑（输入防抖到期、回车、点击搜索或切换筛选时触发）"""
+        self.search_timer.stop()
         keyword = self.search_input.text().strip()
         template_type = self.template_filter.currentData()  # 获取筛选值
         self.load_history_data(search_keyword=keyword, template_type=template_type)
@@ -223,83 +238,131 @@ class HistoryWindow(QDialog):
 
     def on_reset(self):
         """重置搜索条件"""
+        # 清空输入/切换筛选不再各自触发一次搜索，统一在最后加载
+        self.search_input.blockSignals(True)
+        self.template_filter.blockSignals(True)
         self.search_input.clear()
         self.template_filter.setCurrentIndex(0)  # 重置为"全部模板"
+        self.search_input.blockSignals(False)
+        self.template_filter.blockSignals(False)
+        self.search_timer.stop()
         self.load_history_data()  # 加载全量数据
     # ========== 搜索逻辑结束 ==========
 
-    def export_to_excel(self):
-        """导出Excel【核心修改】：导出当前筛选后的结果集，保留原有格式特性"""
-        try:
-            # 核心修改：使用类属性中保存的当前筛选结果集，而非全量数据
-            histories = self.current_filtered_histories
-            if not histories:
-                QMessageBox.information(self, "提示", "当前筛选结果集无记录，无需导出！", QMessageBox.Ok)
-                return
+    def export_filtered(self):
+        """导出当前搜索/筛选结果的完整内容（后台线程边查询边写入，可取消），按所选文件类型决定格式"""
+        if not self.total_count:
+            QMessageBox.information(self, "提示", "当前筛选结果集无记录，无需导出！", QMessageBox.Ok)
+            return
+        exporters = [exporter for exporter in available_exporters() if exporter.extension]
+        filters = [f"{exporter.label} (*.{exporter.extension})" for exporter in exporters]
+        # 打开文件保存对话框，让用户选择保存路径、文件名和格式
+        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+        default_filename = f"日报生成记录_筛选结果_{current_time}.{exporters[0].extension}"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "导出当前筛选结果",
+            default_filename,
+            ";;".join(filters)
+        )
+        if not file_path:  # 用户取消保存时不导出
+            return
+        exporter = exporters[filters.index(selected_filter)] if selected_filter in filters else exporters[0]
+        if not file_path.lower().endswith(f".{exporter.extension}"):
+            file_path += f".{exporter.extension}"
+        self._start_transfer(ACTION_EXPORT_FILTERED, file_path, f"正在导出{exporter.label}...", exporter.name)
+
+    def sync_markdown(self):
+        """把当前筛选结果同步到Markdown目录（每天一个文件；再次同步到同一目录时只重写有变化的文件）"""
+        folder = QFileDialog.getExistingDirectory(self, "选择Markdown同步目录")
+        if folder:
+            self._start_transfer(ACTION_EXPORT_FILTERED, folder, "正在同步Markdown目录...", "markdown")
+
+    # ========== 批量导入/导出 ==========
+    def export_all_histories(self):
+        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出全部历史记录", f"日报生成记录_{current_time}.jsonl",
+            "JSON Lines (*.jsonl);;CSV文件 (*.csv)"
+        )
+        if file_path:
+            self._start_transfer(ACTION_EXPORT, file_path, "正在导出历史记录...")
 
-            # 转换为DataFrame，处理数据格式（适配Excel）
-            df = pd.DataFrame(histories)
-            # 列重命名（更友好的Excel表头）
-            df.rename(columns={
-                "id": "记录ID",
-                "create_time": "生成时间",
-                "template_content": "完整模板内容",
-                "work_content": "完整工作内容",
-                "report_content": "完整生成结果"
-            }, inplace=True)
-            # 处理空值：替换为"无"
-            df.fillna("无", inplace=True)
-            # 按生成时间倒序排序（最新的在最前面）
-            df.sort_values(by="生成时间", ascending=False, inplace=True)
-            # 重置索引（从1开始，方便查看）
-            df.reset_index(drop=True, inplace=True)
-            df.index = df.index + 1
-            df.rename_axis("序号", inplace=True)
-
-            # 打开文件保存对话框，让用户选择保存路径和文件名
-            current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-            default_filename = f"日报生成记录_筛选结果_{current_time}.xlsx"
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "导出当前筛选结果到Excel",
-                default_filename,
-                "Excel文件 (*.xlsx);;所有文件 (*.*)"
-            )
-            if not file_path:  # 用户取消保存
+    def import_histories(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "导入历史记录", "", "历史记录文件 (*.jsonl *.csv);;所有文件 (*.*)"
+        )
+        if file_path:
+            self._start_transfer(ACTION_IMPORT, file_path, "正在导入历史记录（重复记录自动跳过）...")
+
+    def _start_transfer(self, action: str, file_path: str, label: str, fmt: str = None):
+        if self.transfer_thread and self.transfer_thread.isRunning():
+            QMessageBox.warning(self, "提示", "已有导入/导出任务在进行中！", QMessageBox.Ok)
+            return
+        self.transfer_label = label
+        self.transfer_dialog = QProgressDialog(label, "取消", 0, 100, self)
+        self.transfer_dialog.setWindowTitle("导入记录" if action == ACTION_IMPORT else "导出记录")
+        self.transfer_dialog.setWindowModality(Qt.WindowModal)
+        self.transfer_dialog.setMinimumDuration(0)
+        self.transfer_dialog.setAutoClose(False)
+        self.transfer_dialog.setAutoReset(False)
+        self.transfer_thread = HistoryTransferThread(action, file_path, self,
+                                                     self.current_keyword, self.current_template_type, fmt)
+        self.transfer_dialog.canceled.connect(self.transfer_thread.cancel)
+        self.transfer_thread.progress_signal.connect(self._on_transfer_progress)
+        self.transfer_thread.finish_signal.connect(lambda result: self._on_transfer_finished(action, file_path, result))
+        self.transfer_thread.error_signal.connect(self._on_transfer_error)
+        self.transfer_thread.start()
+
+    def _on_transfer_progress(self, rows: int, percent: int):
+        dialog = self.transfer_dialog
+        if dialog and not dialog.wasCanceled():
+            dialog.setLabelText(f"{self.transfer_label}（已处理{rows}条）")
+            dialog.setValue(percent)  # 模态进度框的 setValue 会处理事件，完成信号可能在此期间到达并关闭对话框
+
+    def _close_transfer_dialog(self):
+        if self.transfer_dialog:
+            self.transfer_dialog.close()
+            self.transfer_dialog = None
+
+    def _on_transfer_finished(self, action: str, file_path: str, result):
+        self._close_transfer_dialog()
+        if action == ACTION_EXPORT:
+            if result < 0:
+                QMessageBox.information(self, "提示", "已取消导出！", QMessageBox.Ok)
+            else:
+                QMessageBox.information(self, "导出成功", f"{result}条历史记录已导出！\n保存路径：\n{file_path}",
+                                        QMessageBox.Ok)
+            return
+        if action == ACTION_EXPORT_FILTERED:
+            if result["canceled"]:
+                QMessageBox.information(self, "提示", "已取消导出！", QMessageBox.Ok)
                 return
+            detail = ""
+            if "files_written" in result:
+                detail = (f"\n写入{result['files_written']}个文件，未变化{result['files_unchanged']}个，"
+                          f"删除{result['files_deleted']}个")
+            QMessageBox.information(self, "导出成功",
+                                    f"当前{result['records']}条筛选记录已成功导出！{detail}\n保存路径：\n{file_path}",
+                                    QMessageBox.Ok)
+            return
+        # 新增的记录已随每批的变更通知补入列表，无需重新加载
+        QMessageBox.information(
+            self,
+            "导入已取消" if result["canceled"] else "导入完成",
+            f"读取{result['read']}条，新增{result['imported']}条，重复跳过{result['skipped']}条，"
+            f"无效{result['invalid']}条\n耗时 {result['elapsed_s']:.1f} 秒",
+            QMessageBox.Ok
+        )
 
-            # 导出到Excel，设置单元格自动换行+列宽自适应（保留原有特性）
-            with pd.ExcelWriter(file_path, engine="openpyxl") as writer:
-                df.to_excel(writer, sheet_name="日报筛选记录", index=True)
-                # 获取工作表对象，设置单元格自动换行
-                worksheet = writer.sheets["日报筛选记录"]
-                for col in worksheet.columns:
-                    # 所有单元格设为自动换行
-                    for cell in col:
-                        cell.alignment = cell.alignment.copy(wrap_text=True)
-                    # 列宽自适应（根据内容长度调整，最大50）
-                    max_length = max(len(str(cell.value)) for cell in col)
-                    worksheet.column_dimensions[col[0].column_letter].width = min(max_length + 2, 50)
-
-            # 导出成功反馈，提示筛选结果数量
-            QMessageBox.information(
-                self,
-                "导出成功",
-                f"当前{len(histories)}条筛选记录已成功导出！\n保存路径：\n{file_path}",
-                QMessageBox.Ok
-            )
-
-        except Exception as e:
-            # 导出失败反馈，打印详细错误信息
-            QMessageBox.critical(
-                self,
-                "导出失败",
-                f"Excel导出失败，请检查是否安装pandas/openpyxl！\n错误信息：{str(e)}",
-                QMessageBox.Ok
-            )
+    def _on_transfer_error(self, error: str):
+        self._close_transfer_dialog()
+        QMessageBox.critical(self, "失败", f"历史记录导入/导出失败！\n错误信息：{error}", QMessageBox.Ok)
 
     def copy_history(self, history_id: int):
-        history = self.history_dao.get_history_by_id(history_id)
+        on_main_thread(self.history_dao.get_history_by_id(history_id), self._copy_report, self)
+
+    def _copy_report(self, history: dict):
         if not history or not history["report_content"]:
             QMessageBox.warning(self, "提示", "该记录内容为空，无法复制！", QMessageBox.Ok)
             return
@@ -312,9 +375,11 @@ class HistoryWindow(QDialog):
         if QMessageBox.question(self, "确认删除", "是否确定删除该条历史记录？\n删除后无法恢复！",
                                 QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.No:
             return
-        if self.history_dao.delete_history(history_id):
+        on_main_thread(self.history_dao.delete_history(history_id), self._on_history_deleted, self)
+
+    def _on_history_deleted(self, deleted: bool):
+        if deleted:
+            # 对应行与总数由变更通知更新（只移除该行，保留已加载的数据和滚动位置）
             QMessageBox.information(self, "成功", "历史记录已删除！", QMessageBox.Ok)
-            # 删除后重新加载当前筛选结果，保持筛选状态
-            self.on_search()
         else:
-            QMessageBox.warning(self, "失败", "历史记录删除失败！", QMessageBox.Ok)
\ No newline at end of file
+            QMessageBox.warning(self, "失败", "历史记录删除失败！", QMessageBox.Ok)
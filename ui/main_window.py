@@ -1,13 +1,16 @@
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                               QTextEdit, QPushButton, QMessageBox, QLabel,
-                               QProgressBar, QTabWidget, QMenuBar, QApplication)
+                               QTextEdit, QPlainTextEdit, QPushButton, QMessageBox, QLabel,
+                               QProgressBar, QTabWidget, QMenuBar, QApplication, QCheckBox)
 from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QAction, QScreen
 
 from core.generator import GenerateReportThread
 from core.template_manager import TemplateManager
-from db.history_dao import HistoryDAO
+from db.db_worker import db_worker
 from utils.common_utils import CommonUtils
+from ui.components.async_result import on_main_thread
+from ui.components.change_feed import change_feed
+from ui.components.stream_renderer import FrameCoalescedRenderer, LOG_MAX_BLOCKS
 from config.style_config import (
     GLOBAL_FONT, BOLD_FONT, ITALIC_FONT, TITLE_FONT,
     MAIN_WINDOW_STYLE, CONTAINER_STYLE, TAB_STYLE,
@@ -21,12 +24,16 @@ class DailyReportGenerator(QMainWindow):
     def __init__(self):
         super().__init__()
         self.template_manager = TemplateManager()
-        self.history_dao = HistoryDAO()
+        self.history_dao = db_worker.history  # 写后台：保存历史不阻塞界面
         self.generate_thread = None
+        self.cache_hit = False  # 本次生成是否命中生成缓存
         self.loading_timer = QTimer()
         self.loading_texts = ["生成中", "生成中.", "生成中..", "生成中..."]
         self.loading_index = 0
+        self.default_template_text = ""  # 编辑器最近一次载入的默认模板内容（用于判断用户是否改动过）
         self.init_ui()
+        # 模板管理等入口修改默认模板后，编辑器未改动时同步为新的默认模板
+        change_feed.templates_changed.connect(self.on_templates_changed)
 
     def init_ui(self):
         self.setWindowTitle("AI日报生成工具 - 火山方舟")
@@ -70,7 +77,7 @@ class DailyReportGenerator(QMainWindow):
         template_label.setObjectName("titleLabel")
         self.template_editor = QTextEdit()
         self.template_editor.setStyleSheet(TEXT_EDIT_STYLE)
-        self.template_editor.setPlainText(self.template_manager.get_default_template())
+        self.load_default_template()
         template_layout.addWidget(template_label)
         template_layout.addWidget(self.template_editor)
         self.tab_widget.addTab(self.template_tab, "📝 模版编辑")
@@ -114,11 +121,16 @@ class DailyReportGenerator(QMainWindow):
         self.copy_btn = QPushButton("📋 复制结果")
         self.copy_btn.setStyleSheet(BTN_MAIN_STYLE)
 
+        # 强制重新生成：跳过生成缓存，重新调用模型
+        self.force_regen_check = QCheckBox("🔄 强制重新生成")
+        self.force_regen_check.setToolTip("勾选后忽略相同模板+工作内容的缓存结果，重新调用模型生成")
+
         btn_layout.addWidget(self.gen_btn)
         btn_layout.addWidget(self.cancel_btn)
         btn_layout.addWidget(self.clear_btn)
         btn_layout.addWidget(self.copy_btn)
         btn_layout.addStretch()
+        btn_layout.addWidget(self.force_regen_check)
         main_layout.addWidget(btn_container)
 
         # ========== 3. 加载提示容器 ==========
@@ -161,9 +173,12 @@ class DailyReportGenerator(QMainWindow):
         result_label = QLabel("📊 AI生成日报结果（支持编辑，可直接复制到办公软件）")
         result_label.setFont(TITLE_FONT)
         result_label.setObjectName("titleLabel")
-        self.output_editor = QTextEdit()  # 仅绑定日报内容信号
+        self.output_editor = QPlainTextEdit()  # 仅绑定日报内容信号（纯文本控件，长文档布局开销小）
         self.output_editor.setStyleSheet(TEXT_EDIT_STYLE)
         self.output_editor.setMinimumHeight(250)
+        # 帧合并渲染：流式分块每帧（约16ms）统一写入一次
+        self.output_renderer = FrameCoalescedRenderer(self.output_editor)
+        self.output_renderer.flushed.connect(self.on_output_flushed)
         result_layout.addWidget(result_label)
         result_layout.addWidget(self.output_editor)
         self.result_log_tab.addTab(self.result_tab, "📋 生成结果")
@@ -175,10 +190,13 @@ class DailyReportGenerator(QMainWindow):
         log_label = QLabel("📝 执行过程日志（生成/中断/错误信息均在此显示）")
         log_label.setFont(TITLE_FONT)
         log_label.setObjectName("titleLabel")
-        self.log_editor = QTextEdit()  # 仅绑定日志信号
+        self.log_editor = QPlainTextEdit()  # 仅绑定日志信号
         self.log_editor.setStyleSheet(TEXT_EDIT_STYLE)
         self.log_editor.setMinimumHeight(250)
         self.log_editor.setReadOnly(True)  # 日志设为只读，防止误编辑
+        self.log_editor.setUndoRedoEnabled(False)  # 只读日志无需撤销栈
+        self.log_editor.setMaximumBlockCount(LOG_MAX_BLOCKS)
+        self.log_renderer = FrameCoalescedRenderer(self.log_editor)
         log_layout.addWidget(log_label)
         log_layout.addWidget(self.log_editor)
         self.result_log_tab.addTab(self.log_tab, "📄 执行日志")
@@ -250,20 +268,24 @@ class DailyReportGenerator(QMainWindow):
         """开始生成：清空日志+结果，绑定线程双信号"""
         self.gen_btn.setEnabled(False)
         self.cancel_btn.setEnabled(True)
-        self.output_editor.clear()  # 清空生成结果
-        self.log_editor.clear()     # 清空执行日志
+        self.output_renderer.clear()  # 清空生成结果
+        self.log_renderer.clear()     # 清空执行日志
         self.loading_label.setText("生成中")
         self.progress_bar.setVisible(True)
         self.loading_timer.start(300)
+        self.cache_hit = False
 
         template_content = self.template_editor.toPlainText()
         work_content = self.work_editor.toPlainText()
 
-        self.generate_thread = GenerateReportThread(template_content, work_content)
+        self.generate_thread = GenerateReportThread(template_content, work_content,
+                                                    force_regenerate=self.force_regen_check.isChecked())
         self.generate_thread.text_signal.connect(self.update_output)  # 结果信号→结果域
         self.generate_thread.log_signal.connect(self.update_log)      # 日志信号→日志域（新增）
         self.generate_thread.finish_signal.connect(self.generate_finish)
         self.generate_thread.error_signal.connect(self.show_error)
+        self.generate_thread.cache_signal.connect(self.on_cache_hit)
+        self.generate_thread.reset_signal.connect(self.output_renderer.clear)
         self.generate_thread.start()
 
     def cancel_generate(self):
@@ -285,45 +307,60 @@ class DailyReportGenerator(QMainWindow):
             self.update_log("⚠️  无正在运行的生成任务，已强制复位状态！\n")
 
     def update_output(self, text_chunk):
-        """更新生成结果：流式内容逐块拼接，保留原始格式，自动滚动到底部"""
-        if text_chunk and text_chunk.strip():
-            # 直接插入纯文本，保留模型生成的所有格式（换行/空格/分级）
-            self.output_editor.insertPlainText(text_chunk + "\n")
-            # 自动滚动到底部，实时查看最新生成内容
-            scroll_bar = self.output_editor.verticalScrollBar()
-            scroll_bar.setValue(scroll_bar.maximum())
-            # 流式生成时自动切到【生成结果】Tab，方便查看
+        """更新生成结果：流式内容进入帧缓冲，保留原始格式，每帧统一插入+滚动到底部"""
+        if text_chunk:
+            # 分块按模型输出原样追加（纯空白/换行分块同样保留）
+            self.output_renderer.append(text_chunk)
+
+    def on_output_flushed(self):
+        """结果帧写入后：流式生成时自动切到【生成结果】Tab，方便查看"""
+        if self.result_log_tab.currentIndex() != 0:
             self.result_log_tab.setCurrentIndex(0)
 
     def update_log(self, log_chunk):
-        """新增：更新执行日志，仅在日志域显示，自动滚动到底部"""
+        """新增：更新执行日志，进入帧缓冲后统一写入日志域并滚动到底部"""
         if log_chunk and log_chunk.strip():
-            self.log_editor.insertPlainText(log_chunk + "\n")
-            self.log_editor.verticalScrollBar().setValue(
-                self.log_editor.verticalScrollBar().maximum()
-            )
+            self.log_renderer.append(log_chunk + "\n")
+
+    def flush_render(self):
+        """立即落盘所有未渲染的结果/日志（读取编辑器内容前调用）"""
+        self.output_renderer.flush()
+        self.log_renderer.flush()
+
+    def on_cache_hit(self, hit: bool):
+        """命中生成缓存：记录标识，完成时在状态栏提示"""
+        self.cache_hit = hit
 
     def generate_finish(self):
         """生成完成：复位所有状态，切到结果Tab"""
         self.loading_timer.stop()
-        self.loading_label.setText("✅ 生成完成！")
+        self.loading_label.setText("✅ 生成完成！（⚡ 命中缓存，勾选【强制重新生成】可重新调用模型）"
+                                   if self.cache_hit else "✅ 生成完成！")
         self.progress_bar.setVisible(False)
         self.gen_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
         self.result_log_tab.setCurrentIndex(0)  # 自动切到结果Tab
+        self.flush_render()  # 确保最后一帧内容已写入结果域
 
-        # 保存历史记录（原有逻辑）
+        # 保存历史记录：取引擎拼接的完整生成结果（不含中断提示等界面文字）；中断/出错时不保存
         template_content = self.template_editor.toPlainText().strip()
         work_content = self.work_editor.toPlainText().strip()
-        report_content = self.output_editor.toPlainText().strip()
+        report_content = self.generate_thread.report_text.strip()
         if template_content and work_content and report_content:
-            self.history_dao.add_history(template_content, work_content, report_content)
-            self.update_log(f"📜 生成结果已保存到历史记录，可在【历史→历史记录】中查看！")
+            on_main_thread(self.history_dao.add_history(template_content, work_content, report_content),
+                           self.on_history_saved, self)
 
-        if not report_content:
+        if not report_content and not self.generate_thread.is_canceled():
             QMessageBox.warning(self, "提示", "生成结果为空！", QMessageBox.Ok)
             self.update_log("⚠️  生成结果为空，未保存到历史记录！")
 
+    def on_history_saved(self, history_id: int):
+        """历史记录落库后回调（写后台批量提交）"""
+        if history_id > 0:
+            self.update_log("📜 生成结果已保存到历史记录，可在【历史→历史记录】中查看！")
+        else:
+            self.update_log("⚠️  生成结果保存到历史记录失败！")
+
     def show_error(self, err_msg):
         """生成错误：复位状态，切到日志Tab"""
         self.loading_timer.stop()
@@ -332,19 +369,21 @@ class DailyReportGenerator(QMainWindow):
         self.gen_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
         self.result_log_tab.setCurrentIndex(1)  # 错误时自动切到日志Tab
+        self.flush_render()
         QMessageBox.critical(self, "错误", err_msg, QMessageBox.Ok)
 
     def clear_all(self):
         """清空所有：模板恢复默认，结果+日志+提示均清空"""
-        self.template_editor.setPlainText(self.template_manager.get_default_template())
+        self.load_default_template()
         self.work_editor.clear()
-        self.output_editor.clear()
-        self.log_editor.clear()
+        self.output_renderer.clear()
+        self.log_renderer.clear()
         self.loading_label.setText("")
         QMessageBox.information(self, "提示", "已清空内容，模板恢复默认值！", QMessageBox.Ok)
 
     def copy_result(self):
         """复制结果：仅复制生成结果域的内容"""
+        self.output_renderer.flush()
         result = self.output_editor.toPlainText().strip()
         if not result:
             QMessageBox.warning(self, "警告", "暂无有效生成结果可复制！", QMessageBox.Ok)
@@ -378,12 +417,30 @@ class DailyReportGenerator(QMainWindow):
         template_window = TemplateWindow(self)
         template_window.load_to_main_signal.connect(self.load_template_to_editor)
         template_window.exec()
+        template_window.deleteLater()  # 关闭后销毁，不随主窗口常驻
 
     def open_history(self):
         """打开历史记录窗口：局部导入，避免循环导入Bug"""
         from ui.history_window import HistoryWindow
         history_window = HistoryWindow(self)
         history_window.exec()
+        history_window.deleteLater()  # 关闭后销毁，不随主窗口常驻
+
+    def load_default_template(self):
+        self.default_template_text = self.template_manager.get_default_template()
+        self.template_editor.setPlainText(self.default_template_text)
+
+    def on_templates_changed(self, event):
+        """模板变更通知（主线程）：默认模板变了且编辑器仍是之前载入的默认内容时才替换，不覆盖用户的修改"""
+        default_template = self.template_manager.get_default_template()
+        if default_template == self.default_template_text:
+            return
+        editor_text = self.template_editor.toPlainText()
+        if editor_text == default_template:
+            self.default_template_text = default_template  # 已由模板窗口载入
+        elif editor_text == self.default_template_text:
+            self.load_default_template()
+            self.update_log("📋 默认模板已更新，编辑器已同步为最新默认模板")
 
     def load_template_to_editor(self, template_content: str):
         if template_content:
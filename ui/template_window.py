@@ -4,6 +4,7 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                                QMessageBox, QListWidget, QWidget, QApplication)
 from PySide6.QtCore import Qt, Signal
 from core.template_manager import TemplateManager
+from ui.components.change_feed import change_feed
 from config.style_config import (
     GLOBAL_FONT, BOLD_FONT, TITLE_FONT,
     MAIN_WINDOW_STYLE, CONTAINER_STYLE, LIST_WIDGET_STYLE,
@@ -20,9 +21,13 @@ class TemplateWindow(QDialog):
         super().__init__(parent)
         self.template_manager = TemplateManager()
         self.current_selected = None
+        self.template_version = -1  # 列表对应的模板缓存版本（-1：尚未加载）
         self.setModal(True)
         self.init_ui()
         self.load_template_list()
+        # 其他窗口/批量生成修改模板时增量刷新列表（关闭时退订）
+        self._subscribed = True
+        change_feed.templates_changed.connect(self.on_templates_changed)
 
     def init_ui(self):
         self.setWindowTitle("模板管理（日报/周报）")
@@ -155,16 +160,44 @@ class TemplateWindow(QDialog):
 
     # 以下所有业务逻辑无修改，确保模板管理功能正常
     def load_template_list(self):
-        self.template_list.clear()
-        template_names = self.template_manager.get_all_template_names()
-        default_name = self.template_manager.get_default_template_name()
-        for name in template_names:
-            item_text = f"★ {name}" if name == default_name else name
-            self.template_list.addItem(item_text)
+        self.refresh_template_list()
         self.current_selected = None
         self.reset_input()
         self.update_btn_status()
 
+    def refresh_template_list(self):
+        """按模板缓存的变更计数刷新列表：无变更时跳过，有变更时只改写文本变化的条目（模板读取均为内存查找）"""
+        version, changed = self.template_manager.changes_since(self.template_version)
+        if self.template_version >= 0 and changed is not None and not changed:
+            return
+        self.template_version = version
+        default_name = self.template_manager.get_default_template_name()
+        item_texts = [f"★ {name}" if name == default_name else name
+                      for name in self.template_manager.get_all_template_names()]
+        for row, item_text in enumerate(item_texts):
+            item = self.template_list.item(row)
+            if item is None:
+                self.template_list.addItem(item_text)
+            elif item.text() != item_text:
+                item.setText(item_text)
+        while self.template_list.count() > len(item_texts):
+            self.template_list.takeItem(self.template_list.count() - 1)
+
+    def done(self, result):
+        """关闭窗口（含Esc/关闭按钮）时退订模板变更通知"""
+        if self._subscribed:
+            self._subscribed = False
+            change_feed.templates_changed.disconnect(self.on_templates_changed)
+        super().done(result)
+
+    def on_templates_changed(self, event):
+        """模板变更通知（主线程）：只改写有变化的列表项；当前选中的模板已被删除时清空编辑区"""
+        self.refresh_template_list()
+        if self.current_selected and not self.template_manager.get_template_info(self.current_selected):
+            self.current_selected = None
+            self.reset_input()
+        self.update_btn_status()
+
     def reset_input(self):
         self.template_name_edit.clear()
         self.template_type_combo.setCurrentIndex(0)
@@ -1,8 +1,126 @@
 import os
 from datetime import datetime
+from itertools import chain, islice
+from typing import Iterable, List, Sequence
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
 from PySide6.QtWidgets import QFileDialog
 
+# Excel 单个工作表的最大行数（含表头），超出后拆分到新工作表
+EXCEL_MAX_ROWS = 1048576
+# Excel 单元格最多容纳的字符数，超长文本截断
+EXCEL_MAX_CELL_CHARS = 32767
+# 历史记录导出：工作表名、表头与对应字段（序号为导出顺序）
+HISTORY_SHEET_TITLE = "日报筛选记录"
+HISTORY_HEADERS = ("序号", "记录ID", "生成时间", "完整模板内容", "完整工作内容", "完整生成结果")
+HISTORY_FIELDS = ("id", "create_time", "template_content", "work_content", "report_content")
+# 列宽：按表头与前若干行的最长文本估算（只读写模式须在写入第一行前确定列宽），上限50
+WIDTH_SAMPLE_ROWS = 500
+MAX_COLUMN_WIDTH = 50
+
+_WRAP = Alignment(wrap_text=True, vertical="top")
+
+
+def _cell_text(value) -> object:
+    """空值显示为「无」；去掉 Excel 不允许的控制字符，超长文本截断"""
+    if value is None:
+        return "无"
+    if isinstance(value, str):
+        value = ILLEGAL_CHARACTERS_RE.sub("", value)
+        if len(value) > EXCEL_MAX_CELL_CHARS:
+            value = value[:EXCEL_MAX_CELL_CHARS - 1] + "…"
+    return value
+
+
+def _column_widths(headers: Sequence[str], rows: Iterable[Sequence]) -> List[float]:
+    widths = [len(header) for header in headers]
+    for row in rows:
+        for index, value in enumerate(row):
+            widths[index] = max(widths[index], len(str(value)))
+    return [min(width + 2, MAX_COLUMN_WIDTH) for width in widths]
+
+
+class _StreamingSheets:
+    """
+    只写模式的工作表序列：行直接写入临时文件，不在内存中保留单元格；写满 Excel 行数上限后自动新建工作表
+    每列复用一个带自动换行样式的单元格对象（行写入时立即序列化，复用是安全的），避免每个单元格重复创建样式
+    """
+
+    def __init__(self, workbook: Workbook, title: str, headers: Sequence[str], widths: Sequence[float],
+                 rows_per_sheet: int):
+        self.workbook = workbook
+        self.title = title
+        self.headers = headers
+        self.widths = widths
+        self.rows_per_sheet = rows_per_sheet
+        self.sheet = None
+        self.sheet_rows = 0
+        self._cells: List[WriteOnlyCell] = []
+
+    def _new_sheet(self):
+        index = len(self.workbook.worksheets) + 1
+        self.sheet = self.workbook.create_sheet(self.title if index == 1 else f"{self.title}_{index}")
+        for column, width in enumerate(self.widths, start=1):
+            self.sheet.column_dimensions[get_column_letter(column)].width = width
+        self.sheet.freeze_panes = "A2"
+        header_cells = []
+        for header in self.headers:
+            cell = WriteOnlyCell(self.sheet, value=header)
+            cell.font = Font(bold=True)
+            cell.alignment = _WRAP
+            header_cells.append(cell)
+        self.sheet.append(header_cells)
+        self._cells = []
+        for _ in self.headers:
+            cell = WriteOnlyCell(self.sheet)
+            cell.alignment = _WRAP
+            self._cells.append(cell)
+        self.sheet_rows = 0
+
+    def append(self, values: Sequence):
+        if self.sheet is None or self.sheet_rows >= self.rows_per_sheet:
+            self._new_sheet()
+        for cell, value in zip(self._cells, values):
+            cell.value = value
+        self.sheet.append(self._cells)
+        self.sheet_rows += 1
+
+    def ensure_sheet(self):
+        """无数据时也输出只有表头的工作表"""
+        if self.sheet is None:
+            self._new_sheet()
+
+
+def write_histories_to_excel(histories: Iterable[dict], path: str, rows_per_sheet: int = EXCEL_MAX_ROWS - 1) -> int:
+    """
+    把历史记录完整内容逐条写入Excel（openpyxl 只写模式，边读边写，内存占用与记录数无关）
+    先写临时文件，完成后再替换目标文件；迭代中途抛出异常（如取消）时不生成目标文件
+    :return: 写入条数
+    """
+    part_path = path + ".part"
+    count = 0
+    try:
+        rows = ((_cell_text(history[field]) for field in HISTORY_FIELDS) for history in histories)
+        sample = [(index, *row) for index, row in enumerate(islice(rows, WIDTH_SAMPLE_ROWS), start=1)]
+        workbook = Workbook(write_only=True)
+        sheets = _StreamingSheets(workbook, HISTORY_SHEET_TITLE, HISTORY_HEADERS,
+                                  _column_widths(HISTORY_HEADERS, sample), rows_per_sheet)
+        remaining = ((index, *row) for index, row in enumerate(rows, start=len(sample) + 1))
+        for values in chain(sample, remaining):
+            sheets.append(values)
+            count += 1
+        sheets.ensure_sheet()
+        workbook.save(part_path)
+        os.replace(part_path, path)
+        return count
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+
 class ExcelExporter:
     """Excel导出工具"""
     @staticmethod
@@ -21,26 +139,18 @@ class ExcelExporter:
         if not save_path:
             return False
 
-        # 创建工作簿
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "AI日报"
-
-        # 写入内容
-        ws["A1"] = "生成时间"
-        ws["B1"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        ws["A2"] = "当日工作内容"
-        ws["B2"] = work_content
-        ws["A3"] = "生成日报内容"
-        # 按行拆分内容
-        content_lines = content.split("\n")
-        for idx, line in enumerate(content_lines, start=3):
-            ws[f"B{idx}"] = line
+        # 只写模式逐行写入（日报按行拆分到B列）
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("AI日报")
+        sheet.append(["生成时间", datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
+        sheet.append(["当日工作内容", _cell_text(work_content)])
+        for idx, line in enumerate(content.split("\n")):
+            sheet.append(["生成日报内容" if idx == 0 else None, _cell_text(line)])
 
         # 保存文件
         try:
-            wb.save(save_path)
+            workbook.save(save_path)
             return True
         except Exception as e:
             print(f"Excel导出失败：{e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,268 @@
+"""
+历史记录多格式导出（按当前搜索/筛选条件，从数据库游标逐条读取并写出，内存占用与记录数无关）
+- 导出器注册表：csv / jsonl / xlsx / markdown，新增格式继承 HistoryExporter 并用 @register_exporter 注册即可
+- 文件型导出使用大缓冲区写临时文件，完成后再替换目标文件（CSV/JSONL 字段与导入格式一致，可直接再导入）
+- markdown：按天生成 Markdown 文件目录（按年月分子目录），清单文件记录每个文件的内容哈希，
+  再次同步时只重写内容有变化的文件，并删除清单中已不再有记录的文件（不动目录中的其他文件）
+- 命令行（项目根目录）：python -m utils.history_exporters csv|jsonl|xlsx|markdown 路径 [--keyword 关键词] [--template-type 类型]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from itertools import groupby
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+from db.connection import QueryCancelled, connection_manager
+from db.history_dao import HistoryDAO
+from db.history_transfer import EXPORT_PROGRESS_EVERY, TRANSFER_FIELDS, ProgressCallback
+
+# 文件写缓冲区大小
+WRITE_BUFFER_BYTES = 1024 * 1024
+# Markdown 目录中的同步清单（相对路径 -> 内容哈希）
+MARKDOWN_MANIFEST = ".daily_paper_manifest.json"
+_DAY_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_UNKNOWN_DAY = "未知日期"
+
+
+class HistoryExporter(ABC):
+    """导出器基类：export 接收已按条件排好序的记录迭代器（逐条读取），写完返回附加统计（可为空字典）"""
+    name = ""          # 格式标识（注册表键/命令行参数）
+    label = ""         # 界面显示名称
+    extension = ""     # 文件扩展名；目录型导出为空
+    by_time = False    # 是否要求按生成时间倒序（全文检索默认按相关度排序）
+
+    @abstractmethod
+    def export(self, histories: Iterator[dict], path: str) -> dict:
+        ...
+
+
+_EXPORTERS: Dict[str, HistoryExporter] = {}
+
+
+def register_exporter(cls):
+    """类装饰器：注册导出器（按 name 覆盖同名导出器）"""
+    exporter = cls()
+    _EXPORTERS[exporter.name] = exporter
+    return cls
+
+
+def get_exporter(name: str) -> HistoryExporter:
+    if name not in _EXPORTERS:
+        raise ValueError(f"不支持的导出格式：{name or '未知'}（支持 {' / '.join(_EXPORTERS)}）")
+    return _EXPORTERS[name]
+
+
+def available_exporters() -> List[HistoryExporter]:
+    return list(_EXPORTERS.values())
+
+
+@contextmanager
+def _atomic_text_file(path: str, encoding: str = "utf-8") -> Iterator[TextIO]:
+    """先写 path.part，正常结束后替换目标文件；出错或取消时删除临时文件，目标文件保持原样"""
+    part_path = path + ".part"
+    try:
+        with open(part_path, "w", encoding=encoding, newline="", buffering=WRITE_BUFFER_BYTES) as f:
+            yield f
+        os.replace(part_path, path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+
+# ========== 文件型导出 ==========
+@register_exporter
+class CsvExporter(HistoryExporter):
+    name = "csv"
+    label = "CSV文件"
+    extension = "csv"
+
+    def export(self, histories: Iterator[dict], path: str) -> dict:
+        # UTF-8 BOM：Excel 可直接打开
+        with _atomic_text_file(path, "utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(TRANSFER_FIELDS)
+            writer.writerows(tuple(history[field] for field in TRANSFER_FIELDS) for history in histories)
+        return {}
+
+
+@register_exporter
+class JsonlExporter(HistoryExporter):
+    name = "jsonl"
+    label = "JSON Lines"
+    extension = "jsonl"
+
+    def export(self, histories: Iterator[dict], path: str) -> dict:
+        with _atomic_text_file(path) as f:
+            f.writelines(json.dumps({field: history[field] for field in TRANSFER_FIELDS}, ensure_ascii=False) + "\n"
+                         for history in histories)
+        return {}
+
+
+@register_exporter
+class ExcelHistoryExporter(HistoryExporter):
+    name = "xlsx"
+    label = "Excel文件"
+    extension = "xlsx"
+
+    def export(self, histories: Iterator[dict], path: str) -> dict:
+        # 局部导入：openpyxl 只在导出Excel时加载
+        from utils.excel_exporter import write_histories_to_excel
+        write_histories_to_excel(histories, path)
+        return {}
+
+
+# ========== Markdown 目录（按天，增量同步） ==========
+@register_exporter
+class MarkdownVaultExporter(HistoryExporter):
+    """每天一个 Markdown 文件（YYYY-MM/YYYY-MM-DD.md），当天记录按生成时间正序；内容未变化的文件不重写"""
+    name = "markdown"
+    label = "Markdown目录"
+    by_time = True
+
+    def export(self, histories: Iterator[dict], path: str) -> dict:
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, MARKDOWN_MANIFEST)
+        old_files = self._load_manifest(manifest_path)
+        new_files = {}
+        stats = {"files_written": 0, "files_unchanged": 0, "files_deleted": 0}
+        try:
+            # 记录按生成时间倒序读取，同一天的记录相邻，每次只在内存中保留一天
+            for day, records in groupby(histories, key=self._day_of):
+                relative_path = self._relative_path(day)
+                content = self._render_day(day, list(records)[::-1])
+                digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+                new_files[relative_path] = digest
+                file_path = os.path.join(path, *relative_path.split("/"))
+                if old_files.get(relative_path) == digest and os.path.exists(file_path):
+                    stats["files_unchanged"] += 1
+                    continue
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with _atomic_text_file(file_path) as f:
+                    f.write(content)
+                stats["files_written"] += 1
+        except BaseException:
+            # 中途取消/出错：已写入的文件记入清单，未处理到的保留原记录，不删除任何文件
+            self._save_manifest(manifest_path, {**old_files, **new_files})
+            raise
+        for relative_path in old_files.keys() - new_files.keys():
+            file_path = os.path.join(path, *relative_path.split("/"))
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                stats["files_deleted"] += 1
+            folder = os.path.dirname(file_path)
+            if folder != os.path.normpath(path) and os.path.isdir(folder) and not os.listdir(folder):
+                os.rmdir(folder)
+        self._save_manifest(manifest_path, new_files)
+        return stats
+
+    @staticmethod
+    def _day_of(history: dict) -> str:
+        day = (history["create_time"] or "")[:10]
+        return day if _DAY_PATTERN.match(day) else _UNKNOWN_DAY
+
+    @staticmethod
+    def _relative_path(day: str) -> str:
+        return f"{day[:7]}/{day}.md" if day != _UNKNOWN_DAY else f"{_UNKNOWN_DAY}.md"
+
+    @staticmethod
+    def _render_day(day: str, records: List[dict]) -> str:
+        parts = [f"# {day} 日报记录（{len(records)}条）\n"]
+        for history in records:
+            create_time = history["create_time"] or ""
+            parts.append(f"\n## {create_time[11:] or create_time} · 记录 #{history['id']}\n\n"
+                         f"### 工作内容\n\n{(history['work_content'] or '').strip()}\n\n"
+                         f"### 生成结果\n\n{(history['report_content'] or '').strip()}\n\n"
+                         f"<details><summary>使用的模板</summary>\n\n{(history['template_content'] or '').strip()}\n\n"
+                         f"</details>\n")
+        return "".join(parts)
+
+    @staticmethod
+    def _load_manifest(manifest_path: str) -> Dict[str, str]:
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                return dict(json.load(f).get("files", {}))
+        except (OSError, ValueError, AttributeError):
+            return {}  # 首次同步或清单损坏：全部重写
+
+    @staticmethod
+    def _save_manifest(manifest_path: str, files: Dict[str, str]):
+        with _atomic_text_file(manifest_path) as f:
+            json.dump({"version": 1, "files": dict(sorted(files.items()))}, f, ensure_ascii=False, indent=0)
+
+
+# ========== 导出入口 ==========
+def export_histories(fmt: str, path: str, keyword: str = "", template_type: str = "",
+                     progress: Optional[ProgressCallback] = None,
+                     cancel: Optional[Callable[[], bool]] = None) -> dict:
+    """
+    按搜索/筛选条件流式导出，返回统计：records 导出条数 / canceled / elapsed_s，以及导出器的附加统计
+    取消时文件型导出不生成目标文件；Markdown 目录保留已同步的文件
+    """
+    exporter = get_exporter(fmt)
+    history_dao = HistoryDAO()
+    total = history_dao.count_history(keyword, template_type)
+    stats = {"records": 0, "canceled": False, "elapsed_s": 0.0}
+    start = time.perf_counter()
+    histories = history_dao.iter_history_by_conditions(keyword, template_type, cancel, exporter.by_time)
+
+    def tracked() -> Iterator[dict]:
+        for history in histories:
+            yield history
+            stats["records"] += 1
+            if stats["records"] % EXPORT_PROGRESS_EVERY == 0 and stats["records"] < total:
+                if cancel and cancel():
+                    raise QueryCancelled()
+                if progress:
+                    progress(stats["records"], stats["records"], total)
+
+    try:
+        stats.update(exporter.export(tracked(), path))
+    except QueryCancelled:
+        stats["canceled"] = True
+    finally:
+        histories.close()  # 提前结束时归还只读连接
+    stats["elapsed_s"] = time.perf_counter() - start
+    if progress and not stats["canceled"]:
+        progress(stats["records"], stats["records"], stats["records"])
+    print(f"📤 导出{exporter.label}{'已取消' if stats['canceled'] else '完成'}：{stats['records']}条记录，"
+          f"耗时 {stats['elapsed_s']:.1f} s")
+    return stats
+
+
+def _print_progress(rows: int, done: int, total: int):
+    percent = done * 100 // total if total else 100
+    print(f"\r  {percent:3d}%  {rows}条", end="\n" if done >= total else "", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="历史记录多格式导出（CSV/JSONL/Excel/Markdown目录）")
+    parser.add_argument("format", choices=list(_EXPORTERS), help="导出格式")
+    parser.add_argument("path", help="文件路径（markdown 为目录，再次导出到同一目录时增量同步）")
+    parser.add_argument("--keyword", default="", help="搜索关键词（同历史记录窗口）")
+    parser.add_argument("--template-type", default="", help="模板类型筛选")
+    args = parser.parse_args(argv)
+    # 局部导入，避免循环导入
+    from db.db_init import init_database
+    init_database()
+    try:
+        stats = export_histories(args.format, args.path, args.keyword, args.template_type, progress=_print_progress)
+        if "files_written" in stats:
+            print(f"📝 写入{stats['files_written']}个文件，未变化{stats['files_unchanged']}个，"
+                  f"删除{stats['files_deleted']}个")
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"\n导出失败：{e}")
+        return 1
+    finally:
+        connection_manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())